@@ -0,0 +1,282 @@
+# Замеры производительности приложения на синтетическом заводе.
+#
+#   python benchmark.py --employees 200 --models 20 --stages 8 --orders 20000 --years 3 \
+#       -o bench.json
+#   python benchmark.py --orders 20000 --years 3 -o new.json --compare bench.json
+#
+# Данные создаёт planning.synthetic, они записываются в базу SQLite (--db —
+# сохранить и переиспользовать базу между запусками), а окно приложения
+# открывается на платформе Qt "offscreen". Каждый замер повторяется --repeat
+# раз; в JSON сохраняются минимум, медиана и максимум в миллисекундах, а
+# также память на заказ. С --compare замеры, медиана которых (или память на
+# заказ) выросла больше чем на --tolerance относительно эталона, считаются
+# регрессией (код возврата 1).
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QDate, QT_VERSION_STR
+from PyQt5.QtWidgets import QApplication, QMessageBox, QTabWidget
+
+from gui.charts import VIEW_ORDERS, VIEW_DAILY, VIEW_CUMULATIVE
+from planning import OrderTable, SqliteStorage
+from planning.order_table import order_columns
+from planning.synthetic import generate_plant, write_plant
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = os.path.join(HERE, "deepseek_python_20250827_e20e6f (1) (1).py")
+NOISE_MS = 1.0  # Разница медиан меньше этой не считается регрессией
+NOISE_BYTES = 8  # Рост памяти на заказ меньше этого не считается регрессией
+# Атрибуты заказа, которые читает полный обход (как таблица и графики)
+ORDER_ATTRIBUTES = ("id", "quantity", "completed_units", "due_date", "priority",
+                    "estimated_end_date")
+
+
+def load_app_module():
+    spec = importlib.util.spec_from_file_location("production_app", APP_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def show_tab(window, widget):
+    # Вкладка с widget делается текущей, чтобы замер включал его отрисовку
+    tabs = window.findChild(QTabWidget)
+    for i in range(tabs.count()):
+        if tabs.widget(i).isAncestorOf(widget):
+            tabs.setCurrentIndex(i)
+            return
+
+
+def _stats(times):
+    times = [t * 1000 for t in times]
+    return {"runs": len(times), "min_ms": round(min(times), 3),
+            "median_ms": round(statistics.median(times), 3), "max_ms": round(max(times), 3)}
+
+
+class Benchmark:
+    SETTLE_PASSES = 20  # Проходы цикла событий после фоновых задач (применение частями)
+
+    def __init__(self, qt_app, repeat):
+        self.qt_app = qt_app
+        self.repeat = repeat
+        self.results = {}
+
+    def settle(self, window):
+        # Ожидание фоновых задач и применения их результатов в потоке интерфейса
+        while not window.tasks.is_idle():
+            self.qt_app.processEvents()
+            time.sleep(0.001)
+        for _ in range(self.SETTLE_PASSES):
+            self.qt_app.processEvents()
+
+    def measure(self, name, run, setup=None, repeat=None):
+        times = []
+        for _ in range(repeat or self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        self.results[name] = _stats(times)
+        print(f"{name:32} медиана {self.results[name]['median_ms']:10.2f} мс", file=sys.stderr)
+
+
+def iterate_orders(orders):
+    # Полный обход заказов с чтением атрибутов каждого
+    for order in orders:
+        for name in ORDER_ATTRIBUTES:
+            getattr(order, name)
+        order.model
+        order.last_progress_date
+
+
+def order_memory(window):
+    """Память на заказ (байт): таблица заказов и записи, построенные из строк базы."""
+    rows = window.storage.load_orders()
+    models = {model.id: model for model in window.product_models}
+    table, window.order_table = window.order_table, OrderTable(window.progress)
+    tracemalloc.start()
+    try:
+        orders = [window.order_from_row(row, models) for row in rows]
+        allocated, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        window.order_table = table
+    return {"orders": len(orders), "bytes_per_order": round(allocated / max(len(orders), 1), 1)}
+
+
+def run_benchmarks(module, qt_app, db_path, repeat):
+    bench = Benchmark(qt_app, repeat)
+
+    # Холодный старт окна: загрузка базы, построение интерфейса, первая отрисовка
+    def open_window():
+        window = module.ProductionScheduleApp(SqliteStorage(db_path, journal=True))
+        window.show()
+        qt_app.processEvents()
+        return window
+
+    windows = []
+    bench.measure("startup", lambda: windows.append(open_window()),
+                  setup=lambda: windows and windows.pop().close(), repeat=min(repeat, 3))
+    window = windows.pop()
+    bench.settle(window)
+
+    def flush_and_paint():
+        window.changes.flush()
+        qt_app.processEvents()
+
+    show_tab(window, window.orders_table)
+    bench.measure("tables.orders_refresh",
+                  lambda: (window.update_orders_table(), qt_app.processEvents()))
+    show_tab(window, window.employees_table)
+    bench.measure("tables.employees_refresh",
+                  lambda: (window.update_employees_table(), qt_app.processEvents()))
+    show_tab(window, window.posts_table)
+    bench.measure("posts.update_table",
+                  lambda: (window.update_posts_table(), qt_app.processEvents()))
+
+    show_tab(window, window.chart_view)
+    for view in (VIEW_ORDERS, VIEW_DAILY, VIEW_CUMULATIVE):
+        combo = window.chart_view_combo
+        combo.setCurrentIndex(combo.findData(view))
+        bench.settle(window)
+        bench.measure(f"charts.{view}", lambda: (window.update_charts(), bench.settle(window)))
+
+    # Правки: время в потоке интерфейса до доставки событий; фоновые пересчеты
+    # дожидаются вне замера
+    window.order_model_combo.setCurrentIndex(0)
+    bench.measure("orders.create", lambda: (window.create_order(), flush_and_paint()),
+                  setup=lambda: bench.settle(window))
+
+    open_orders = [o.id for o in window.orders if o.completed_units < o.quantity]
+    window.daily_production_input.setValue(1)
+    bench.measure("progress.save", lambda: (window.save_daily_production(), flush_and_paint()),
+                  setup=lambda: (bench.settle(window),
+                                 window.daily_order_combo.select_id(open_orders[-1])))
+
+    bench.measure("forecast.sync", window.recalculate_forecasts)
+    bench.measure("forecast.background", lambda: (window.schedule_forecasts(), bench.settle(window)))
+
+    engineer = next(e for e in window.employees if e.can_work_on_stage(window.post_type(1)))
+    bench.measure("assignment.single",
+                  lambda: (window.assign_employee_to_post(1, engineer.id), flush_and_paint()),
+                  setup=lambda: bench.settle(window))
+    window.auto_assign_end_edit.setDate(QDate.currentDate().addDays(13))
+    bench.measure("assignment.auto_14_days", lambda: (window.auto_assign_posts(), flush_and_paint()),
+                  setup=lambda: bench.settle(window))
+
+    bench.settle(window)
+    orders = list(window.orders)
+    bench.measure("orders.iterate", lambda: iterate_orders(orders))
+    bench.measure("orders.columns", lambda: order_columns(orders, *ORDER_ATTRIBUTES))
+    memory = order_memory(window)
+    print(f"{'orders.memory':32} {memory['bytes_per_order']:10.1f} байт на заказ", file=sys.stderr)
+    window.close()
+    return bench.results, memory
+
+
+def compare(results, memory, baseline, tolerance):
+    """Регрессии [(замер, эталон, сейчас)] по медианам (мс) и памяти на заказ (байт)."""
+    regressions = []
+    previous = baseline.get("memory", {}).get("bytes_per_order")
+    if previous is not None:
+        current = memory["bytes_per_order"]
+        marker = ""
+        if current > previous * (1 + tolerance) and current - previous > NOISE_BYTES:
+            regressions.append(("orders.memory", previous, current))
+            marker = "  РЕГРЕССИЯ"
+        print(f"{'orders.memory':32} {previous:10.1f} -> {current:10.1f} байт{marker}", file=sys.stderr)
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        before, after = previous["median_ms"], current["median_ms"]
+        marker = ""
+        if after > before * (1 + tolerance) and after - before > NOISE_MS:
+            regressions.append((name, before, after))
+            marker = "  РЕГРЕССИЯ"
+        print(f"{name:32} {before:10.2f} -> {after:10.2f} мс{marker}", file=sys.stderr)
+    return regressions
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                                capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Замеры производительности на синтетическом заводе")
+    data = parser.add_argument_group("синтетические данные")
+    data.add_argument("--employees", type=int, default=100)
+    data.add_argument("--models", type=int, default=20)
+    data.add_argument("--stages", type=int, default=6, help="этапов в модели")
+    data.add_argument("--orders", type=int, default=10000)
+    data.add_argument("--years", type=float, default=2, help="лет истории заказов и выработки")
+    data.add_argument("--seed", type=int, default=0)
+    data.add_argument("--db", help="база с данными: создается, если ее нет, иначе используется")
+    parser.add_argument("--repeat", type=int, default=5, help="повторов каждого замера")
+    parser.add_argument("--output", "-o", help="файл результатов JSON ('-' — stdout)")
+    parser.add_argument("--compare", help="эталонный JSON для поиска регрессий")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="допустимый рост медианы (0.25 — на 25%%)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    parameters = {"employees": args.employees, "models": args.models, "stages": args.stages,
+                  "orders": args.orders, "years": args.years, "seed": args.seed}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, "benchmark.db")
+        if not os.path.exists(db_path):
+            print("Создание синтетических данных...", file=sys.stderr)
+            storage = SqliteStorage(db_path)
+            write_plant(storage, generate_plant(args.employees, args.models, args.stages,
+                                                args.orders, args.years, seed=args.seed))
+            storage.close()
+
+        qt_app = QApplication.instance() or QApplication([])
+        # Подтверждения и предупреждения в замерах не показываются
+        QMessageBox.information = QMessageBox.warning = staticmethod(lambda *a, **k: QMessageBox.Ok)
+        results, memory = run_benchmarks(load_app_module(), qt_app, db_path, args.repeat)
+
+    report = {"created": datetime.now().isoformat(timespec="seconds"), "commit": _git_commit(),
+              "python": platform.python_version(), "qt": QT_VERSION_STR,
+              "platform": platform.platform(), "parameters": parameters, "results": results,
+              "memory": memory}
+    if args.output == "-":
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as stream:
+            json.dump(report, stream, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as stream:
+            baseline = json.load(stream)
+        if baseline.get("parameters") != parameters:
+            print("Внимание: эталон снят на других параметрах данных", file=sys.stderr)
+        if compare(results, memory, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
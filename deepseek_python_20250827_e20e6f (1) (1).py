@@ -1,73 +1,133 @@
+import time
+
+STARTED = time.perf_counter()  # Начало запуска — для замера холодного старта
+
+import gc
+import os
 import sys
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, 
                              QComboBox, QSpinBox, QDateEdit, QMessageBox, QTabWidget, QGroupBox,
-                             QHeaderView, QTextEdit)
-from PyQt5.QtCore import Qt, QDate
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import numpy as np
-
-class Employee:
-    def __init__(self, name, role):
-        self.name = name
-        self.role = role  # "Монтажник" или "Инженер"
-        self.assigned_post = None
-        self.work_hours = 8  # По умолчанию 8 часов
-
-    def can_work_on_stage(self, stage_type):
-        if stage_type == "Инженерная":
-            return self.role == "Инженер"
-        return True  # Монтажники могут работать на монтажных этапах
-
-class ProductionStage:
-    def __init__(self, name, stage_type, time_per_unit):
-        self.name = name
-        self.stage_type = stage_type  # "Монтажная" или "Инженерная"
-        self.time_per_unit = time_per_unit  # Время на единицу продукции в часах
+                             QHeaderView, QTextEdit, QTableView, QCheckBox, QDoubleSpinBox,
+                             QFileDialog)
+from PyQt5.QtCore import Qt, QDate, QTimer, pyqtSignal
 
-class ProductModel:
-    def __init__(self, name, stages):
-        self.name = name
-        self.stages = stages  # Список этапов ProductionStage
-
-class ProductionOrder:
-    def __init__(self, model, quantity, creation_date):
-        self.model = model
-        self.quantity = quantity
-        self.creation_date = creation_date
-        self.completed_units = 0
-        self.daily_progress = {}  # Дата: количество произведенных единиц
-        self.estimated_end_date = None
-        self.calculate_estimated_end_date()
-
-    def calculate_estimated_end_date(self):
-        # Этот метод будет пересчитываться после назначения сотрудников
-        pass
-
-    def add_daily_progress(self, date, units):
-        self.daily_progress[date] = units
-        self.completed_units += units
-        # Пересчет оставшегося времени после добавления прогресса
+from planning import (ForecastEngine, AssignmentStore, AssignmentPlanner, SqliteStorage,
+                      ProgressStore, OrderTable, ShiftCalendar, CapacityTimeline, as_date, build_posts,
+                      default_posts, Employee, ProductionStage, ProductModel, ProductionOrder,
+                      continue_ids, DATE_FORMAT, STAGE_ASSEMBLY, STAGE_ENGINEERING, ROLE_ENGINEER,
+                      ThroughputEstimator, LineBalancer)
+from planning.order_table import open_orders
+from planning.progress import to_ordinals
+from planning.scheduler import Scheduler, Scenario, WhatIfAnalyzer, RULES
+from planning.simulation import LineSimulator
+from planning.storage import CREATION_FORMAT
+from planning.importer import KINDS as IMPORT_KINDS, ImportContext, BulkImporter
+from planning.chart_data import aggregate_orders, plant_output
+from planning.events import (ChangeBus, EMPLOYEES_ADDED, EMPLOYEES_REMOVED, ORDERS_ADDED,
+                             ORDER_PROGRESS, ASSIGNMENTS_CHANGED, POSTS_CHANGED, CALENDAR_CHANGED)
+from planning.search import PrefixIndex
+from gui.table_models import (EmployeesTableModel, ModelsTableModel, OrdersTableModel,
+                              ButtonDelegate)
+from gui.pickers import Picker, LabelProxyModel, column_filter
+from gui.tasks import TaskRunner, CancelToken
+from gui.charts import ChartView, VIEW_ORDERS, VIEW_DAILY, VIEW_CUMULATIVE
+from gui.stall_monitor import StallMonitor
+from planning.trace import TRACER, traced
 
 class ProductionScheduleApp(QMainWindow):
-    def __init__(self):
+    FORECAST_SLICE = 10000  # Строк прогноза, применяемых за один проход цикла событий
+    # Изменение другого рабочего места (версия, вид, данные) из потока клиента сервера планирования
+    remote_change = pyqtSignal(object, str, object)
+    
+    def __init__(self, storage=None):
         super().__init__()
         self.employees = []
         self.product_models = []
         self.orders = []
-        self.current_assignments = {}  # Пост: сотрудник
+        self.current_assignments = AssignmentStore()  # Дата -> пост -> сотрудник
         self.workday_hours = 8  # Стандартный рабочий день
-        
+        self.posts = default_posts()  # Описания постов линии
+        self.forecast_engine = ForecastEngine()
+        self.scheduler = Scheduler(self.forecast_engine)
+        self.sequencing_rule = "fifo"  # Правило очередности заказов
+        self.storage = storage
+        self.tasks = TaskRunner(self)  # Прогнозы, моделирование, импорт и графики в фоне
+        self.forecast_generation = 0  # Номер последнего применяемого результата прогноза
+        # События изменений доставляются представлениям пакетом за проход цикла событий
+        self.changes = ChangeBus(schedule=lambda flush: QTimer.singleShot(0, flush))
+        self.post_pickers = []  # Выбор сотрудника в таблице постов
+        self.stall_monitor = None  # Создается при включении трассировки
+        # Поиск по мере ввода в выпадающих списках; индексы строятся при первом поиске
+        self.employee_index = PrefixIndex(lambda: ((e.id, e.name) for e in self.employees))
+        self.order_index = PrefixIndex(lambda: ((o.id, self.order_search_text(o))
+                                                for o in self.orders))
+        # Общее колоночное хранилище выработки всех заказов
+        self.progress = ProgressStore(loader=storage.load_progress if storage is not None else None)
+        # Поля заказов — в колонках таблицы, self.orders хранит лёгкие записи-строки
+        self.order_table = OrderTable(self.progress)
+        
+        has_data = storage is not None and not storage.is_empty()
+        self.calendar = ShiftCalendar(default_hours=self.workday_hours)
+        if has_data:
+            self.load_settings()
+        # Мощность постов по дням с префиксными суммами для прогноза
+        self.capacity = CapacityTimeline(self.calendar, self.current_assignments, self.post_type,
+                                         datetime.now().date())
+        # Фактические темпы моделей и отдача постов, обновляются при вводе выработки
+        self.throughput = ThroughputEstimator(self.forecast_engine, self.capacity.day_capacity)
         self.initUI()
-        self.load_sample_data()
+        self.subscribe_views()
+        if has_data:
+            self.load_from_storage()
+        else:
+            self.continue_ids()
+            self.load_sample_data()
+        # Клиент общего сервера планирования: изменения других рабочих мест приходят дельтами
+        listen = getattr(storage, "listen", None)
+        if listen is not None:
+            # Всегда через очередь событий: накопленные дельты listen отдает сразу,
+            # а их применение может обращаться к серверу
+            self.remote_change.connect(self.apply_remote_change, Qt.QueuedConnection)
+            listen(self.remote_change.emit)
+        self.freeze_heap()
+        if os.environ.get("PRODUCTION_TRACE_LOG"):
+            self.tracing_action.setChecked(True)
+        
+    LARGE_IMPORT_ROWS = 10000  # После импорта от стольких строк куча замораживается заново
+
+    @staticmethod
+    def freeze_heap():
+        # Долгоживущие объекты (модули, виджеты, загруженные данные) исключаются
+        # из полной сборки мусора: её паузы растут с числом объектов и
+        # останавливают поток интерфейса, даже если сборка началась в фоновой задаче.
+        # Замороженное не освобождается до конца процесса, поэтому сначала
+        # собирается текущий мусор (иначе его циклы остались бы навсегда), и
+        # вызывается это только там, где всё живое долгоживуще: после запуска
+        # и после крупного импорта
+        gc.collect()
+        gc.freeze()
         
     def initUI(self):
         self.setWindowTitle("Система планирования производства")
         self.setGeometry(100, 100, 1200, 800)
         
+        # Массовый импорт из CSV/XLSX
+        import_menu = self.menuBar().addMenu("Импорт")
+        for kind, title in IMPORT_KINDS.items():
+            action = import_menu.addAction(f"{title}...")
+            action.triggered.connect(lambda checked=False, kind=kind: self.import_file(kind))
+        import_menu.addSeparator()
+        import_menu.addAction("Отменить импорт").triggered.connect(self.cancel_import)
+        
+        # Трассировка обработчиков и зависаний интерфейса (выключена по умолчанию)
+        service_menu = self.menuBar().addMenu("Сервис")
+        self.tracing_action = service_menu.addAction("Трассировка")
+        self.tracing_action.setCheckable(True)
+        self.tracing_action.toggled.connect(self.set_tracing)
+        service_menu.addAction("Сохранить трассу (Chrome)...").triggered.connect(self.export_trace)
+        
         # Создаем вкладки
         tabs = QTabWidget()
         self.setCentralWidget(tabs)
@@ -92,13 +152,29 @@ class ProductionScheduleApp(QMainWindow):
         add_employee_layout.addWidget(self.employee_name_input)
         add_employee_layout.addWidget(QLabel("Должность:"))
         add_employee_layout.addWidget(self.employee_role_combo)
+        self.employee_hours_input = QDoubleSpinBox()
+        self.employee_hours_input.setRange(0.5, 24)
+        self.employee_hours_input.setValue(8)
+        add_employee_layout.addWidget(QLabel("Часов в день:"))
+        add_employee_layout.addWidget(self.employee_hours_input)
         add_employee_layout.addWidget(add_employee_btn)
         add_employee_group.setLayout(add_employee_layout)
         
         # Таблица сотрудников
-        self.employees_table = QTableWidget()
-        self.employees_table.setColumnCount(3)
-        self.employees_table.setHorizontalHeaderLabels(["Имя", "Должность", "Действия"])
+        self.employees_model = EmployeesTableModel(self.employees, self)
+        self.employees_table = QTableView()
+        self.employees_table.setModel(self.employees_model)
+        self.employees_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        delete_delegate = ButtonDelegate(self.employees_table)
+        delete_delegate.clicked.connect(lambda row: self.delete_employee(self.employees[row]))
+        self.employees_table.setItemDelegateForColumn(EmployeesTableModel.ACTIONS_COLUMN,
+                                                      delete_delegate)
+        # Списки сотрудников для постов — общая модель; на инженерные посты только инженеры
+        self.post_employee_models = {
+            STAGE_ASSEMBLY: self.employees_model,
+            STAGE_ENGINEERING: column_filter(self.employees_model, EmployeesTableModel.ROLE_COLUMN,
+                                             ROLE_ENGINEER, self),
+        }
         
         employee_layout.addWidget(add_employee_group)
         employee_layout.addWidget(self.employees_table)
@@ -161,9 +237,10 @@ class ProductionScheduleApp(QMainWindow):
         model_layout.addWidget(add_model_group)
         
         # Таблица моделей
-        self.models_table = QTableWidget()
-        self.models_table.setColumnCount(2)
-        self.models_table.setHorizontalHeaderLabels(["Название", "Кол-во этапов"])
+        self.models_model = ModelsTableModel(self.product_models, self)
+        self.models_table = QTableView()
+        self.models_table.setModel(self.models_model)
+        self.models_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         model_layout.addWidget(self.models_table)
         
         model_tab.setLayout(model_layout)
@@ -183,13 +260,119 @@ class ProductionScheduleApp(QMainWindow):
         # Продолжительность рабочего дня
         workday_layout = QHBoxLayout()
         workday_layout.addWidget(QLabel("Продолжительность рабочего дня (часы):"))
-        self.workday_hours_input = QLineEdit()
-        self.workday_hours_input.setText("8")
-        self.workday_hours_input.textChanged.connect(self.update_workday_hours)
+        self.workday_hours_input = QDoubleSpinBox()
+        self.workday_hours_input.setRange(0.5, 24)
+        self.workday_hours_input.setValue(self.workday_hours)
+        # Значение применяется по Enter, уходу фокуса или стрелкам, а не на каждую
+        # набранную цифру: изменение пересчитывает мощность и уходит на сервер
+        self.workday_hours_input.setKeyboardTracking(False)
+        self.workday_hours_input.valueChanged.connect(self.update_workday_hours)
         workday_layout.addWidget(self.workday_hours_input)
         
+        # Конфигурация постов
+        posts_config_layout = QHBoxLayout()
+        posts_config_layout.addWidget(QLabel("Монтажных постов:"))
+        self.assembly_posts_input = QSpinBox()
+        self.assembly_posts_input.setRange(0, 1000)
+        self.assembly_posts_input.setValue(sum(p.stage_type == "Монтажная" for p in self.posts))
+        posts_config_layout.addWidget(self.assembly_posts_input)
+        posts_config_layout.addWidget(QLabel("Инженерных постов:"))
+        self.engineering_posts_input = QSpinBox()
+        self.engineering_posts_input.setRange(0, 1000)
+        self.engineering_posts_input.setValue(sum(p.stage_type == "Инженерная" for p in self.posts))
+        posts_config_layout.addWidget(self.engineering_posts_input)
+        self.assembly_posts_input.valueChanged.connect(self.update_post_definitions)
+        self.engineering_posts_input.valueChanged.connect(self.update_post_definitions)
+        
+        # Автоматическое назначение на диапазон дат
+        auto_assign_layout = QHBoxLayout()
+        auto_assign_layout.addWidget(QLabel("Автоназначение до:"))
+        self.auto_assign_end_edit = QDateEdit()
+        self.auto_assign_end_edit.setDate(QDate.currentDate().addDays(6))
+        auto_assign_layout.addWidget(self.auto_assign_end_edit)
+        auto_assign_btn = QPushButton("Автоназначение")
+        auto_assign_btn.clicked.connect(self.auto_assign_posts)
+        auto_assign_layout.addWidget(auto_assign_btn)
+        
+        # Баланс линии: узкое место и потребность в постах на выбранный день
+        balance_group = QGroupBox("Баланс линии")
+        balance_layout = QVBoxLayout()
+        balance_target_layout = QHBoxLayout()
+        balance_target_layout.addWidget(QLabel("Целевой выпуск, ед./день:"))
+        self.balance_target_input = QSpinBox()
+        self.balance_target_input.setRange(0, 1000000)
+        self.balance_target_input.setSpecialValueText("предельный")
+        balance_target_layout.addWidget(self.balance_target_input)
+        analyze_line_btn = QPushButton("Анализ")
+        analyze_line_btn.clicked.connect(self.analyze_line)
+        balance_target_layout.addWidget(analyze_line_btn)
+        balance_layout.addLayout(balance_target_layout)
+        self.balance_label = QLabel()
+        self.balance_label.setWordWrap(True)
+        balance_layout.addWidget(self.balance_label)
+        balance_group.setLayout(balance_layout)
+        
+        # Рабочий календарь: выходные, праздники, сверхурочные, отпуска
+        calendar_group = QGroupBox("Рабочий календарь")
+        calendar_layout = QVBoxLayout()
+        
+        self.weekends_checkbox = QCheckBox("Суббота и воскресенье — выходные")
+        self.weekends_checkbox.setChecked(bool(self.calendar.weekends))
+        self.weekends_checkbox.toggled.connect(self.update_weekends)
+        calendar_layout.addWidget(self.weekends_checkbox)
+        
+        day_hours_layout = QHBoxLayout()
+        day_hours_layout.addWidget(QLabel("Часов в выбранный день (0 — праздник):"))
+        self.day_hours_input = QDoubleSpinBox()
+        self.day_hours_input.setRange(0, 24)
+        self.day_hours_input.setValue(self.workday_hours)
+        day_hours_layout.addWidget(self.day_hours_input)
+        set_day_hours_btn = QPushButton("Установить")
+        set_day_hours_btn.clicked.connect(self.set_day_hours)
+        day_hours_layout.addWidget(set_day_hours_btn)
+        reset_day_hours_btn = QPushButton("Обычный день")
+        reset_day_hours_btn.clicked.connect(self.reset_day_hours)
+        day_hours_layout.addWidget(reset_day_hours_btn)
+        calendar_layout.addLayout(day_hours_layout)
+        
+        post_hours_layout = QHBoxLayout()
+        post_hours_layout.addWidget(QLabel("Пост"))
+        self.post_hours_post_input = QSpinBox()
+        self.post_hours_post_input.setRange(1, 999)
+        post_hours_layout.addWidget(self.post_hours_post_input)
+        post_hours_layout.addWidget(QLabel("работает не больше часов в день:"))
+        self.post_hours_input = QDoubleSpinBox()
+        self.post_hours_input.setRange(0, 24)
+        self.post_hours_input.setValue(self.workday_hours)
+        post_hours_layout.addWidget(self.post_hours_input)
+        set_post_hours_btn = QPushButton("Ограничить")
+        set_post_hours_btn.clicked.connect(self.set_post_hours)
+        post_hours_layout.addWidget(set_post_hours_btn)
+        clear_post_hours_btn = QPushButton("Без ограничения")
+        clear_post_hours_btn.clicked.connect(self.clear_post_hours)
+        post_hours_layout.addWidget(clear_post_hours_btn)
+        calendar_layout.addLayout(post_hours_layout)
+        
+        vacation_layout = QHBoxLayout()
+        vacation_layout.addWidget(QLabel("Отпуск:"))
+        self.vacation_employee_combo = Picker(self.employees_model, self.employee_index, "Сотрудник")
+        vacation_layout.addWidget(self.vacation_employee_combo)
+        vacation_layout.addWidget(QLabel("с выбранной даты по"))
+        self.vacation_end_edit = QDateEdit()
+        self.vacation_end_edit.setDate(QDate.currentDate().addDays(13))
+        vacation_layout.addWidget(self.vacation_end_edit)
+        add_vacation_btn = QPushButton("Добавить отпуск")
+        add_vacation_btn.clicked.connect(self.add_vacation)
+        vacation_layout.addWidget(add_vacation_btn)
+        calendar_layout.addLayout(vacation_layout)
+        calendar_group.setLayout(calendar_layout)
+        
         assignment_layout.addLayout(date_layout)
         assignment_layout.addLayout(workday_layout)
+        assignment_layout.addLayout(posts_config_layout)
+        assignment_layout.addLayout(auto_assign_layout)
+        assignment_layout.addWidget(balance_group)
+        assignment_layout.addWidget(calendar_group)
         
         # Таблица постов
         posts_group = QGroupBox("Назначение на посты")
@@ -218,7 +401,7 @@ class ProductionScheduleApp(QMainWindow):
         create_order_group = QGroupBox("Создать заказ")
         create_order_layout = QHBoxLayout()
         
-        self.order_model_combo = QComboBox()
+        self.order_model_combo = Picker(self.models_model)
         self.order_quantity_input = QSpinBox()
         self.order_quantity_input.setMinimum(1)
         self.order_quantity_input.setMaximum(10000)
@@ -229,25 +412,57 @@ class ProductionScheduleApp(QMainWindow):
         
         create_order_layout.addWidget(QLabel("Модель:"))
         create_order_layout.addWidget(self.order_model_combo)
+        self.order_due_date_edit = QDateEdit()
+        self.order_due_date_edit.setDate(QDate.currentDate().addDays(30))
+        self.order_priority_input = QSpinBox()
+        self.order_priority_input.setRange(1, 10)
+        
         create_order_layout.addWidget(QLabel("Количество:"))
         create_order_layout.addWidget(self.order_quantity_input)
+        create_order_layout.addWidget(QLabel("Срок:"))
+        create_order_layout.addWidget(self.order_due_date_edit)
+        create_order_layout.addWidget(QLabel("Приоритет:"))
+        create_order_layout.addWidget(self.order_priority_input)
         create_order_layout.addWidget(create_order_btn)
         create_order_group.setLayout(create_order_layout)
         orders_layout.addWidget(create_order_group)
         
         # Таблица заказов
-        self.orders_table = QTableWidget()
-        self.orders_table.setColumnCount(5)
-        self.orders_table.setHorizontalHeaderLabels(["Модель", "Количество", "Создан", "Прогноз завершения", "Выполнено"])
+        self.orders_model = OrdersTableModel(self.orders, self, throughput=self.throughput)
+        self.orders_table = QTableView()
+        self.orders_table.setModel(self.orders_model)
+        self.orders_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         orders_layout.addWidget(self.orders_table)
         
+        rule_layout = QHBoxLayout()
+        rule_layout.addWidget(QLabel("Очередность заказов:"))
+        self.sequencing_rule_combo = QComboBox()
+        for rule, title in RULES.items():
+            self.sequencing_rule_combo.addItem(title, rule)
+        self.sequencing_rule_combo.currentIndexChanged.connect(self.update_sequencing_rule)
+        rule_layout.addWidget(self.sequencing_rule_combo)
+        orders_layout.addLayout(rule_layout)
+        
+        analysis_layout = QHBoxLayout()
+        simulate_btn = QPushButton("Моделирование сроков (P50/P90)")
+        simulate_btn.clicked.connect(self.simulate_completion)
+        analysis_layout.addWidget(simulate_btn)
+        compare_rules_btn = QPushButton("Сравнить правила очередности")
+        compare_rules_btn.clicked.connect(self.compare_rules)
+        analysis_layout.addWidget(compare_rules_btn)
+        day_plan_btn = QPushButton("План выпуска на дату выработки")
+        day_plan_btn.clicked.connect(self.show_day_plan)
+        analysis_layout.addWidget(day_plan_btn)
+        orders_layout.addLayout(analysis_layout)
+        
         # Ввод ежедневной продукции
         daily_production_group = QGroupBox("Ежедневная выработка")
         daily_production_layout = QVBoxLayout()
         
         select_order_layout = QHBoxLayout()
         select_order_layout.addWidget(QLabel("Заказ:"))
-        self.daily_order_combo = QComboBox()
+        self.daily_order_combo = Picker(LabelProxyModel(self.orders_model, self.order_label, self),
+                                        self.order_index, "№ заказа или модель")
         select_order_layout.addWidget(self.daily_order_combo)
         
         select_date_layout = QHBoxLayout()
@@ -279,9 +494,28 @@ class ProductionScheduleApp(QMainWindow):
         charts_tab = QWidget()
         charts_layout = QVBoxLayout()
         
-        self.figure = Figure()
-        self.canvas = FigureCanvas(self.figure)
-        charts_layout.addWidget(self.canvas)
+        chart_options_layout = QHBoxLayout()
+        chart_options_layout.addWidget(QLabel("График:"))
+        self.chart_view_combo = QComboBox()
+        self.chart_view_combo.addItem("Прогресс заказов", VIEW_ORDERS)
+        self.chart_view_combo.addItem("Выпуск завода по дням", VIEW_DAILY)
+        self.chart_view_combo.addItem("Накопленный выпуск", VIEW_CUMULATIVE)
+        self.chart_view_combo.currentIndexChanged.connect(self.update_charts)
+        chart_options_layout.addWidget(self.chart_view_combo)
+        chart_options_layout.addWidget(QLabel("Группировка заказов:"))
+        self.chart_group_combo = QComboBox()
+        for title, group in (("Автоматически", "auto"), ("По заказам", "order"),
+                             ("По моделям", "model"), ("По неделям завершения", "week"),
+                             ("По статусу", "status")):
+            self.chart_group_combo.addItem(title, group)
+        self.chart_group_combo.currentIndexChanged.connect(self.update_charts)
+        chart_options_layout.addWidget(self.chart_group_combo)
+        chart_options_layout.addStretch()
+        charts_layout.addLayout(chart_options_layout)
+        
+        # matplotlib загружается при первом построении графиков
+        self.chart_view = ChartView()
+        charts_layout.addWidget(self.chart_view, 1)
         
         update_charts_btn = QPushButton("Обновить графики")
         update_charts_btn.clicked.connect(self.update_charts)
@@ -296,19 +530,102 @@ class ProductionScheduleApp(QMainWindow):
         tabs.addTab(orders_tab, "Заказы")
         tabs.addTab(charts_tab, "Графики")
         
-        self.update_employees_table()
-        self.update_models_table()
         self.update_posts_table()
-        self.update_orders_table()
-        self.update_order_combos()
+        
+    def notify(self, title, text):
+        # Подтверждение показывается после выхода из обработчика: интервал
+        # трассировки измеряет работу, а не время чтения сообщения
+        QTimer.singleShot(0, lambda: QMessageBox.information(self, title, text))
+        
+    def set_tracing(self, enabled):
+        # PRODUCTION_TRACE_LOG — журнал интервалов и зависаний с ротацией
+        if enabled:
+            TRACER.enable(log_path=os.environ.get("PRODUCTION_TRACE_LOG"))
+            if self.stall_monitor is None:
+                self.stall_monitor = StallMonitor(
+                    float(os.environ.get("PRODUCTION_STALL_MS", 100)), parent=self)
+            self.stall_monitor.start()
+            self.statusBar().showMessage("Трассировка включена", 5000)
+        else:
+            if self.stall_monitor is not None:
+                self.stall_monitor.stop()
+            TRACER.disable()
+            self.statusBar().showMessage("Трассировка выключена", 5000)
+        
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить трассу", "trace.json",
+                                              "Chrome Trace (*.json)")
+        if path:
+            TRACER.export_chrome(path)
+            self.statusBar().showMessage(f"Трасса сохранена: {path}", 5000)
+        
+    def subscribe_views(self):
+        # Порядок подписки — порядок доставки: мощность постов пересчитывается
+        # раньше, чем ставится прогноз и обновляются представления
+        changes = self.changes
+        changes.subscribe((ASSIGNMENTS_CHANGED, POSTS_CHANGED, CALENDAR_CHANGED),
+                          self.on_capacity_changes)
+        changes.subscribe((ORDERS_ADDED, ORDER_PROGRESS, ASSIGNMENTS_CHANGED, POSTS_CHANGED,
+                           CALENDAR_CHANGED), lambda batch: self.schedule_forecasts())
+        changes.subscribe((ASSIGNMENTS_CHANGED, POSTS_CHANGED), self.on_posts_changes)
+        changes.subscribe((EMPLOYEES_ADDED, EMPLOYEES_REMOVED, ORDERS_ADDED), self.on_search_changes)
+        changes.subscribe(ORDER_PROGRESS, self.on_order_progress)
+        changes.subscribe((ORDERS_ADDED, ORDER_PROGRESS), self.on_chart_changes)
+        
+    def on_capacity_changes(self, batch):
+        if any(change.kind == POSTS_CHANGED or change.payload is None for change in batch):
+            self.capacity.rebuild()
+            return
+        for change in batch:
+            first, last = change.payload
+            if change.kind == ASSIGNMENTS_CHANGED:
+                self.capacity.refresh_assignment(first, last)
+            else:
+                self.capacity.refresh(first, last)
+        
+    def on_posts_changes(self, batch):
+        # Новые и удаленные сотрудники появляются в списках постов через общую модель
+        if any(change.kind == POSTS_CHANGED for change in batch):
+            self.update_posts_table()  # Состав постов изменился — таблица строится заново
+            return
+        current_date = self.date_edit.date().toPyDate()
+        if any(first <= current_date <= last for first, last in (c.payload for c in batch)):
+            self.sync_post_selection()
+        
+    def on_search_changes(self, batch):
+        for change in batch:
+            if change.kind == EMPLOYEES_ADDED:
+                for employee in change.payload:
+                    self.employee_index.add(employee.id, employee.name)
+            elif change.kind == EMPLOYEES_REMOVED:
+                for employee in change.payload:
+                    self.employee_index.remove(employee.id)
+            else:
+                self.order_index.extend((order.id, self.order_search_text(order))
+                                        for order in change.payload)
+        
+    def on_order_progress(self, batch):
+        orders = {order.id: order for change in batch for order in change.payload}
+        self.orders_model.objects_changed(orders.values())
+        self.orders_model.column_changed(OrdersTableModel.RATE_COLUMN)  # Темп общий для модели
+        
+    def on_chart_changes(self, batch):
+        # Открытый график следует за данными; скрытый обновится кнопкой
+        if self.chart_view.canvas is not None and self.chart_view.isVisible():
+            self.update_charts()
         
     def load_sample_data(self):
         # Загрузка примеров данных для демонстрации
-        self.employees.append(Employee("Иванов И.И.", "Монтажник"))
-        self.employees.append(Employee("Петров П.П.", "Монтажник"))
-        self.employees.append(Employee("Сидоров С.С.", "Инженер"))
-        self.employees.append(Employee("Кузнецов К.К.", "Инженер"))
-        self.employees.append(Employee("Николаев Н.Н.", "Инженер"))
+        employees = [
+            Employee("Иванов И.И.", "Монтажник"),
+            Employee("Петров П.П.", "Монтажник"),
+            Employee("Сидоров С.С.", "Инженер"),
+            Employee("Кузнецов К.К.", "Инженер"),
+            Employee("Николаев Н.Н.", "Инженер"),
+        ]
+        for employee in employees:
+            self.current_assignments.register_employee(employee)
+        self.employees_model.extend(employees)
         
         # Пример модели продукции
         stages = [
@@ -319,12 +636,103 @@ class ProductionScheduleApp(QMainWindow):
             ProductionStage("Нанесение серийного номера и ПО", "Инженерная", 0.2),
             ProductionStage("Финальная сборка и упаковка", "Монтажная", 0.3)
         ]
-        self.product_models.append(ProductModel("Излучатель 1", stages))
+        self.models_model.append(ProductModel("Излучатель 1", stages))
+        
+        if self.storage is not None:
+            for employee in employees:
+                self.storage.save_employee(employee)
+            self.storage.save_model(self.product_models[-1])
+        self.update_posts_table()
         
-        self.update_employees_table()
-        self.update_models_table()
-        self.update_order_combos()
+    def load_settings(self):
+        settings = self.storage.load_settings()
+        self.workday_hours = float(settings.get("workday_hours", self.workday_hours))
+        if "assembly_posts" in settings:
+            self.posts = build_posts(int(settings["assembly_posts"]),
+                                     int(settings["engineering_posts"]))
+        self.calendar.default_hours = self.workday_hours
+        if settings.get("weekends"):
+            self.calendar.weekends = {int(d) for d in settings["weekends"].split(",")}
+        
+    def load_from_storage(self):
+        # Загрузка сохраненных данных; история закрытых заказов читается лениво
+        employees = []
+        for employee_id, name, role, work_hours in self.storage.load_employees():
+            employee = Employee(name, role, employee_id=employee_id)
+            employee.work_hours = work_hours
+            self.current_assignments.register_employee(employee)
+            employees.append(employee)
+        
+        models = {}
+        for model_id, name, stages in self.storage.load_models():
+            models[model_id] = ProductModel(
+                name, [ProductionStage(*stage) for stage in stages], model_id=model_id)
+        
+        orders = []
+        closed = []
+        for row in self.storage.load_orders():
+            order = self.order_from_row(row, models)
+            if order.completed_units >= order.quantity:
+                closed.append(order.id)
+            orders.append(order)
+        self.continue_ids(employees, models.values(), orders)
+        self.progress.extend(self.storage.load_open_progress())
+        self.progress.defer(closed)
+        
+        for day, post_number, employee_id in self.storage.load_assignments():
+            employee = self.current_assignments.employee(employee_id)
+            if employee is not None and post_number <= len(self.posts):
+                self.current_assignments.assign(as_date(day), post_number, employee)
+        
+        day_hours, employee_hours, post_hours = self.storage.load_calendar()
+        for day, hours in day_hours:
+            self.calendar.set_day_hours(day, hours)
+        for employee_id, day, hours in employee_hours:
+            self.calendar.set_employee_hours(employee_id, day, hours)
+        for post_number, hours in post_hours:
+            self.calendar.set_post_hours(post_number, hours)
+        self.capacity.rebuild()
+        
+        self.employees_model.extend(employees)
+        self.models_model.extend(models.values())
+        self.orders_model.extend(orders)
+        self.load_throughput()
+        self.recalculate_forecasts()
+        self.update_posts_table()
         
+    def order_from_row(self, row, models):
+        # Заказ из строки формата SqliteStorage.load_orders; models — {id модели: модель}
+        order_id, model_id, quantity, created, completed, last_date, due_date, priority = row
+        order = self.order_table.append(models[model_id], quantity,
+                                        datetime.strptime(created, CREATION_FORMAT),
+                                        order_id=order_id,
+                                        due_date=as_date(due_date) if due_date else None,
+                                        priority=priority)
+        order.completed_units = completed
+        order.last_progress_date = last_date
+        return order
+        
+    def continue_ids(self, employees=(), models=(), orders=()):
+        # Новые объекты получают id после загруженных; клиенту сервера
+        # планирования id выдает сервер, чтобы они не совпали на разных местах
+        for cls, kind, objects in ((Employee, "employees", employees), (ProductModel, "models", models),
+                                   (ProductionOrder, "orders", orders)):
+            ids = self.storage.id_source(kind) if self.storage is not None else None
+            continue_ids(cls, objects, ids)
+        
+    def load_throughput(self):
+        # Оценки темпов по недавней истории: старые дни почти не имеют веса
+        rows = self.storage.load_model_progress_since(self.throughput.history_start())
+        if rows:
+            model_ids, days, units = zip(*rows)
+            self.throughput.fit(model_ids, to_ordinals(days), units, self.product_models)
+        
+    def progress_model_ids(self, order_ids):
+        # id моделей заказов order_ids (по колонкам таблицы заказов)
+        return self.order_table.model_ids([self.orders[row].row
+                                           for row in self.orders_model.rows_of_ids(order_ids)])
+        
+    @traced()
     def add_employee(self):
         name = self.employee_name_input.text()
         role = self.employee_role_combo.currentText()
@@ -333,26 +741,33 @@ class ProductionScheduleApp(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Введите имя сотрудника")
             return
             
-        self.employees.append(Employee(name, role))
-        self.update_employees_table()
+        employee = Employee(name, role)
+        employee.work_hours = self.employee_hours_input.value()
+        self.current_assignments.register_employee(employee)
+        self.employees_model.append(employee)
+        if self.storage is not None:
+            self.storage.save_employee(employee)
+        self.changes.publish(EMPLOYEES_ADDED, [employee])
         self.employee_name_input.clear()
         
-    def update_employees_table(self):
-        self.employees_table.setRowCount(len(self.employees))
-        for i, employee in enumerate(self.employees):
-            self.employees_table.setItem(i, 0, QTableWidgetItem(employee.name))
-            self.employees_table.setItem(i, 1, QTableWidgetItem(employee.role))
-            
-            delete_btn = QPushButton("Удалить")
-            delete_btn.clicked.connect(lambda checked, e=employee: self.delete_employee(e))
-            self.employees_table.setCellWidget(i, 2, delete_btn)
-        
-        self.employees_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+    @traced()
+    def update_employees_table(self, rows=None):
+        # rows=None — полный сброс модели, иначе обновляются только указанные строки
+        if rows is None:
+            self.employees_model.refresh()
+        else:
+            self.employees_model.rows_changed(rows)
         
+    @traced()
     def delete_employee(self, employee):
-        self.employees.remove(employee)
-        self.update_employees_table()
-        self.update_posts_table()
+        days = self.current_assignments.employee_days(employee.id)
+        self.employees_model.remove(employee)
+        self.current_assignments.remove_employee(employee)
+        if self.storage is not None:
+            self.storage.delete_employee(employee)
+        self.changes.publish(EMPLOYEES_REMOVED, [employee])
+        if days:
+            self.changes.publish(ASSIGNMENTS_CHANGED, (days[0][0], days[-1][0]))
         
     def add_stage_to_model(self):
         name = self.stage_name_input.text()
@@ -395,201 +810,744 @@ class ProductionScheduleApp(QMainWindow):
             time_per_unit = float(self.stages_table.item(row, 2).text())
             stages.append(ProductionStage(stage_name, stage_type, time_per_unit))
             
-        self.product_models.append(ProductModel(name, stages))
-        self.update_models_table()
-        self.update_order_combos()
+        model = ProductModel(name, stages)
+        self.models_model.append(model)
+        if self.storage is not None:
+            self.storage.save_model(model)
         self.model_name_input.clear()
         self.stages_table.setRowCount(0)
         
-    def update_models_table(self):
-        self.models_table.setRowCount(len(self.product_models))
-        for i, model in enumerate(self.product_models):
-            self.models_table.setItem(i, 0, QTableWidgetItem(model.name))
-            self.models_table.setItem(i, 1, QTableWidgetItem(str(len(model.stages))))
+    @traced()
+    def update_models_table(self, rows=None):
+        if rows is None:
+            self.models_model.refresh()
+        else:
+            self.models_model.rows_changed(rows)
         
-        self.models_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        
-    def update_order_combos(self):
-        self.order_model_combo.clear()
-        self.daily_order_combo.clear()
+    @staticmethod
+    def order_label(order):
+        return f"№{order.id} {order.model.name} ({order.quantity} шт.)"
         
-        for model in self.product_models:
-            self.order_model_combo.addItem(model.name)
-            
-        for order in self.orders:
-            self.daily_order_combo.addItem(f"{order.model.name} ({order.quantity} шт.)")
+    @staticmethod
+    def order_search_text(order):
+        return f"{order.id} {order.model.name}"
         
+    @traced()
     def update_posts_table(self):
-        self.posts_table.setRowCount(5)
-        for i in range(5):
-            post_type = "Монтажная" if i < 2 else "Инженерная"
-            self.posts_table.setItem(i, 0, QTableWidgetItem(f"Пост {i+1}"))
+        # Полное построение — при загрузке и смене состава постов; правки
+        # сотрудников и назначений применяются точечно в on_posts_changes
+        self.posts_table.setRowCount(len(self.posts))
+        self.post_pickers = []
+        for i, post in enumerate(self.posts):
+            post_type = post.stage_type
+            self.posts_table.setItem(i, 0, QTableWidgetItem(post.name))
             self.posts_table.setItem(i, 1, QTableWidgetItem(post_type))
             
-            # Комбо-бокс для выбора сотрудника
-            combo = QComboBox()
-            combo.addItem("Не назначен")
-            
-            # Фильтруем сотрудников по типу поста
-            for employee in self.employees:
-                if post_type == "Инженерная" and employee.role != "Инженер":
-                    continue
-                combo.addItem(employee.name)
-                
-            # Устанавливаем текущее значение, если есть назначение
-            current_date = self.date_edit.date().toString("yyyy-MM-dd")
-            assignment_key = f"{current_date}_post_{i+1}"
-            if assignment_key in self.current_assignments:
-                assigned_employee = self.current_assignments[assignment_key]
-                index = combo.findText(assigned_employee.name)
-                if index >= 0:
-                    combo.setCurrentIndex(index)
-            
-            self.posts_table.setCellWidget(i, 2, combo)
+            # Выбор сотрудника из общей модели, отфильтрованной по типу поста;
+            # пустой выбор — "Не назначен"
+            picker = Picker(self.post_employee_models[post_type], self.employee_index, "Не назначен")
+            self.posts_table.setCellWidget(i, 2, picker)
+            self.post_pickers.append(picker)
             
             # Кнопка для назначения
             assign_btn = QPushButton("Назначить")
-            assign_btn.clicked.connect(lambda checked, p=i+1, c=combo: self.assign_employee_to_post(p, c.currentText()))
+            assign_btn.clicked.connect(lambda checked, p=post.number, c=picker: self.assign_employee_to_post(p, c.current_id()))
             self.posts_table.setCellWidget(i, 3, assign_btn)
+        TRACER.count("widgets", 2 * len(self.posts))
         
         self.posts_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        
-    def assign_employee_to_post(self, post_number, employee_name):
-        if employee_name == "Не назначен":
-            # Снимаем назначение
-            current_date = self.date_edit.date().toString("yyyy-MM-dd")
-            assignment_key = f"{current_date}_post_{post_number}"
-            if assignment_key in self.current_assignments:
-                del self.current_assignments[assignment_key]
-            QMessageBox.information(self, "Назначение", f"Сотрудник снят с поста {post_number}")
+        self.sync_post_selection()
+        
+    def sync_post_selection(self):
+        # Выбор сотрудников постов по назначениям выбранной даты (строка по id — без перебора)
+        current_date = self.date_edit.date().toPyDate()
+        for post, picker in zip(self.posts, self.post_pickers):
+            employee = self.current_assignments.get(current_date, post.number)
+            picker.select_id(employee.id if employee is not None else None)
+        
+    @traced()
+    def assign_employee_to_post(self, post_number, employee_id):
+        current_date = self.date_edit.date().toPyDate()
+        if employee_id is None:
+            # Снимаем назначение ("Не назначен")
+            self.current_assignments.unassign(current_date, post_number)
+            if self.storage is not None:
+                self.storage.save_assignment(current_date, post_number, None)
+            self.changes.publish(ASSIGNMENTS_CHANGED, (current_date, current_date))
+            self.notify("Назначение", f"Сотрудник снят с поста {post_number}")
             return
             
         # Находим сотрудника
-        employee = next((e for e in self.employees if e.name == employee_name), None)
+        employee = self.current_assignments.employee(employee_id)
         if not employee:
             QMessageBox.warning(self, "Ошибка", "Сотрудник не найден")
             return
             
         # Проверяем, может ли сотрудник работать на этом типе поста
-        post_type = "Монтажная" if post_number < 3 else "Инженерная"
+        post_type = self.post_type(post_number)
         if not employee.can_work_on_stage(post_type):
             QMessageBox.warning(self, "Ошибка", "Этот сотрудник не может работать на данном типе поста")
             return
             
         # Сохраняем назначение
-        current_date = self.date_edit.date().toString("yyyy-MM-dd")
-        assignment_key = f"{current_date}_post_{post_number}"
-        self.current_assignments[assignment_key] = employee
+        self.current_assignments.assign(current_date, post_number, employee)
+        if self.storage is not None:
+            self.storage.save_assignment(current_date, post_number, employee)
+        self.changes.publish(ASSIGNMENTS_CHANGED, (current_date, current_date))
         
-        QMessageBox.information(self, "Назначение", f"{employee_name} назначен на пост {post_number}")
+        self.notify("Назначение", f"{employee.name} назначен на пост {post_number}")
         
+    def post_type(self, post_number):
+        return self.posts[post_number - 1].stage_type
+
+    def update_post_definitions(self):
+        self.posts = build_posts(self.assembly_posts_input.value(),
+                                 self.engineering_posts_input.value())
+        # Снимаются назначения на исчезнувшие посты и на посты, сменившие тип
+        removed = self.current_assignments.remove_where(
+            lambda post_number, employee: post_number > len(self.posts)
+            or not employee.can_work_on_stage(self.post_type(post_number)))
+        if self.storage is not None:
+            for day, post_number in removed:
+                self.storage.save_assignment(day, post_number, None)
+            self.storage.save_setting("assembly_posts", self.assembly_posts_input.value())
+            self.storage.save_setting("engineering_posts", self.engineering_posts_input.value())
+        self.changes.publish(POSTS_CHANGED)
+
+    @traced()
+    def auto_assign_posts(self):
+        start = self.date_edit.date().toPyDate()
+        end = self.auto_assign_end_edit.date().toPyDate()
+        if end < start:
+            QMessageBox.warning(self, "Ошибка", "Дата окончания раньше даты начала")
+            return
+            
+        # Назначение предыдущего дня сохраняется, где это не ухудшает решение
+        previous = self.current_assignments.on_date(start - timedelta(days=1))
+        planner = AssignmentPlanner(self.posts)
+        plan = planner.assign_range(self.employees, self.orders, start, end,
+                                    available=self.calendar.is_available, previous=previous)
+        self.current_assignments.assign_bulk(plan)
+        if self.storage is not None:
+            self.storage.save_assignment_plan(plan)
+        self.changes.publish(ASSIGNMENTS_CHANGED, (start, end))
+        self.notify("Назначение", f"Назначения заполнены на {len(plan)} дн.")
+
+    @traced()
+    def analyze_line(self):
+        # Загрузка типов постов при текущей структуре открытых заказов и фактической отдаче
+        day = self.date_edit.date().toPyDate()
+        stage_types = self.forecast_engine.stage_types
+        balancer = LineBalancer(self.product_models, stage_types)
+        mix = balancer.order_mix(self.orders)
+        if not mix.any():
+            self.balance_label.setText("Нет открытых заказов")
+            return
+        target = self.balance_target_input.value() or None
+        balance = balancer.analyze(mix, self.capacity.day_capacity(day), self.throughput.efficiency(),
+                                   shift_hours=self.calendar.hours_on(day), target=target,
+                                   hours_per_post=self.workday_hours)
+        if balance.daily_output == 0:
+            lines = [f"{day.strftime('%d.%m.%Y')}: нет мощности постов (выходной или нет назначений)"]
+        else:
+            lines = [f"Предельный выпуск: {balance.daily_output:.1f} ед./день"
+                     + (f", такт {balance.cycle_time * 60:.1f} мин/ед." if balance.cycle_time else "")]
+        model, stage = balance.bottleneck_stage or (None, None)
+        if balance.bottleneck_type is not None:
+            lines.append(f"Узкое место: {balance.bottleneck_type}"
+                         + (f" — {model.name}, {stage.name}" if stage is not None else ""))
+        posts = {t: sum(1 for p in self.posts if p.stage_type == t) for t in stage_types}
+        needed = balance.recommended_posts or {}
+        rate = "при целевом выпуске" if target else "при предельном выпуске"
+        for stage_type in stage_types:
+            utilization = balance.utilization[stage_type]
+            load = "нет мощности" if utilization == float("inf") else f"{utilization:.0%}"
+            lines.append(f"{stage_type}: загрузка {load} {rate}, постов {posts[stage_type]}"
+                         + (f", нужно {needed[stage_type]}" if stage_type in needed else ""))
+        if needed:
+            available = [e for e in self.employees if self.calendar.is_available(e, day)]
+            engineers = sum(1 for e in available if e.role == ROLE_ENGINEER)
+            required = sum(needed.values())
+            lines.append(f"Доступно сотрудников: {len(available)} (нужно {required}), "
+                         f"инженеров: {engineers} (нужно {needed.get(STAGE_ENGINEERING, 0)})")
+        self.balance_label.setText("\n".join(lines))
+        
+    @traced()
+    def compute_forecasts(self, token, orders, rule, capacity, efficiency=None):
+        # Выполняется в пуле потоков над снимком списка заказов и мощности.
+        # efficiency — фактическая отдача постов на момент постановки задачи.
+        # Возвращает изменения [(строка, заказ, новая дата завершения)]
+        sequence = self.scheduler.sequence(orders, rule)
+        token.check()
+        end_dates = self.forecast_engine.forecast(sequence, capacity, datetime.now(), efficiency)
+        token.check()
+        new_dates = {id(order): end_date for order, end_date in zip(sequence, end_dates)}
+        return [(row, order, new_dates[id(order)]) for row, order in enumerate(orders)
+                if order.estimated_end_date != new_dates[id(order)]]
+        
+    def apply_forecasts(self, changes):
+        # Возвращает номера строк, у которых изменилась дата завершения
+        rows = []
+        for row, order, end_date in changes:
+            if row >= len(self.orders) or self.orders[row] is not order:
+                continue  # Список заказов изменился после снимка — учтет следующий пересчет
+            order.estimated_end_date = end_date
+            rows.append(row)
+        return rows
+        
+    def recalculate_forecasts(self):
+        # Синхронный пересчет прогнозов всех открытых заказов одним пакетом
+        changes = self.compute_forecasts(CancelToken(lambda value: None), self.orders,
+                                         self.sequencing_rule, self.capacity,
+                                         self.throughput.efficiency())
+        return self.apply_forecasts(changes)
+        
+    def schedule_forecasts(self):
+        # Фоновый пересчет; серия правок подряд дает один пересчет
+        self.tasks.submit("forecast", self.compute_forecasts, list(self.orders),
+                          self.sequencing_rule, self.capacity.snapshot(),
+                          self.throughput.efficiency(), on_result=self.apply_forecast_slices)
+        
+    @traced()
+    def apply_forecast_slices(self, changes, start=0, generation=None):
+        # Крупный пересчет применяется частями между кадрами отрисовки
+        if generation is None:
+            self.forecast_generation += 1
+            generation = self.forecast_generation
+        elif generation != self.forecast_generation:
+            return  # Уже пришел более новый результат
+        end = start + self.FORECAST_SLICE
+        self.update_orders_table(self.apply_forecasts(changes[start:end]))
+        if end < len(changes):
+            QTimer.singleShot(0, lambda: self.apply_forecast_slices(changes, end, generation))
+
+    def update_sequencing_rule(self):
+        self.sequencing_rule = self.sequencing_rule_combo.currentData()
+        self.schedule_forecasts()
+
     def update_assignment_display(self):
-        self.update_posts_table()
+        # Смена даты меняет только выбор в списках постов, а не их содержимое
+        self.sync_post_selection()
         
-    def update_workday_hours(self):
-        try:
-            self.workday_hours = float(self.workday_hours_input.text())
-        except ValueError:
-            QMessageBox.warning(self, "Ошибка", "Введите корректное количество часов")
+    def update_workday_hours(self, hours):
+        if hours == self.workday_hours:
+            return
+        self.workday_hours = hours
+        if self.storage is not None:
+            self.storage.save_setting("workday_hours", self.workday_hours)
+        self.calendar.default_hours = self.workday_hours
+        self.changes.publish(CALENDAR_CHANGED)
+        
+    def update_weekends(self, checked):
+        self.calendar.weekends = {5, 6} if checked else set()
+        if self.storage is not None:
+            self.storage.save_setting("weekends", ",".join(map(str, sorted(self.calendar.weekends))))
+        self.changes.publish(CALENDAR_CHANGED)
+        
+    def set_day_hours(self):
+        day = self.date_edit.date().toPyDate()
+        hours = self.day_hours_input.value()
+        self.calendar.set_day_hours(day, hours)
+        if self.storage is not None:
+            self.storage.save_day_hours(day, hours)
+        self.changes.publish(CALENDAR_CHANGED, (day, day))
+        
+    def reset_day_hours(self):
+        day = self.date_edit.date().toPyDate()
+        self.calendar.clear_day_hours(day)
+        if self.storage is not None:
+            self.storage.save_day_hours(day, None)
+        self.changes.publish(CALENDAR_CHANGED, (day, day))
+        
+    def set_post_hours(self):
+        post_number = self.post_hours_post_input.value()
+        if post_number > len(self.posts):
+            QMessageBox.warning(self, "Ошибка", f"Поста {post_number} нет на линии")
+            return
+        hours = self.post_hours_input.value()
+        self.calendar.set_post_hours(post_number, hours)
+        if self.storage is not None:
+            self.storage.save_post_hours(post_number, hours)
+        self.changes.publish(CALENDAR_CHANGED)
+        
+    def clear_post_hours(self):
+        post_number = self.post_hours_post_input.value()
+        self.calendar.clear_post_hours(post_number)
+        if self.storage is not None:
+            self.storage.save_post_hours(post_number, None)
+        self.changes.publish(CALENDAR_CHANGED)
+        
+    def add_vacation(self):
+        employee = self.current_assignments.employee(self.vacation_employee_combo.current_id())
+        if employee is None:
+            QMessageBox.warning(self, "Ошибка", "Выберите сотрудника")
+            return
+        start = self.date_edit.date().toPyDate()
+        end = self.vacation_end_edit.date().toPyDate()
+        if end < start:
+            QMessageBox.warning(self, "Ошибка", "Дата окончания раньше даты начала")
+            return
+        self.calendar.add_vacation(employee.id, start, end)
+        if self.storage is not None:
+            days = (end - start).days + 1
+            self.storage.save_employee_hours(
+                [(employee.id, start + timedelta(days=i), 0.0) for i in range(days)])
+        self.changes.publish(CALENDAR_CHANGED, (start, end))
+        self.notify("Календарь", f"Отпуск {employee.name} добавлен")
             
     def save_assignments(self):
-        # В реальной реализации здесь будет сохранение назначений
-        QMessageBox.information(self, "Сохранение", "Назначения сохранены")
+        # Назначения пишутся в базу сразу; здесь дожидаемся окончания записи
+        if self.storage is not None:
+            self.storage.flush()
+        self.notify("Сохранение", "Назначения сохранены")
         
+    @traced()
     def create_order(self):
-        model_name = self.order_model_combo.currentText()
+        model_id = self.order_model_combo.current_id()
         quantity = self.order_quantity_input.value()
         
-        model = next((m for m in self.product_models if m.name == model_name), None)
-        if not model:
+        if model_id is None:
             QMessageBox.warning(self, "Ошибка", "Модель не найдена")
             return
+        model = self.models_model.row_object(self.models_model.rows_of_ids([model_id])[0])
             
-        order = ProductionOrder(model, quantity, datetime.now())
-        self.orders.append(order)
-        self.update_orders_table()
-        self.update_order_combos()
-        
-        QMessageBox.information(self, "Заказ создан", f"Заказ на {quantity} единиц {model_name} создан")
-        
-    def update_orders_table(self):
-        self.orders_table.setRowCount(len(self.orders))
-        for i, order in enumerate(self.orders):
-            self.orders_table.setItem(i, 0, QTableWidgetItem(order.model.name))
-            self.orders_table.setItem(i, 1, QTableWidgetItem(str(order.quantity)))
-            self.orders_table.setItem(i, 2, QTableWidgetItem(order.creation_date.strftime("%Y-%m-%d")))
+        order = self.order_table.append(model, quantity, datetime.now(),
+                                        due_date=self.order_due_date_edit.date().toPyDate(),
+                                        priority=self.order_priority_input.value())
+        self.orders_model.append(order)
+        if self.storage is not None:
+            self.storage.save_order(order)
+        self.changes.publish(ORDERS_ADDED, [order])
+        
+        self.notify("Заказ создан", f"Заказ на {quantity} единиц {model.name} создан")
+        
+    def simulate_completion(self):
+        # Монте-Карло моделирование линии с текущей расстановкой постов
+        staffed = self.current_assignments.effective_on(datetime.now())
+        posts_per_type = {}
+        for post_number in staffed:
+            stage_type = self.post_type(post_number)
+            posts_per_type[stage_type] = posts_per_type.get(stage_type, 0) + 1
             
-            # Расчет прогнозируемой даты завершения
-            if order.estimated_end_date:
-                end_date = order.estimated_end_date.strftime("%Y-%m-%d")
-            else:
-                end_date = "Расчитывается..."
-            self.orders_table.setItem(i, 3, QTableWidgetItem(end_date))
-            self.orders_table.setItem(i, 4, QTableWidgetItem(str(order.completed_units)))
-        
-        self.orders_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        
+        # Часы модели переводятся в даты по той же мощности, что и прогноз
+        simulator = LineSimulator(posts_per_type, self.workday_hours, capacity=self.capacity.snapshot())
+        self.statusBar().showMessage("Моделирование сроков...")
+        self.tasks.submit("simulation", self.compute_simulation, simulator, list(self.orders),
+                          self.sequencing_rule, on_result=self.apply_simulation, delay_ms=0)
+        
+    def compare_rules(self):
+        # Сценарии «что если»: все правила очередности на текущей мощности
+        self.statusBar().showMessage("Сравнение правил очередности...")
+        self.tasks.submit("whatif", self.compute_whatif, list(self.orders), self.capacity.snapshot(),
+                          self.throughput.efficiency(), on_result=self.show_whatif, delay_ms=0)
+        
+    @traced()
+    def compute_whatif(self, token, orders, capacity, efficiency):
+        # Сценарии считаются в этом же фоновом потоке: пять сценариев быстрее
+        # запуска процессов
+        orders = open_orders(orders)
+        scenarios = [Scenario(title, None, rule) for rule, title in RULES.items()]
+        return WhatIfAnalyzer(self.forecast_engine, workers=1).evaluate(
+            orders, scenarios, capacity, datetime.now(), efficiency)
+        
+    def show_whatif(self, results):
+        self.statusBar().clearMessage()
+        lines = [f"{rank}. {result.scenario.name}: последний заказ через {result.makespan:g} дн., "
+                 f"опаздывают {result.late_orders} (всего {result.total_lateness:.0f} дн.)"
+                 for rank, result in enumerate(results, 1)]
+        self.notify("Сравнение правил очередности", "\n".join(lines))
+        
+    def show_day_plan(self):
+        # Суточный план по текущему правилу: сколько единиц каких заказов
+        # выпускать в выбранную дату выработки
+        day = self.production_date_edit.date().toPyDate()
+        days = (day - date.today()).days
+        if days < 0:
+            QMessageBox.warning(self, "Ошибка", "План строится с сегодняшнего дня")
+            return
+        self.tasks.submit("day_plan", self.compute_day_plan, list(self.orders), self.capacity.snapshot(),
+                          self.throughput.efficiency(), self.sequencing_rule, day,
+                          on_result=self.apply_day_plan, delay_ms=0)
+        
+    @traced()
+    def compute_day_plan(self, token, orders, capacity, efficiency, rule, day):
+        orders = open_orders(orders)
+        if not orders:
+            return day, []
+        plan = self.scheduler.plan(orders, capacity, date.today(), rule,
+                                   horizon_limit=(day - date.today()).days, efficiency=efficiency)
+        return day, plan.day_plan(day)
+        
+    def apply_day_plan(self, result):
+        day, rows = result
+        if not rows:
+            self.notify("План выпуска", f"На {day:%d.%m.%Y} выпуск не запланирован")
+            return
+        lines = [f"Заказ №{order.id} ({order.model.name}): {units} ед." for order, units in rows]
+        self.notify("План выпуска", f"{day:%d.%m.%Y}, всего {sum(u for _o, u in rows)} ед.:\n"
+                    + "\n".join(lines[:40]) + ("\n..." if len(lines) > 40 else ""))
+        
+    @traced()
+    def compute_simulation(self, token, simulator, orders, rule):
+        sequence = self.scheduler.sequence(orders, rule)
+        token.check()
+        return sequence, simulator.completion_intervals(sequence, datetime.now())
+        
+    @traced()
+    def apply_simulation(self, result):
+        sequence, intervals = result
+        for order, interval in zip(sequence, intervals):
+            order.completion_p50 = interval.p50
+            order.completion_p90 = interval.p90
+        self.statusBar().showMessage("Моделирование завершено", 5000)
+        self.update_orders_table(range(len(self.orders)))
+        
+    @traced()
+    def update_orders_table(self, rows=None):
+        if rows is None:
+            self.orders_model.refresh()
+        else:
+            self.orders_model.rows_changed(rows)
+        
+    @traced()
     def save_daily_production(self):
         if not self.orders:
             QMessageBox.warning(self, "Ошибка", "Нет заказов")
             return
             
-        order_index = self.daily_order_combo.currentIndex()
-        if order_index < 0:
+        order_id = self.daily_order_combo.current_id()
+        if order_id is None:
             QMessageBox.warning(self, "Ошибка", "Выберите заказ")
             return
             
-        order = self.orders[order_index]
+        order = self.orders_model.row_object(self.orders_model.rows_of_ids([order_id])[0])
         date = self.production_date_edit.date().toString("yyyy-MM-dd")
         units = self.daily_production_input.value()
         
-        order.add_daily_progress(date, units)
-        self.update_orders_table()
-        
-        QMessageBox.information(self, "Сохранено", f"Производство {units} единиц за {date} сохранено")
-        
-    def update_charts(self):
-        self.figure.clear()
-        
-        if not self.orders:
-            ax = self.figure.add_subplot(111)
-            ax.text(0.5, 0.5, 'Нет данных для отображения', 
-                    horizontalalignment='center', verticalalignment='center')
-            self.canvas.draw()
+        delta = order.add_daily_progress(date, units)
+        self.throughput.observe(order.model, date, delta)
+        if self.storage is not None:
+            self.storage.save_progress(order, date, units)
+        self.changes.publish(ORDER_PROGRESS, [order])
+        
+        self.notify("Сохранено", f"Производство {units} единиц за {date} сохранено")
+        
+    def import_file(self, kind):
+        path, _ = QFileDialog.getOpenFileName(
+            self, f"Импорт: {IMPORT_KINDS[kind]}", "",
+            "Таблицы (*.csv *.xlsx *.jsonl);;Все файлы (*)")
+        if path:
+            self.start_import(kind, path)
+        
+    def start_import(self, kind, path):
+        # Разбор идет в пуле потоков; данные меняются только в apply_import
+        if self.tasks.is_busy("import"):
+            QMessageBox.warning(self, "Импорт", "Дождитесь окончания текущего импорта")
             return
-            
-        # График прогресса по заказам
-        ax = self.figure.add_subplot(111)
-        
-        orders_data = []
-        for order in self.orders:
-            planned = order.quantity
-            actual = order.completed_units
-            percentage = (actual / planned) * 100 if planned > 0 else 0
-            orders_data.append((order.model.name, planned, actual, percentage))
-            
-        model_names = [data[0] for data in orders_data]
-        planned_values = [data[1] for data in orders_data]
-        actual_values = [data[2] for data in orders_data]
-        
-        x = np.arange(len(model_names))
-        width = 0.35
-        
-        ax.bar(x - width/2, planned_values, width, label='План')
-        ax.bar(x + width/2, actual_values, width, label='Факт')
-        
-        ax.set_xlabel('Заказы')
-        ax.set_ylabel('Количество')
-        ax.set_title('Прогресс выполнения заказов')
-        ax.set_xticks(x)
-        ax.set_xticklabels(model_names, rotation=45)
-        ax.legend()
-        
-        self.figure.tight_layout()
-        self.canvas.draw()
+        context = ImportContext(model_names=(m.name for m in self.product_models),
+                                model_ids=(m.id for m in self.product_models),
+                                order_ids=(o.id for o in self.orders))
+        self.statusBar().showMessage("Импорт: чтение файла...")
+        self.tasks.submit(
+            "import", lambda token: BulkImporter(context).parse(kind, path, token.progress),
+            on_result=self.apply_import, on_error=self.import_failed,
+            on_progress=lambda rows: self.statusBar().showMessage(f"Импорт: обработано строк {rows}"),
+            delay_ms=0)
+        
+    def cancel_import(self):
+        if self.tasks.is_busy("import"):
+            self.tasks.cancel("import")
+            self.statusBar().showMessage("Импорт отменен", 5000)
+        
+    def import_failed(self, error):
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Ошибка импорта", f"Данные не импортированы:\n{error}")
+        
+    @traced()
+    def apply_import(self, batch):
+        # Все строки файла применяются вместе: одна транзакция и одно обновление таблиц
+        getattr(self, f"_apply_{batch.kind}_import")(batch)
+        if len(batch) >= self.LARGE_IMPORT_ROWS:
+            self.freeze_heap()
+        self.statusBar().showMessage(f"Импортировано строк: {len(batch)}", 5000)
+        self.notify("Импорт", f"Импортировано строк: {len(batch)}")
+        
+    def _apply_employees_import(self, batch):
+        employees = []
+        for name, role, work_hours in batch.rows:
+            employee = Employee(name, role)
+            employee.work_hours = work_hours
+            self.current_assignments.register_employee(employee)
+            employees.append(employee)
+        self.employees_model.extend(employees)
+        if self.storage is not None:
+            self.storage.save_import(employees=employees)
+        self.changes.publish(EMPLOYEES_ADDED, employees)
+        
+    def _apply_models_import(self, batch):
+        stages = {}
+        for model_name, stage_name, stage_type, time_per_unit in batch.rows:
+            stages.setdefault(model_name, []).append(
+                ProductionStage(stage_name, stage_type, time_per_unit))
+        models = [ProductModel(name, model_stages) for name, model_stages in stages.items()]
+        self.models_model.extend(models)
+        if self.storage is not None:
+            self.storage.save_import(models=models)
+        
+    def _apply_orders_import(self, batch):
+        by_name = {m.name: m for m in self.product_models}
+        by_id = {m.id: m for m in self.product_models}
+        now = datetime.now()
+        orders = [self.order_table.append(by_id[model] if isinstance(model, int) else by_name[model],
+                                          quantity, created or now, due_date=due_date,
+                                          priority=priority)
+                  for model, quantity, created, due_date, priority in batch.rows]
+        self.orders_model.extend(orders)
+        if self.storage is not None:
+            self.storage.save_import(orders=orders)
+        self.changes.publish(ORDERS_ADDED, orders)
+        
+    def _apply_progress_import(self, batch):
+        order_ids, ordinals, deltas = self.progress.extend_arrays(batch.order_ids, batch.ordinals,
+                                                                  batch.units)
+        self.throughput.observe_many(self.progress_model_ids(order_ids.tolist()), ordinals, deltas,
+                                     self.product_models)
+        orders = self.recount_completed(batch.touched_orders().tolist())
+        if self.storage is not None:
+            self.storage.save_import(progress=batch.progress_rows())
+        self.changes.publish(ORDER_PROGRESS, orders)
+        
+    def recount_completed(self, order_ids):
+        # Выполненные единицы и последний день заказов order_ids (по возрастанию)
+        # из их выработки в ProgressStore, как их пересчитывает база
+        totals, last_days = self.progress.order_summary(order_ids)
+        orders = [self.orders[row] for row in self.orders_model.rows_of_ids(order_ids)]
+        for order, total, last in zip(orders, totals.tolist(), last_days.tolist()):
+            order.completed_units = total
+            order.last_progress_date = date.fromordinal(last).strftime(DATE_FORMAT)
+        return orders
+        
+    # --- Изменения других рабочих мест (клиент сервера планирования) ---
+    
+    @traced()
+    def apply_remote_change(self, version, kind, payload):
+        # Дельта применяется к данным в памяти так же, как локальная правка, но
+        # без записи в хранилище; повторно пришедшие объекты пропускаются
+        getattr(self, f"_remote_{kind}")(payload)
+        self.storage.acknowledge(version)
+        
+    def _remote_employee_saved(self, row):
+        self._remote_import({"employees": [row]})
+        
+    def _remote_employee_deleted(self, employee_id):
+        employee = self.current_assignments.employee(employee_id)
+        if employee is None:
+            return
+        days = self.current_assignments.employee_days(employee.id)
+        self.employees_model.remove(employee)
+        self.current_assignments.remove_employee(employee)
+        self.changes.publish(EMPLOYEES_REMOVED, [employee])
+        if days:
+            self.changes.publish(ASSIGNMENTS_CHANGED, (days[0][0], days[-1][0]))
+        
+    def _remote_model_saved(self, row):
+        self._remote_import({"models": [row]})
+        
+    def _remote_order_saved(self, row):
+        self._remote_import({"orders": [row]})
+        
+    def _remote_progress_recorded(self, row):
+        order_id, day, units = row
+        if not self.orders_model.contains_id(order_id):
+            # Заказ ещё не загружен этим местом: его выработку прочтёт загрузка заказа
+            return
+        order = self.orders[self.orders_model.rows_of_ids([order_id])[0]]
+        self.throughput.observe(order.model, day, order.add_daily_progress(day, units))
+        self.changes.publish(ORDER_PROGRESS, [order])
+        
+    def _remote_import(self, data):
+        employees = []
+        for employee_id, name, role, work_hours in data.get("employees", ()):
+            if self.current_assignments.employee(employee_id) is None:
+                employee = Employee(name, role, employee_id=employee_id)
+                employee.work_hours = work_hours
+                self.current_assignments.register_employee(employee)
+                employees.append(employee)
+        if employees:
+            self.employees_model.extend(employees)
+            self.changes.publish(EMPLOYEES_ADDED, employees)
+        
+        self.models_model.extend(
+            ProductModel(name, [ProductionStage(*stage) for stage in stages], model_id=model_id)
+            for model_id, name, stages in data.get("models", ())
+            if not self.models_model.contains_id(model_id))
+        
+        models = {m.id: m for m in self.product_models}
+        orders = [self.order_from_row(row, models) for row in data.get("orders", ())
+                  if not self.orders_model.contains_id(row[0])]
+        if orders:
+            self.orders_model.extend(orders)
+            self.changes.publish(ORDERS_ADDED, orders)
+        
+        progress = [row for row in data.get("progress", ()) if self.orders_model.contains_id(row[0])]
+        if progress:
+            order_ids, days, units = zip(*progress)
+            order_ids, ordinals, deltas = self.progress.extend_arrays(order_ids, to_ordinals(days), units)
+            self.throughput.observe_many(self.progress_model_ids(order_ids.tolist()), ordinals, deltas,
+                                         self.product_models)
+            self.changes.publish(ORDER_PROGRESS, self.recount_completed(sorted({row[0] for row in progress})))
+        
+    def _remote_assignment_set(self, row):
+        day, post_number, employee_id = row
+        employee = self.current_assignments.employee(employee_id)
+        if employee is not None:
+            self.current_assignments.assign(day, post_number, employee)
+            self.changes.publish(ASSIGNMENTS_CHANGED, (as_date(day), as_date(day)))
+        
+    def _remote_assignment_cleared(self, row):
+        day, post_number, _employee_id = row
+        self.current_assignments.unassign(day, post_number)
+        self.changes.publish(ASSIGNMENTS_CHANGED, (as_date(day), as_date(day)))
+        
+    def _remote_assignment_plan(self, days):
+        # Дни плана заменяются целиком, как при автоназначении
+        employee = self.current_assignments.employee
+        plan = {as_date(day): {post_number: employee(employee_id) for post_number, employee_id in posts
+                               if employee(employee_id) is not None}
+                for day, posts in days}
+        if plan:
+            self.current_assignments.assign_bulk(plan)
+            self.changes.publish(ASSIGNMENTS_CHANGED, (min(plan), max(plan)))
+        
+    def _remote_conflict(self, days):
+        # Сервер отклонил правку назначений: дни возвращаются к его состоянию
+        self._remote_assignment_plan(days)
+        self.notify("Назначение отклонено",
+                    "Назначения на " + ", ".join(day for day, _posts in days)
+                    + " уже изменены на другом рабочем месте. Показано текущее состояние.")
+        
+    def _remote_day_hours(self, row):
+        day, hours = row
+        if hours is None:
+            self.calendar.clear_day_hours(day)
+        else:
+            self.calendar.set_day_hours(day, hours)
+        self.changes.publish(CALENDAR_CHANGED, (as_date(day), as_date(day)))
+        
+    def _remote_post_hours(self, row):
+        post_number, hours = row
+        if hours is None:
+            self.calendar.clear_post_hours(post_number)
+        else:
+            self.calendar.set_post_hours(post_number, hours)
+        self.changes.publish(CALENDAR_CHANGED)
+        
+    def _remote_employee_hours(self, rows):
+        for employee_id, day, hours in rows:
+            self.calendar.set_employee_hours(employee_id, day, hours)
+        if rows:
+            days = [as_date(day) for _employee_id, day, _hours in rows]
+            self.changes.publish(CALENDAR_CHANGED, (min(days), max(days)))
+        
+    def _remote_setting(self, row):
+        # Поля ввода обновляются без сигналов: изменение уже сохранено на сервере
+        key, value = row
+        if key == "workday_hours":
+            self.workday_hours = float(value)
+            self.calendar.default_hours = self.workday_hours
+            self.workday_hours_input.blockSignals(True)
+            self.workday_hours_input.setValue(self.workday_hours)
+            self.workday_hours_input.blockSignals(False)
+            self.changes.publish(CALENDAR_CHANGED)
+        elif key == "weekends":
+            self.calendar.weekends = {int(d) for d in value.split(",") if d}
+            self.weekends_checkbox.blockSignals(True)
+            self.weekends_checkbox.setChecked(bool(self.calendar.weekends))
+            self.weekends_checkbox.blockSignals(False)
+            self.changes.publish(CALENDAR_CHANGED)
+        elif key in ("assembly_posts", "engineering_posts"):
+            spin = self.assembly_posts_input if key == "assembly_posts" else self.engineering_posts_input
+            spin.blockSignals(True)
+            spin.setValue(int(value))
+            spin.blockSignals(False)
+            self.posts = build_posts(self.assembly_posts_input.value(),
+                                     self.engineering_posts_input.value())
+            # Снятые назначения другое место уже записало; здесь они снимаются в памяти
+            self.current_assignments.remove_where(
+                lambda post_number, employee: post_number > len(self.posts)
+                or not employee.can_work_on_stage(self.post_type(post_number)))
+            self.changes.publish(POSTS_CHANGED)
+        
+    def _remote_disconnected(self, payload):
+        self.statusBar().showMessage("Нет связи с сервером планирования: изменения не сохраняются")
+        QMessageBox.warning(self, "Сервер планирования",
+                            "Связь с сервером потеряна. Изменения больше не сохраняются — "
+                            "перезапустите программу.")
+        
+    @traced()
+    def update_charts(self):
+        # Данные графика готовятся в пуле потоков, рисование — в потоке интерфейса
+        view = self.chart_view_combo.currentData()
+        if view == VIEW_ORDERS:
+            self.tasks.submit("charts", self.prepare_order_bars, list(self.orders),
+                              self.chart_group_combo.currentData(),
+                              on_result=lambda bars: self.draw_charts(view, bars))
+        else:
+            # Копия выработки и чтение отложенной истории — тоже в фоне
+            self.tasks.submit("charts", self.prepare_output_series, self.progress.deferred_snapshot(),
+                              on_result=lambda result: self.draw_output_series(view, *result))
+        
+    @staticmethod
+    @traced()
+    def prepare_order_bars(token, orders, group):
+        return aggregate_orders(orders, group)
+        
+    @staticmethod
+    @traced()
+    def prepare_output_series(token, build_snapshot):
+        progress, history = build_snapshot()
+        return plant_output(progress), history
+        
+    def draw_output_series(self, view, series, history):
+        self.progress.adopt(*history)
+        self.draw_charts(view, series)
+        
+    @traced()
+    def draw_charts(self, view, data):
+        self.chart_view.ensure_canvas()
+        if view == VIEW_ORDERS:
+            self.chart_view.show_bars(data)
+        else:
+            self.chart_view.show_series(view, data)
+        
+    def closeEvent(self, event):
+        if self.stall_monitor is not None:
+            self.stall_monitor.stop()
+        self.tasks.cancel_all()
+        self.tasks.wait()
+        if self.storage is not None:
+            self.storage.close()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    window = ProductionScheduleApp()
+    db_path = os.environ.get("PRODUCTION_DB",
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), "production.db"))
+    # PRODUCTION_SERVER — адрес общего сервера планирования (python -m planning serve)
+    server = os.environ.get("PRODUCTION_SERVER")
+    if server:
+        from planning.service import RemoteStorage, parse_address
+        storage = RemoteStorage(parse_address(server))
+    else:
+        storage = SqliteStorage(db_path, journal=True)
+    window = ProductionScheduleApp(storage)
     window.show()
+    if "--startup-time" in sys.argv:
+        # Замер холодного старта: импорты, загрузка данных и первая отрисовка окна
+        app.processEvents()
+        elapsed = (time.perf_counter() - STARTED) * 1000
+        print(f"Запуск: {elapsed:.0f} мс")
+        window.close()
+        budget = os.environ.get("PRODUCTION_STARTUP_BUDGET_MS")
+        sys.exit(1 if budget and elapsed > float(budget) else 0)
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1 @@
+# Qt-компоненты интерфейса системы планирования производства
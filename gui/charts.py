@@ -0,0 +1,169 @@
+# Холст графиков с долгоживущими объектами matplotlib.
+#
+# Оси и столбцы/линии создаются один раз на вид. При обновлении меняются
+# только высоты столбцов или данные линий; если границы осей не изменились,
+# линии перерисовываются блиттингом поверх сохранённого фона. Число столбцов
+# и точек ограничено planning.chart_data, поэтому стоимость обновления
+# постоянна. matplotlib загружается при первом показе графика.
+
+import numpy as np
+from PyQt5.QtWidgets import QVBoxLayout, QWidget
+
+from planning.progress import EPOCH_ORDINAL
+
+VIEW_ORDERS = "orders"
+VIEW_DAILY = "daily"
+VIEW_CUMULATIVE = "cumulative"
+
+_LINES = {
+    VIEW_DAILY: (("daily", "Выпуск за день"), ("rolling", "Среднее за 7 дней")),
+    VIEW_CUMULATIVE: (("cumulative", "Накопленный выпуск"),),
+}
+_GROUP_TITLES = {
+    "order": "по заказам",
+    "model": "по моделям",
+    "week": "по неделям прогнозного завершения",
+    "status": "по статусу",
+}
+
+
+def _dates(ordinals):
+    # Даты-ordinal -> числа дат matplotlib
+    from matplotlib.dates import date2num
+    return date2num((np.asarray(ordinals) - EPOCH_ORDINAL).astype("datetime64[D]"))
+
+
+class ChartView(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setLayout(QVBoxLayout())
+        self.layout().setContentsMargins(0, 0, 0, 0)
+        self.figure = None
+        self.canvas = None
+        self.ax = None
+        self._view = None  # Вид, для которого созданы текущие объекты осей
+        self._bars = None  # (план, факт) — BarContainer
+        self._labels = None
+        self._lines = {}
+        self._background = None
+
+    def ensure_canvas(self):
+        """Создает холст при первом вызове. Возвращает True, если он создан сейчас."""
+        if self.canvas is not None:
+            return False
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        self.figure = Figure()
+        # Поля задаются один раз вместо tight_layout на каждой перерисовке
+        self.figure.subplots_adjust(left=0.12, right=0.98, top=0.92, bottom=0.3)
+        self.canvas = FigureCanvas(self.figure)
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.layout().addWidget(self.canvas)
+        return True
+
+    def _reset(self, view):
+        # Новый вид: оси очищаются, но сама фигура и холст остаются
+        if self.ax is None:
+            self.ax = self.figure.add_subplot(111)
+        else:
+            self.ax.cla()
+            self.ax.set_axis_on()
+        self._view = view
+        self._bars = None
+        self._labels = None
+        self._lines = {}
+        self._background = None
+
+    # --- Пустой график ---
+
+    def show_message(self, text):
+        self.ensure_canvas()
+        self._reset(None)
+        self.ax.set_axis_off()
+        self.ax.text(0.5, 0.5, text, horizontalalignment="center",
+                     verticalalignment="center", transform=self.ax.transAxes)
+        self.canvas.draw_idle()
+
+    # --- Столбцы «план/факт» ---
+
+    def show_bars(self, bars):
+        """bars: planning.chart_data.OrderBars."""
+        if not len(bars):
+            self.show_message("Нет данных для отображения")
+            return
+        self.ensure_canvas()
+        top = max(int(bars.planned.max()), int(bars.actual.max()), 1) * 1.05
+        if self._view == VIEW_ORDERS and self._bars is not None and len(self._labels) == len(bars):
+            # Обновление на месте: меняются высоты и, при необходимости, подписи
+            for container, values in zip(self._bars, (bars.planned, bars.actual)):
+                for rect, value in zip(container, values):
+                    rect.set_height(value)
+            if self._labels != bars.labels:
+                self.ax.set_xticklabels(bars.labels, rotation=45, ha="right")
+                self._labels = bars.labels
+        else:
+            self._reset(VIEW_ORDERS)
+            x = np.arange(len(bars))
+            width = 0.35
+            self._bars = (self.ax.bar(x - width / 2, bars.planned, width, label="План"),
+                          self.ax.bar(x + width / 2, bars.actual, width, label="Факт"))
+            self._labels = bars.labels
+            self.ax.set_xticks(x)
+            self.ax.set_xticklabels(bars.labels, rotation=45, ha="right")
+            self.ax.set_ylabel("Количество")
+            self.ax.legend(loc="upper left")  # "best" перебирает все объекты осей
+        self.ax.set_title(f"Прогресс выполнения заказов {_GROUP_TITLES[bars.group]}")
+        self.ax.set_ylim(0, top)
+        self.canvas.draw_idle()
+
+    # --- Временные ряды выпуска ---
+
+    def show_series(self, view, series):
+        """view: VIEW_DAILY или VIEW_CUMULATIVE; series: planning.chart_data.OutputSeries."""
+        if not series.lines:
+            self.show_message("Нет данных о выработке")
+            return
+        self.ensure_canvas()
+        lines = {name: (_dates(x), y) for name, (x, y) in series.lines.items()}
+        x_limits = tuple(_dates([series.first, series.last + 1]))
+        if self._view == view:
+            for name, line in self._lines.items():
+                line.set_data(*lines[name])
+            top = max(float(lines[name][1].max()) for name in self._lines)
+            current_top = self.ax.get_ylim()[1]
+            if (self._background is not None and tuple(self.ax.get_xlim()) == x_limits
+                    and top <= current_top):
+                # Границы осей те же — перерисовываются только линии
+                self.canvas.restore_region(self._background)
+                self._draw_lines()
+                self.canvas.blit(self.ax.bbox)
+                return
+        else:
+            self._reset(view)
+            for name, label in _LINES[view]:
+                line, = self.ax.plot(*lines[name], label=label, animated=True)
+                self._lines[name] = line
+            self.ax.xaxis_date()
+            self.ax.set_ylabel("Единиц")
+            self.ax.legend(loc="upper left")
+            top = max(float(lines[name][1].max()) for name in self._lines)
+        title = "Выпуск завода по дням" if view == VIEW_DAILY else "Накопленный выпуск завода"
+        if series.total_days > len(next(iter(series.lines.values()))[0]):
+            title += f" ({series.total_days} дн., прорежено)"
+        self.ax.set_title(title)
+        self.ax.set_xlim(*x_limits)
+        self.ax.set_ylim(0, max(top, 1) * 1.05)
+        self.canvas.draw_idle()
+
+    def _draw_lines(self):
+        for line in self._lines.values():
+            self.ax.draw_artist(line)
+
+    def _on_draw(self, event):
+        # Линии анимированные: полный кадр рисуется без них, фон сохраняется
+        # для блиттинга, затем линии дорисовываются поверх
+        if not self._lines:
+            self._background = None
+            return
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_lines()
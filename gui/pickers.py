@@ -0,0 +1,128 @@
+# Выбор сотрудников, моделей и заказов из общих моделей списков.
+#
+# Все выпадающие списки показывают одну и ту же модель (EmployeesTableModel,
+# OrdersTableModel...) напрямую или через прокси-фильтр по должности, поэтому
+# новые и удалённые объекты появляются в них без перестроения. Выбор
+# хранится по id объекта: одинаковые названия не путаются, а строка по id
+# находится через индекс модели, без перебора. Ввод текста показывает
+# совпадения из префиксного индекса.
+
+import re
+
+from PyQt5.QtCore import (Qt, QAbstractProxyModel, QIdentityProxyModel, QModelIndex,
+                          QSortFilterProxyModel, QStringListModel)
+from PyQt5.QtWidgets import QComboBox, QCompleter, QListView, QProxyStyle, QStyle
+
+from gui.table_models import ID_ROLE
+
+
+class LabelProxyModel(QIdentityProxyModel):
+    """Та же модель, но с подписью label(объект) в первой колонке."""
+
+    def __init__(self, source, label, parent=None):
+        super().__init__(parent)
+        self.label = label
+        self.setSourceModel(source)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in (Qt.DisplayRole, Qt.EditRole) and index.isValid() and index.column() == 0:
+            return self.label(self.sourceModel().row_object(index.row()))
+        return super().data(index, role)
+
+
+def column_filter(source, column, value, parent=None):
+    # Фильтр строк по точному значению колонки (например, должности); строки
+    # отбираются в C++ при вставке, без пересчета всего списка
+    proxy = QSortFilterProxyModel(parent)
+    proxy.setSourceModel(source)
+    proxy.setFilterKeyColumn(column)
+    proxy.setFilterRegularExpression(f"^{re.escape(value)}$")
+    return proxy
+
+
+class _ListPopupStyle(QProxyStyle):
+    # Всплывающий список в виде обычного списка: в режиме меню (Fusion и др.)
+    # QComboBox при открытии обходит все строки модели, чтобы вычислить высоту
+    def styleHint(self, hint, option=None, widget=None, data=None):
+        if hint == QStyle.SH_ComboBox_Popup:
+            return 0
+        return super().styleHint(hint, option, widget, data)
+
+
+_list_popup_style = None
+
+
+class Picker(QComboBox):
+    COMPLETIONS = 50  # Совпадений в подсказке при вводе
+
+    def __init__(self, model, index=None, placeholder="", parent=None):
+        super().__init__(parent)
+        global _list_popup_style
+        if _list_popup_style is None:
+            _list_popup_style = _ListPopupStyle()
+        self.setStyle(_list_popup_style)
+        # Ширина не подгоняется под содержимое: иначе показ читает все строки
+        self.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLengthWithIcon)
+        self.setMinimumContentsLength(18)
+        # Разметка длинного списка идет порциями между событиями, а не при открытии
+        self.view().setUniformItemSizes(True)
+        self.view().setLayoutMode(QListView.Batched)
+        self.view().setBatchSize(200)
+        self.setModel(model)
+        self.setCurrentIndex(-1)
+        self.index = index
+        self._completion_ids = []
+        if index is not None:
+            self.setEditable(True)
+            self.setInsertPolicy(QComboBox.NoInsert)
+            self.lineEdit().setPlaceholderText(placeholder)
+            self._completions = QStringListModel(self)
+            completer = QCompleter(self._completions, self)
+            completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+            completer.activated[QModelIndex].connect(
+                lambda item: self.select_id(self._completion_ids[item.row()]))
+            self.setCompleter(completer)
+            self.lineEdit().textEdited.connect(self._search)
+
+    def _source_chain(self):
+        model, proxies = self.model(), []
+        while isinstance(model, QAbstractProxyModel):
+            proxies.append(model)
+            model = model.sourceModel()
+        return model, proxies
+
+    def row_of_id(self, obj_id):
+        # Строка списка по id: индекс общей модели и отображение через прокси
+        source, proxies = self._source_chain()
+        try:
+            row, = source.rows_of_ids([obj_id])
+        except KeyError:
+            return -1
+        index = source.index(row, 0)
+        for proxy in reversed(proxies):
+            index = proxy.mapFromSource(index)
+        return index.row() if index.isValid() else -1
+
+    def select_id(self, obj_id):
+        self.setCurrentIndex(-1 if obj_id is None else self.row_of_id(obj_id))
+
+    def current_id(self):
+        if self.currentIndex() < 0:
+            return None
+        return self.itemData(self.currentIndex(), ID_ROLE)
+
+    def _search(self, text):
+        if not text.strip():
+            self.setCurrentIndex(-1)  # Пустая строка — ничего не выбрано
+            return
+        ids, labels = [], []
+        for obj_id in self.index.search(text, self.COMPLETIONS * 2):
+            row = self.row_of_id(obj_id)
+            if row >= 0:  # Объект отфильтрован прокси (например, по должности)
+                ids.append(obj_id)
+                labels.append(self.itemText(row))
+                if len(ids) == self.COMPLETIONS:
+                    break
+        self._completion_ids = ids
+        self._completions.setStringList(labels)
+        self.completer().complete()
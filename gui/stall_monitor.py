@@ -0,0 +1,83 @@
+# Обнаружение зависаний цикла событий Qt.
+#
+# Таймер в потоке интерфейса отмечает каждый проход цикла событий. Если
+# следующая отметка запоздала больше чем на threshold_ms, в трассу
+# записывается интервал "event loop stall". Пока интерфейс ещё стоит,
+# сторожевой поток снимает стек потока интерфейса и открытые интервалы
+# трассировки — так видно, какой обработчик задержал отрисовку. Выключенный
+# монитор не держит ни таймера, ни потока.
+
+import sys
+import threading
+import time
+import traceback
+
+from PyQt5.QtCore import QObject, QTimer
+
+from planning.trace import TRACER
+
+
+class StallMonitor(QObject):
+    INTERVAL_MS = 10  # Период отметок цикла событий
+    STACK_DEPTH = 12  # Кадров стека в отчете о зависании
+
+    def __init__(self, threshold_ms=100, tracer=TRACER, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000
+        self.tracer = tracer
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._tick)
+        self._last_tick = None
+        self._gui_thread = None
+        self._watchdog = None
+        self._stop = threading.Event()
+        self._sample = None  # (время снятия, стек, интервалы) текущего зависания
+
+    @property
+    def running(self):
+        return self._timer.isActive()
+
+    def start(self):
+        if self.running:
+            return
+        self._gui_thread = threading.get_ident()
+        self._last_tick = time.perf_counter()
+        self._sample = None
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._watchdog.start()
+        self._timer.start(self.INTERVAL_MS)
+
+    def stop(self):
+        if not self.running:
+            return
+        self._timer.stop()
+        self._stop.set()
+        self._watchdog.join()
+        self._watchdog = None
+
+    def _tick(self):
+        now = time.perf_counter()
+        gap = now - self._last_tick
+        if gap > self.threshold + self.INTERVAL_MS / 1000:
+            sample = self._sample
+            details = {}
+            if sample is not None and sample[0] >= self._last_tick:
+                details = {"stack": sample[1], "spans": sample[2]}
+            self.tracer.mark("event loop stall", self._last_tick, gap, **details)
+        self._sample = None
+        self._last_tick = now
+
+    def _watch(self):
+        # Один снимок стека на зависание: когда отметка запоздала на threshold
+        while not self._stop.wait(self.threshold / 2):
+            last_tick = self._last_tick
+            if time.perf_counter() - last_tick < self.threshold:
+                continue
+            sample = self._sample
+            if sample is not None and sample[0] >= last_tick:
+                continue
+            frame = sys._current_frames().get(self._gui_thread)
+            stack = traceback.format_stack(frame, limit=self.STACK_DEPTH) if frame else []
+            self._sample = (time.perf_counter(), "".join(stack),
+                            self.tracer.current_spans(self._gui_thread))
@@ -0,0 +1,199 @@
+# Модели Qt model/view поверх списков приложения (self.employees, self.orders,
+# self.product_models). Модели не копируют данные: они читают объекты из
+# общего списка и сообщают представлению только об изменившихся строках.
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, pyqtSignal
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+
+ID_ROLE = Qt.UserRole  # id объекта строки — для выбора по id в выпадающих списках
+
+
+class ListTableModel(QAbstractTableModel):
+    # Список колонок: (заголовок, функция получения текста из объекта строки)
+    columns = ()
+
+    def __init__(self, rows, parent=None):
+        super().__init__(parent)
+        self.rows = rows  # Ссылка на список приложения, а не копия
+        self._row_index = None  # id объекта -> строка; строится при первом rows_of
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):  # EditRole читают редактируемые списки выбора
+            return self.columns[index.column()][1](self.rows[index.row()])
+        if role == ID_ROLE:
+            return self.rows[index.row()].id
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][0]
+        return super().headerData(section, orientation, role)
+
+    def row_object(self, row):
+        return self.rows[row]
+
+    def _index(self):
+        if self._row_index is None:
+            self._row_index = {obj.id: row for row, obj in enumerate(self.rows)}
+        return self._row_index
+
+    def rows_of_ids(self, ids):
+        # Номера строк по id объектов, без поиска по списку
+        index = self._index()
+        return [index[obj_id] for obj_id in ids]
+
+    def contains_id(self, obj_id):
+        return obj_id in self._index()
+
+    def rows_of(self, objects):
+        return self.rows_of_ids(obj.id for obj in objects)
+
+    def append(self, obj):
+        row = len(self.rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.rows.append(obj)
+        if self._row_index is not None:
+            self._row_index[obj.id] = row
+        self.endInsertRows()
+
+    def extend(self, objects):
+        objects = list(objects)
+        if not objects:
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(objects) - 1)
+        self.rows.extend(objects)
+        if self._row_index is not None:
+            self._row_index.update((obj.id, row) for row, obj in enumerate(objects, first))
+        self.endInsertRows()
+
+    def remove(self, obj):
+        row = self.rows.index(obj)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.rows[row]
+        self._row_index = None  # Строки после удаленной сдвинулись
+        self.endRemoveRows()
+
+    def rows_changed(self, rows):
+        # dataChanged выпускается по непрерывным диапазонам изменившихся строк
+        last_column = len(self.columns) - 1
+        start = previous = None
+        for row in sorted(set(rows)):
+            if start is None:
+                start = previous = row
+            elif row == previous + 1:
+                previous = row
+            else:
+                self.dataChanged.emit(self.index(start, 0), self.index(previous, last_column))
+                start = previous = row
+        if start is not None:
+            self.dataChanged.emit(self.index(start, 0), self.index(previous, last_column))
+
+    def objects_changed(self, objects):
+        self.rows_changed(self.rows_of(objects))
+
+    def column_changed(self, column):
+        # Значения колонки, зависящие от общих данных, изменились во всех строках
+        if self.rows:
+            self.dataChanged.emit(self.index(0, column), self.index(len(self.rows) - 1, column))
+
+    def refresh(self):
+        # Полный сброс — только когда список заменён целиком
+        self._row_index = None
+        self.beginResetModel()
+        self.endResetModel()
+
+
+class EmployeesTableModel(ListTableModel):
+    columns = (
+        ("Имя", lambda e: e.name),
+        ("Должность", lambda e: e.role),
+        ("Действия", lambda e: "Удалить"),
+    )
+    ROLE_COLUMN = 1
+    ACTIONS_COLUMN = 2
+
+
+class ModelsTableModel(ListTableModel):
+    columns = (
+        ("Название", lambda m: m.name),
+        ("Кол-во этапов", lambda m: str(len(m.stages))),
+    )
+
+
+def _format_end_date(order):
+    if order.estimated_end_date:
+        return order.estimated_end_date.strftime("%Y-%m-%d")
+    return "Расчитывается..."
+
+
+def _format_optional_date(value):
+    return value.strftime("%Y-%m-%d") if value else "—"
+
+
+class OrdersTableModel(ListTableModel):
+    columns = (
+        ("Модель", lambda o: o.model.name),
+        ("Количество", lambda o: str(o.quantity)),
+        ("Создан", lambda o: o.creation_date.strftime("%Y-%m-%d")),
+        ("Срок", lambda o: _format_optional_date(o.due_date)),
+        ("Прогноз завершения", _format_end_date),
+        ("Выполнено", lambda o: str(o.completed_units)),
+        ("P50", lambda o: _format_optional_date(o.completion_p50)),
+        ("P90", lambda o: _format_optional_date(o.completion_p90)),
+        ("Темп, ед./день", None),  # По фактической выработке модели, см. data
+    )
+    RATE_COLUMN = 8
+
+    def __init__(self, rows, parent=None, throughput=None):
+        super().__init__(rows, parent)
+        self.throughput = throughput  # ThroughputEstimator
+
+    def data(self, index, role=Qt.DisplayRole):
+        if (role in (Qt.DisplayRole, Qt.EditRole) and index.isValid()
+                and index.column() == self.RATE_COLUMN):
+            rate = (self.throughput.model_rate(self.rows[index.row()].model.id)
+                    if self.throughput is not None else None)
+            return f"{rate:.1f}" if rate is not None else "—"
+        return super().data(index, role)
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    # Рисует кнопку в ячейке вместо настоящего QPushButton: стоимость
+    # отрисовки и памяти зависит только от видимых строк
+    clicked = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pressed_row = None
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = index.data()
+        button.state = QStyle.State_Enabled
+        if self._pressed_row == index.row():
+            button.state |= QStyle.State_Sunken
+        else:
+            button.state |= QStyle.State_Raised
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            self._pressed_row = index.row()
+            return True
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            pressed, self._pressed_row = self._pressed_row, None
+            if pressed == index.row() and option.rect.contains(event.pos()):
+                self.clicked.emit(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
@@ -0,0 +1,158 @@
+# Выполнение тяжёлых задач вне потока интерфейса.
+#
+# Задачи (прогноз, моделирование, импорт, подготовка графиков) запускаются в
+# QThreadPool и различаются ключом. Повторная постановка задачи с тем же
+# ключом заменяет ещё не начатую (с небольшой задержкой, чтобы серия быстрых
+# правок дала один пересчёт), а выполняющуюся отменяет: её результат
+# отбрасывается, и после неё запускается последняя версия. Результаты,
+# прогресс и ошибки доставляются в поток интерфейса сигналами.
+
+import sys
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    """Передаётся задаче первым аргументом: проверка отмены и отчёт о прогрессе."""
+
+    def __init__(self, emit_progress):
+        self._cancelled = False
+        self._emit_progress = emit_progress
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        self._cancelled = True
+
+    def check(self):
+        if self._cancelled:
+            raise TaskCancelled()
+
+    def progress(self, value):
+        # Подходит как on_progress для функций ядра: заодно прерывает отменённую задачу
+        self.check()
+        self._emit_progress(value)
+
+
+class _Signals(QObject):
+    progress = pyqtSignal(object)
+    done = pyqtSignal(object, object)  # результат, исключение
+
+
+class _Runnable(QRunnable):
+    def __init__(self, fn, args, token, signals):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.token = token
+        self.signals = signals
+
+    def run(self):
+        try:
+            result = self.fn(self.token, *self.args)
+        except Exception as error:  # Доставляется в поток интерфейса
+            self.signals.done.emit(None, error)
+        else:
+            self.signals.done.emit(result, None)
+
+
+class _Task:
+    def __init__(self, timer):
+        self.timer = timer
+        self.request = None  # Последняя поставленная версия задачи
+        self.token = None  # Токен выполняющейся версии
+        self.signals = None
+
+
+class TaskRunner(QObject):
+    DELAY_MS = 30  # Окно объединения быстрых правок
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._tasks = {}
+
+    def submit(self, key, fn, *args, on_result=None, on_progress=None, on_error=None,
+               delay_ms=None):
+        """Ставит fn(token, *args) в очередь под ключом key.
+
+        on_result(результат), on_progress(значение) и on_error(исключение)
+        вызываются в потоке интерфейса и только для последней версии задачи.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda: self._start(key))
+            task = self._tasks[key] = _Task(timer)
+        task.request = (fn, args, on_result, on_progress, on_error)
+        if task.token is not None:
+            task.token.cancel()
+        task.timer.start(self.DELAY_MS if delay_ms is None else delay_ms)
+
+    def cancel(self, key):
+        task = self._tasks.get(key)
+        if task is None:
+            return
+        task.timer.stop()
+        task.request = None
+        if task.token is not None:
+            task.token.cancel()
+
+    def is_busy(self, key):
+        task = self._tasks.get(key)
+        return task is not None and (task.token is not None or task.request is not None)
+
+    def is_idle(self):
+        # Нет ни выполняющихся, ни ожидающих запуска задач
+        return not any(self.is_busy(key) for key in self._tasks)
+
+    def cancel_all(self):
+        for key in list(self._tasks):
+            self.cancel(key)
+
+    def wait(self, msecs=-1):
+        # Ожидание завершения всех задач (например, перед закрытием базы)
+        return self.pool.waitForDone(msecs)
+
+    def _start(self, key):
+        task = self._tasks[key]
+        if task.token is not None or task.request is None:
+            return  # Запустится по окончании выполняющейся версии
+        fn, args, on_result, on_progress, on_error = task.request
+        task.request = None
+        signals = _Signals()
+        token = CancelToken(signals.progress.emit)
+        if on_progress is not None:
+            signals.progress.connect(on_progress)
+        signals.done.connect(lambda result, error: self._finished(
+            key, token, on_result, on_error, result, error))
+        task.token = token
+        task.signals = signals  # Сигналы живут, пока задача выполняется
+        self.pool.start(_Runnable(fn, args, token, signals))
+
+    def _finished(self, key, token, on_result, on_error, result, error):
+        task = self._tasks[key]
+        task.token = None
+        task.signals = None
+        if task.request is not None:
+            # Пока задача выполнялась, поставлена новая версия — результат устарел
+            if not task.timer.isActive():
+                self._start(key)
+            return
+        if token.cancelled or isinstance(error, TaskCancelled):
+            return
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            else:
+                sys.excepthook(type(error), error, error.__traceback__)
+            return
+        if on_result is not None:
+            on_result(result)
@@ -0,0 +1,65 @@
+# Расчётное ядро системы планирования производства (без зависимостей от Qt)
+#
+# Модули загружаются при первом обращении к имени: `import planning` и
+# объекты предметной области не тянут NumPy, SQLite и пул процессов.
+
+import importlib
+
+from .constants import (STAGE_ASSEMBLY, STAGE_ENGINEERING, STAGE_TYPES,
+                        ROLE_ASSEMBLER, ROLE_ENGINEER, ROLES, DATE_FORMAT)
+
+_EXPORTS = {
+    "as_date": ".dates",
+    "Employee": ".domain",
+    "ProductionStage": ".domain",
+    "ProductModel": ".domain",
+    "ProductionOrder": ".domain",
+    "continue_ids": ".domain",
+    "OrderTable": ".order_table",
+    "ForecastEngine": ".forecast",
+    "AssignmentStore": ".assignment_store",
+    "AssignmentPlanner": ".assignment",
+    "solve_assignment": ".assignment",
+    "PostDefinition": ".posts",
+    "build_posts": ".posts",
+    "default_posts": ".posts",
+    "SqliteStorage": ".storage",
+    "ProgressStore": ".progress",
+    "LineSimulator": ".simulation",
+    "CompletionInterval": ".simulation",
+    "Scheduler": ".scheduler",
+    "Scenario": ".scheduler",
+    "WhatIfAnalyzer": ".scheduler",
+    "RULES": ".scheduler",
+    "ShiftCalendar": ".shift_calendar",
+    "CapacityTimeline": ".shift_calendar",
+    "ChangeBus": ".events",
+    "PrefixIndex": ".search",
+    "aggregate_orders": ".chart_data",
+    "plant_output": ".chart_data",
+    "lttb": ".chart_data",
+    "generate_plant": ".synthetic",
+    "write_plant": ".synthetic",
+    "ThroughputEstimator": ".throughput",
+    "LineBalancer": ".balance",
+    "PlanningService": ".service",
+    "RemoteStorage": ".service",
+    "Tracer": ".trace",
+    "TRACER": ".trace",
+}
+
+__all__ = ["STAGE_ASSEMBLY", "STAGE_ENGINEERING", "STAGE_TYPES", "ROLE_ASSEMBLER",
+           "ROLE_ENGINEER", "ROLES", "DATE_FORMAT", *_EXPORTS]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
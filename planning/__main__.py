@@ -0,0 +1,8 @@
+import sys
+
+from .cli import main
+
+# Защита нужна процессам spawn (сценарии, моделирование): они импортируют
+# этот модуль заново под именем __mp_main__
+if __name__ == "__main__":
+    sys.exit(main())
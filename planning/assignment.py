@@ -0,0 +1,194 @@
+# Автоматическая расстановка сотрудников по постам.
+#
+# Строится матрица стоимостей [сотрудники × посты] (допуск по должности,
+# загрузка типов этапов открытыми заказами, преемственность с предыдущим
+# днём) и решается задача о назначениях минимальной стоимости.
+
+from datetime import timedelta
+
+import numpy as np
+
+_scipy_lsa = False  # Загружается при первом решении: импорт SciPy занимает сотни мс
+
+
+def _load_scipy():
+    global _scipy_lsa
+    if _scipy_lsa is False:
+        try:
+            from scipy.optimize import linear_sum_assignment as _scipy_lsa
+        except ImportError:  # SciPy не обязателен — используется реализация на NumPy
+            _scipy_lsa = None
+    return _scipy_lsa
+
+
+FORBIDDEN = 1e9  # Стоимость недопустимого назначения
+CONTINUITY_BONUS = 1e-3  # Предпочтение сотрудника, работавшего на посту вчера
+MISMATCH_PENALTY = 1e-2  # Инженер на монтажном посту — потеря инженерной мощности
+
+
+def _shortest_augmenting_path(cost):
+    # Венгерский алгоритм в форме кратчайших увеличивающих путей (Jonker-Volgenant,
+    # вариант Crouse для прямоугольных матриц). Требует rows <= cols.
+    n_rows, n_cols = cost.shape
+    u = np.zeros(n_rows)
+    v = np.zeros(n_cols)
+    col4row = np.full(n_rows, -1)
+    row4col = np.full(n_cols, -1)
+
+    for current in range(n_rows):
+        shortest = np.full(n_cols, np.inf)
+        path = np.full(n_cols, -1)
+        visited_rows = np.zeros(n_rows, dtype=bool)
+        visited_cols = np.zeros(n_cols, dtype=bool)
+        min_value = 0.0
+        row = current
+        sink = -1
+        while sink < 0:
+            visited_rows[row] = True
+            reduced = min_value + cost[row] - u[row] - v
+            better = ~visited_cols & (reduced < shortest)
+            path[better] = row
+            shortest[better] = reduced[better]
+
+            candidates = np.where(visited_cols, np.inf, shortest)
+            col = int(np.argmin(candidates))
+            min_value = candidates[col]
+            if not np.isfinite(min_value):
+                raise ValueError("Задача о назначениях не имеет допустимого решения")
+            # При равенстве предпочитаем свободный столбец — путь короче
+            if row4col[col] >= 0:
+                free = np.flatnonzero((candidates == min_value) & (row4col < 0))
+                if len(free):
+                    col = int(free[0])
+            visited_cols[col] = True
+            if row4col[col] < 0:
+                sink = col
+            else:
+                row = row4col[col]
+
+        u[current] += min_value
+        others = visited_rows.copy()
+        others[current] = False
+        u[others] += min_value - shortest[col4row[others]]
+        v[visited_cols] -= min_value - shortest[visited_cols]
+
+        col = sink
+        while True:
+            row = path[col]
+            row4col[col] = row
+            col4row[row], col = col, col4row[row]
+            if row == current:
+                break
+
+    return np.arange(n_rows), col4row
+
+
+def solve_assignment(cost):
+    """Минимизирует сумму cost[i, j] по паросочетанию. Возвращает (строки, столбцы)."""
+    cost = np.asarray(cost, dtype=float)
+    if cost.size == 0:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    scipy_lsa = _load_scipy()
+    if scipy_lsa is not None:
+        return scipy_lsa(cost)
+    if cost.shape[0] > cost.shape[1]:
+        cols, rows = _shortest_augmenting_path(cost.T)
+        order = np.argsort(rows)
+        return rows[order], cols[order]
+    return _shortest_augmenting_path(cost)
+
+
+def stage_load(orders):
+    # Оставшаяся трудоёмкость открытых заказов по типам этапов, часы
+    load = {}
+    for order in orders:
+        remaining = order.quantity - order.completed_units
+        if remaining <= 0:
+            continue
+        for stage in order.model.stages:
+            load[stage.stage_type] = load.get(stage.stage_type, 0.0) + remaining * stage.time_per_unit
+    return load
+
+
+class AssignmentPlanner:
+    """Расстановка сотрудников по постам на диапазон дат."""
+
+    def __init__(self, posts):
+        self.posts = list(posts)
+
+    def post_weights(self, load):
+        # Ценность поста — загрузка его типа на один пост этого типа
+        counts = {}
+        for post in self.posts:
+            counts[post.stage_type] = counts.get(post.stage_type, 0) + 1
+        total = sum(load.values()) or 1.0
+        return np.array([1.0 + load.get(p.stage_type, 0.0) / total / counts[p.stage_type]
+                         for p in self.posts])
+
+    def cost_matrix(self, employees, load, previous=None):
+        posts = self.posts
+        post_types = [p.stage_type for p in posts]
+        weights = self.post_weights(load)
+
+        # Допуск считается один раз на пару (должность, тип поста)
+        roles = sorted({e.role for e in employees})
+        role_index = {role: i for i, role in enumerate(roles)}
+        sample = {e.role: e for e in employees}
+        type_list = sorted(set(post_types))
+        type_index = {t: i for i, t in enumerate(type_list)}
+        allowed = np.array([[sample[role].can_work_on_stage(t) for t in type_list] for role in roles])
+        # Сотрудник, допущенный к инженерным этапам, на монтажном посту — небольшой штраф
+        versatile = allowed.all(axis=1)
+
+        employee_roles = np.array([role_index[e.role] for e in employees], dtype=int)
+        post_type_ids = np.array([type_index[t] for t in post_types], dtype=int)
+
+        cost = np.broadcast_to(-weights, (len(employees), len(posts))).copy()
+        cost[~allowed[employee_roles][:, post_type_ids]] = FORBIDDEN
+        needs_skill = np.array([not allowed[:, type_index[t]].all() for t in post_types])
+        cost[np.ix_(versatile[employee_roles], ~needs_skill)] += MISMATCH_PENALTY
+
+        if previous:
+            column = {p.number: j for j, p in enumerate(posts)}
+            row = {id(e): i for i, e in enumerate(employees)}
+            for post_number, employee in previous.items():
+                i, j = row.get(id(employee)), column.get(post_number)
+                if i is not None and j is not None and cost[i, j] < FORBIDDEN:
+                    cost[i, j] -= CONTINUITY_BONUS
+        return cost
+
+    def solve(self, employees, load, previous=None):
+        """Назначение на один день: {номер поста: сотрудник}."""
+        employees = list(employees)
+        if not employees or not self.posts:
+            return {}
+        cost = self.cost_matrix(employees, load, previous)
+        rows, cols = solve_assignment(cost)
+        return {self.posts[j].number: employees[i]
+                for i, j in zip(rows, cols) if cost[i, j] < FORBIDDEN}
+
+    def assign_range(self, employees, orders, start_date, end_date, available=None, previous=None):
+        """Расстановка на каждый день из [start_date, end_date].
+
+        available(сотрудник, дата) позволяет исключить отсутствующих. Если состав
+        сотрудников не меняется, решение предыдущего дня переиспользуется.
+        """
+        return self.assign_range_for_load(employees, stage_load(orders), start_date, end_date,
+                                          available, previous)
+
+    def assign_range_for_load(self, employees, load, start_date, end_date, available=None,
+                              previous=None):
+        # То же по готовой загрузке {тип этапа: часов} — без списка заказов
+        employees = list(employees)
+        plan = {}
+        last_key = None
+        day = start_date
+        while day <= end_date:
+            present = [e for e in employees if available is None or available(e, day)]
+            key = tuple(id(e) for e in present)
+            if key != last_key:
+                previous = self.solve(present, load, previous)
+                last_key = key
+            plan[day] = dict(previous)
+            day += timedelta(days=1)
+        return plan
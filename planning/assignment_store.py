@@ -0,0 +1,165 @@
+# Индексированное хранилище назначений сотрудников на посты.
+#
+# Прямой индекс дата -> пост -> сотрудник, обратный индекс сотрудник -> даты
+# и отсортированные списки дат, по которым диапазонные запросы выполняются
+# бинарным поиском, без разбора строковых ключей.
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import timedelta
+
+from .dates import as_date
+
+
+class AssignmentStore:
+    def __init__(self):
+        self.employees = {}  # id сотрудника -> сотрудник
+        self._by_date = {}  # дата -> {номер поста: сотрудник}
+        self._by_employee = {}  # id сотрудника -> {дата: номер поста}
+        self._dates = []  # Отсортированные даты, на которые есть назначения
+        self._employee_dates = {}  # id сотрудника -> отсортированные даты
+
+    # --- Сотрудники ---
+
+    def register_employee(self, employee):
+        self.employees[employee.id] = employee
+
+    def employee(self, employee_id):
+        return self.employees.get(employee_id)
+
+    def remove_employee(self, employee):
+        # Удаляет сотрудника и все его назначения
+        for day, post_number in list(self._by_employee.get(employee.id, {}).items()):
+            self.unassign(day, post_number)
+        self.employees.pop(employee.id, None)
+
+    # --- Изменение назначений ---
+
+    def assign(self, day, post_number, employee):
+        day = as_date(day)
+        if self.get(day, post_number) is employee:
+            return
+        # Сотрудник в один день работает только на одном посту
+        other_post = self._by_employee.get(employee.id, {}).get(day)
+        if other_post is not None:
+            self.unassign(day, other_post)
+        self.unassign(day, post_number)
+
+        posts = self._by_date.get(day)
+        if posts is None:
+            posts = self._by_date[day] = {}
+            insort(self._dates, day)
+        posts[post_number] = employee
+        self.employees.setdefault(employee.id, employee)
+        self._by_employee.setdefault(employee.id, {})[day] = post_number
+        insort(self._employee_dates.setdefault(employee.id, []), day)
+
+    def unassign(self, day, post_number):
+        day = as_date(day)
+        posts = self._by_date.get(day)
+        if not posts or post_number not in posts:
+            return None
+        employee = posts.pop(post_number)
+        self._forget(employee.id, day)
+        if not posts:
+            del self._by_date[day]
+            del self._dates[bisect_left(self._dates, day)]
+        return employee
+
+    def clear_day(self, day):
+        day = as_date(day)
+        for post_number in list(self._by_date.get(day, {})):
+            self.unassign(day, post_number)
+
+    def assign_bulk(self, plan):
+        # plan: {дата: {номер поста: сотрудник}}; назначения этих дат заменяются целиком
+        for day, posts in plan.items():
+            self.clear_day(day)
+            for post_number, employee in posts.items():
+                self.assign(day, post_number, employee)
+
+    def assign_week(self, start, posts):
+        # Одинаковая расстановка на семь дней начиная с start
+        start = as_date(start)
+        self.assign_bulk({start + timedelta(days=i): posts for i in range(7)})
+
+    def remove_where(self, predicate):
+        # Снимает назначения, для которых predicate(номер поста, сотрудник) истинно.
+        # Возвращает снятые назначения [(дата, номер поста)]
+        removed = []
+        for day in list(self._dates):
+            for post_number, employee in list(self._by_date[day].items()):
+                if predicate(post_number, employee):
+                    self.unassign(day, post_number)
+                    removed.append((day, post_number))
+        return removed
+
+    def _forget(self, employee_id, day):
+        days = self._by_employee.get(employee_id)
+        if days is None or days.pop(day, None) is None:
+            return
+        dates = self._employee_dates[employee_id]
+        del dates[bisect_left(dates, day)]
+        if not days:
+            del self._by_employee[employee_id]
+            del self._employee_dates[employee_id]
+
+    # --- Запросы ---
+
+    def get(self, day, post_number):
+        return self._by_date.get(as_date(day), {}).get(post_number)
+
+    def on_date(self, day):
+        # Копия расстановки на день: {номер поста: сотрудник}
+        return dict(self._by_date.get(as_date(day), {}))
+
+    def effective_date(self, day):
+        # Последняя дата с назначениями не позже day (расстановка действует до следующей)
+        i = bisect_right(self._dates, as_date(day))
+        return self._dates[i - 1] if i else None
+
+    def next_date_after(self, day):
+        i = bisect_right(self._dates, as_date(day))
+        return self._dates[i] if i < len(self._dates) else None
+
+    def effective_on(self, day):
+        # Расстановка, действующая в день: последняя заданная не позже него
+        effective = self.effective_date(day)
+        return dict(self._by_date[effective]) if effective else {}
+
+    def in_range(self, start, end):
+        # Итератор (дата, {пост: сотрудник}) по датам с назначениями в [start, end]
+        start, end = as_date(start), as_date(end)
+        lo = bisect_left(self._dates, start)
+        hi = bisect_right(self._dates, end)
+        for day in self._dates[lo:hi]:
+            yield day, self._by_date[day]
+
+    def employee_days(self, employee_id, start=None, end=None):
+        # [(дата, номер поста)] для сотрудника, опционально в диапазоне дат
+        dates = self._employee_dates.get(employee_id, [])
+        lo = 0 if start is None else bisect_left(dates, as_date(start))
+        hi = len(dates) if end is None else bisect_right(dates, as_date(end))
+        posts = self._by_employee.get(employee_id, {})
+        return [(day, posts[day]) for day in dates[lo:hi]]
+
+    def free_posts(self, day, post_numbers):
+        taken = self._by_date.get(as_date(day), {})
+        return [n for n in post_numbers if n not in taken]
+
+    def free_employees(self, day):
+        day = as_date(day)
+        return [e for employee_id, e in self.employees.items()
+                if day not in self._by_employee.get(employee_id, {})]
+
+    def staffing(self, post_type_of, workday_hours):
+        # Мощность для прогноза: {дата: {тип этапа: часов в день}}
+        staffing = {}
+        for day in self._dates:
+            hours = staffing[day] = {}
+            for post_number in self._by_date[day]:
+                stage_type = post_type_of(post_number)
+                hours[stage_type] = hours.get(stage_type, 0.0) + workday_hours
+        return staffing
+
+    def __len__(self):
+        return sum(len(posts) for posts in self._by_date.values())
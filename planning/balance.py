@@ -0,0 +1,158 @@
+# Баланс линии: узкое место, предельный выпуск и потребность в постах.
+#
+# Модели описываются матрицами [модели × этапы] (часов этапа на единицу и тип
+# этапа; этапы моделей короче самой длинной дополнены нулями) и матрицей
+# трудоёмкости [модели × типы этапов]. Посты одного типа работают общим
+# пулом, поэтому для структуры выпуска (единиц каждой модели или долей)
+# нагрузка пулов — произведение структуры на матрицу трудоёмкости. Предельный
+# выпуск задаёт пул, мощности которого хватает на меньшее число единиц, а
+# внутри него — этап с наибольшей долей нагрузки. Сотни структур выпуска
+# оцениваются одним матричным умножением (evaluate).
+
+from collections import namedtuple
+
+import numpy as np
+
+from .constants import STAGE_TYPES
+from .forecast import remaining_units
+from .order_table import table_rows
+
+# daily_output — единиц в день; cycle_time — часов смены на единицу при этом
+# выпуске; utilization — {тип этапа: загрузка пула}; bottleneck_stage —
+# (модель, этап) с наибольшей долей в пуле-узком месте; stage_utilization —
+# [модели × этапы] доли мощности пула, занятые этапом; recommended_posts —
+# {тип этапа: постов} для целевого выпуска
+LineBalance = namedtuple("LineBalance", "daily_output cycle_time utilization bottleneck_type "
+                                        "bottleneck_stage stage_utilization recommended_posts")
+
+
+class LineBalancer:
+    def __init__(self, models, stage_types=STAGE_TYPES):
+        self.models = list(models)
+        self.stage_types = tuple(stage_types)
+        self._model_index = {model.id: i for i, model in enumerate(self.models)}
+        type_index = {t: i for i, t in enumerate(self.stage_types)}
+        width = max((len(model.stages) for model in self.models), default=0)
+        self.stage_hours = np.zeros((len(self.models), width))
+        self.stage_type = np.zeros((len(self.models), width), dtype=np.intp)
+        for row, model in enumerate(self.models):
+            for column, stage in enumerate(model.stages):
+                self.stage_hours[row, column] = stage.time_per_unit
+                self.stage_type[row, column] = type_index[stage.stage_type]
+        # Трудоёмкость единицы по типам: суммы этапов одного типа (дополнение нулями не влияет)
+        self.type_work = np.zeros((len(self.models), len(self.stage_types)))
+        rows = np.broadcast_to(np.arange(len(self.models))[:, None], self.stage_type.shape)
+        np.add.at(self.type_work, (rows, self.stage_type), self.stage_hours)
+
+    # --- Структура выпуска ---
+
+    def mix(self, units):
+        """Вектор структуры выпуска по self.models из {id модели: единиц}."""
+        vector = np.zeros(len(self.models))
+        for model_id, count in units.items():
+            vector[self._model_index[model_id]] += count
+        return vector
+
+    def order_mix(self, orders):
+        """Оставшиеся единицы заказов orders по моделям — текущая структура выпуска."""
+        orders = list(orders)
+        if not orders:
+            return np.zeros(len(self.models))
+        table, rows = table_rows(orders)
+        if table is not None:
+            model_ids = table.model_ids(rows)
+        else:
+            model_ids = np.fromiter((o.model.id for o in orders), dtype=np.int64, count=len(orders))
+        index = np.array([self._model_index[m] for m in model_ids.tolist()], dtype=np.intp)
+        return np.bincount(index, weights=remaining_units(orders), minlength=len(self.models))
+
+    def _load(self, mixes, efficiency):
+        # Часов по типам на единицу структуры [структуры × типы]: структура нормируется в доли
+        mixes = np.atleast_2d(np.asarray(mixes, dtype=float))
+        totals = mixes.sum(axis=1, keepdims=True)
+        shares = np.divide(mixes, totals, out=np.zeros_like(mixes), where=totals > 0)
+        load = shares @ self.type_work
+        if efficiency is not None:
+            load = load / np.asarray(efficiency, dtype=float)
+        return shares, load
+
+    def unit_load(self, mixes, efficiency=None):
+        """Часов мощности каждого типа на единицу структуры выпуска [структуры × типы]."""
+        return self._load(mixes, efficiency)[1]
+
+    def _capacity(self, capacity):
+        if isinstance(capacity, dict):
+            return np.array([capacity.get(t, 0.0) for t in self.stage_types], dtype=float)
+        return np.asarray(capacity, dtype=float)
+
+    # --- Оценка ---
+
+    def evaluate(self, mixes, capacity, efficiency=None):
+        """Предельный выпуск для многих структур выпуска сразу.
+
+        mixes — [структуры × модели] единиц или долей; capacity — часов мощности
+        по типам этапов в день (массив или {тип: часов}); efficiency — отдача
+        постов по типам (ThroughputEstimator.efficiency). Возвращает (единиц в
+        день [структуры], номер типа-узкого места или -1 [структуры], загрузка
+        пулов при этом выпуске [структуры × типы]).
+        """
+        _shares, load = self._load(mixes, efficiency)
+        capacity = self._capacity(capacity)
+        needed = load > 0
+        limits = np.full(load.shape, np.inf)
+        np.divide(capacity, load, out=limits, where=needed)
+        bottleneck = limits.argmin(axis=1)
+        output = limits[np.arange(len(load)), bottleneck]
+        empty = ~needed.any(axis=1)
+        output[empty] = 0.0
+        bottleneck[empty] = -1
+        # Нужный структуре тип без мощности — бесконечная загрузка
+        utilization = np.where(needed, np.inf, 0.0)
+        np.divide(output[:, None] * load, capacity, out=utilization, where=capacity > 0)
+        return output, bottleneck, utilization
+
+    def required_posts(self, mixes, targets, hours_per_post, efficiency=None):
+        """Постов каждого типа [структуры × типы] для выпуска targets единиц в день."""
+        _shares, load = self._load(mixes, efficiency)
+        targets = np.asarray(targets, dtype=float).reshape(-1, 1)
+        # Малый допуск: ровно достаточная мощность не требует лишнего поста
+        return np.ceil(targets * load / hours_per_post - 1e-9).astype(np.int64)
+
+    def analyze(self, mix, capacity, efficiency=None, shift_hours=None, target=None,
+                hours_per_post=None):
+        """Подробный баланс одной структуры выпуска (LineBalance).
+
+        Загрузка считается при выпуске target, а без него — при предельном.
+        Рекомендация постов — для target (или предельного выпуска) при
+        hours_per_post часах работы поста в день (по умолчанию shift_hours).
+        """
+        shares, load = self._load(mix, efficiency)
+        output, bottleneck, _utilization = self.evaluate(mix, capacity, efficiency)
+        output, bottleneck = float(output[0]), int(bottleneck[0])
+        capacity = self._capacity(capacity)
+        rate = output if target is None else float(target)
+
+        type_utilization = np.where(load[0] > 0, np.inf, 0.0)
+        np.divide(rate * load[0], capacity, out=type_utilization, where=capacity > 0)
+        stage_load = shares[0][:, None] * self.stage_hours
+        if efficiency is not None:
+            stage_load = stage_load / np.asarray(efficiency, dtype=float)[self.stage_type]
+        stage_capacity = capacity[self.stage_type]
+        stage_utilization = np.where(stage_load > 0, np.inf, 0.0)
+        np.divide(rate * stage_load, stage_capacity, out=stage_utilization, where=stage_capacity > 0)
+
+        bottleneck_stage = None
+        if bottleneck >= 0:
+            in_pool = np.where(self.stage_type == bottleneck, stage_load, -1.0)
+            row, column = np.unravel_index(in_pool.argmax(), in_pool.shape)
+            bottleneck_stage = (self.models[row], self.models[row].stages[column])
+
+        recommended = None
+        hours_per_post = hours_per_post or shift_hours
+        if hours_per_post and rate > 0:
+            posts = self.required_posts(mix, [rate], hours_per_post, efficiency)[0]
+            recommended = dict(zip(self.stage_types, posts.tolist()))
+        cycle_time = shift_hours / output if shift_hours and output > 0 else None
+        return LineBalance(output, cycle_time, dict(zip(self.stage_types, type_utilization.tolist())),
+                           self.stage_types[bottleneck] if bottleneck >= 0 else None,
+                           bottleneck_stage, stage_utilization, recommended)
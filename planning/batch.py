@@ -0,0 +1,613 @@
+# Пакетное планирование без интерфейса.
+#
+# Данные читаются из CSV/JSON Lines или из базы SQLite и проходят через
+# генераторы: заказы не превращаются в объекты и не собираются в список.
+# При очередности FIFO заказы обрабатываются пакетами по chunk_size с
+# переносом накопленной трудоёмкости между пакетами — память не зависит от
+# числа заказов. Остальные правила требуют сортировки всей очереди, поэтому
+# держат в памяти только числовые колонки (десятки байт на заказ).
+
+import csv
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import weakref
+from collections import namedtuple
+from datetime import date, timedelta
+
+import numpy as np
+
+from .assignment import AssignmentPlanner
+from .assignment_store import AssignmentStore
+from .balance import LineBalancer
+from .constants import STAGE_ASSEMBLY, STAGE_ENGINEERING, STAGE_TYPES, DATE_FORMAT
+from .dates import as_date
+from .domain import Employee, ProductionStage, ProductModel
+from .forecast import ForecastEngine, finish_days
+from .posts import build_posts, default_posts
+from .progress import to_ordinals
+from .scheduler import NO_DUE, RULES, OrderBatch, Scenario, Scheduler, WhatIfAnalyzer, sequence_indices
+from .shift_calendar import ShiftCalendar, CapacityTimeline
+from .throughput import ThroughputEstimator
+
+# Заказ во входном потоке; даты — строки "yyyy-MM-dd" или None
+OrderRow = namedtuple("OrderRow", "id model_id quantity completed_units last_progress_date "
+                                  "due_date priority")
+
+FORECAST_FIELDS = ("position", "order_id", "model", "quantity", "completed", "remaining",
+                   "due_date", "finish_date", "late_days")
+ASSIGNMENT_FIELDS = ("date", "post", "stage_type", "employee_id", "employee")
+BALANCE_FIELDS = ("date", "stage_type", "posts", "capacity_hours", "load_hours_per_unit",
+                  "daily_output", "utilization", "bottleneck", "bottleneck_stage", "target",
+                  "recommended_posts")
+PLAN_FIELDS = ("date", "order_id", "model", "units")
+WHATIF_FIELDS = ("rank", "scenario", "rule", "assembly_posts", "engineering_posts", "makespan_days",
+                 "total_late_days", "max_late_days", "late_orders")
+
+
+# --- Чтение и запись ---
+
+def _open_input(path):
+    if path == "-":
+        return sys.stdin
+    return open(path, newline="", encoding="utf-8")
+
+
+def read_records(path):
+    """Построчно читает CSV или JSON Lines (по расширению .jsonl/.ndjson) в словари."""
+    stream = _open_input(path)
+    try:
+        if str(path).endswith((".jsonl", ".ndjson")):
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(stream)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _value(record, key, default=None):
+    # Пустая ячейка CSV равнозначна отсутствующему полю
+    value = record.get(key)
+    return default if value is None or value == "" else value
+
+
+def write_jsonl(records, stream):
+    count = 0
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(records, stream, fields):
+    writer = csv.DictWriter(stream, fieldnames=fields)
+    writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+    return count
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _spool_stdin():
+    # Стандартный ввод во временный файл .csv (формат определяется по расширению)
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", encoding="utf-8",
+                                     delete=False) as stream:
+        shutil.copyfileobj(sys.stdin, stream)
+    return stream.name
+
+
+# --- Источники данных ---
+
+class FileSource:
+    """Сотрудники, модели, заказы и выработка из файлов CSV/JSON Lines.
+
+    employees: id, name, role[, work_hours]
+    models: model_id, model[, stage], stage_type, time_per_unit — строка на этап
+    orders: id, model_id, quantity[, completed_units, last_progress_date, due_date, priority]
+    progress: order_id, day, units — заменяет completed_units заказов
+
+    Путь '-' — стандартный ввод (CSV, только для одного из файлов).
+    """
+    CHUNK_ROWS = 100000  # Строк выработки, разбираемых в колонки за раз
+
+    def __init__(self, employees, models, orders, progress=None):
+        paths = [employees, models, orders, progress]
+        if paths.count("-") > 1:
+            raise ValueError("стандартный ввод можно указать только для одного файла")
+        if "-" in paths:
+            # Файлы читаются за запуск несколько раз (авторасстановка, история,
+            # вывод), а стандартный ввод — однократно: он копируется во
+            # временный файл, который удаляется вместе с источником
+            stdin_copy = _spool_stdin()
+            weakref.finalize(self, os.remove, stdin_copy)
+            paths = [stdin_copy if path == "-" else path for path in paths]
+        self.employees_path, self.models_path, self.orders_path, self.progress_path = paths
+        self._progress = None
+
+    def employees(self):
+        employees = []
+        for record in read_records(self.employees_path):
+            employee = Employee(record["name"], record["role"], employee_id=int(record["id"]))
+            employee.work_hours = float(_value(record, "work_hours", 8))
+            employees.append(employee)
+        return employees
+
+    def models(self):
+        models = {}
+        for record in read_records(self.models_path):
+            model_id = int(record["model_id"])
+            model = models.get(model_id)
+            if model is None:
+                model = models[model_id] = ProductModel(_value(record, "model", str(model_id)), [],
+                                                        model_id=model_id)
+            model.stages.append(ProductionStage(_value(record, "stage", ""), record["stage_type"],
+                                                float(record["time_per_unit"])))
+        return models
+
+    def _progress_chunks(self):
+        # Выработка пакетами колонок (id заказов, дни-ordinal, единиц)
+        ordinals = {}  # "yyyy-MM-dd" -> ordinal: различных дней немного
+        for chunk in _chunks(read_records(self.progress_path), self.CHUNK_ROWS):
+            days = []
+            for record in chunk:
+                day = record["day"]
+                ordinal = ordinals.get(day)
+                if ordinal is None:
+                    ordinal = ordinals[day] = as_date(day).toordinal()
+                days.append(ordinal)
+            yield (np.array([int(r["order_id"]) for r in chunk], dtype=np.int64),
+                   np.array(days, dtype=np.int64),
+                   np.array([int(r["units"]) for r in chunk], dtype=np.int64))
+
+    def _load_progress(self):
+        # Суммы по заказам с выработкой в отсортированных колонках (id заказов,
+        # единиц, последний день-ordinal): пакеты сворачиваются по мере чтения,
+        # и в памяти — три числа на заказ, а не словарь объектов
+        ids = totals = last = np.zeros(0, dtype=np.int64)
+        for order_ids, days, units in self._progress_chunks():
+            ids, inverse = np.unique(np.concatenate([ids, order_ids]), return_inverse=True)
+            inverse = inverse.reshape(-1)
+            totals = np.bincount(inverse, weights=np.concatenate([totals, units]),
+                                 minlength=len(ids)).astype(np.int64)
+            merged = np.zeros(len(ids), dtype=np.int64)
+            np.maximum.at(merged, inverse, np.concatenate([last, days]))
+            last = merged
+        return ids, totals, last
+
+    def _with_progress(self, chunk):
+        # Выполнено и последняя выработка пакета заказов — из файла выработки
+        ids, totals, last = self._progress
+        if not len(ids):
+            return chunk
+        order_ids = np.array([row.id for row in chunk], dtype=np.int64)
+        position = np.searchsorted(ids, order_ids).clip(max=len(ids) - 1)
+        for i in np.flatnonzero(ids[position] == order_ids).tolist():
+            day = date.fromordinal(int(last[position[i]])).strftime(DATE_FORMAT)
+            chunk[i] = chunk[i]._replace(completed_units=int(totals[position[i]]),
+                                         last_progress_date=day)
+        return chunk
+
+    def _order_rows(self):
+        for record in read_records(self.orders_path):
+            yield OrderRow(int(record["id"]), int(record["model_id"]), int(record["quantity"]),
+                           int(_value(record, "completed_units", 0)), _value(record, "last_progress_date"),
+                           _value(record, "due_date"), float(_value(record, "priority", 1.0)))
+
+    def orders(self):
+        if self.progress_path is None:
+            yield from self._order_rows()
+            return
+        if self._progress is None:
+            self._progress = self._load_progress()
+        for chunk in _chunks(self._order_rows(), self.CHUNK_ROWS):
+            yield from self._with_progress(chunk)
+
+    def model_progress(self, since):
+        """Выработка по моделям и дням начиная с since: [(id модели, дата, единиц)]."""
+        if self.progress_path is None:
+            return []
+        # Модель заказа — по отсортированным колонкам id заказов и моделей
+        ids, models = [], []
+        for chunk in _chunks(self._order_rows(), self.CHUNK_ROWS):
+            ids.append(np.array([row.id for row in chunk], dtype=np.int64))
+            models.append(np.array([row.model_id for row in chunk], dtype=np.int64))
+        if not ids:
+            return []
+        ids, models = np.concatenate(ids), np.concatenate(models)
+        order = np.argsort(ids)
+        ids, models = ids[order], models[order]
+        since = as_date(since).toordinal()
+        totals = {}  # id модели << 32 | день -> единиц
+        for order_ids, days, units in self._progress_chunks():
+            position = np.searchsorted(ids, order_ids).clip(max=len(ids) - 1)
+            known = (days >= since) & (ids[position] == order_ids)
+            keys = (models[position[known]] << 32) | days[known]
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            sums = np.bincount(inverse.reshape(-1), weights=units[known], minlength=len(unique_keys))
+            for key, total in zip(unique_keys.tolist(), sums.tolist()):
+                totals[key] = totals.get(key, 0) + int(total)
+        return [(key >> 32, date.fromordinal(key & 0xFFFFFFFF).strftime(DATE_FORMAT), total)
+                for key, total in sorted(totals.items())]
+
+    def settings(self):
+        return {}
+
+    def assignments(self):
+        return []
+
+    def calendar(self):
+        return [], [], []
+
+
+class DatabaseSource:
+    """Данные приложения из SqliteStorage; заказы читаются курсором."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def employees(self):
+        employees = []
+        for employee_id, name, role, work_hours in self.storage.load_employees():
+            employee = Employee(name, role, employee_id=employee_id)
+            employee.work_hours = work_hours
+            employees.append(employee)
+        return employees
+
+    def models(self):
+        return {model_id: ProductModel(name, [ProductionStage(*stage) for stage in stages],
+                                       model_id=model_id)
+                for model_id, name, stages in self.storage.load_models()}
+
+    def orders(self):
+        for (order_id, model_id, quantity, _created, completed, last_date,
+             due_date, priority) in self.storage.iter_orders():
+            yield OrderRow(order_id, model_id, quantity, completed, last_date, due_date, priority)
+
+    def model_progress(self, since):
+        return self.storage.load_model_progress_since(since)
+
+    def settings(self):
+        return self.storage.load_settings()
+
+    def assignments(self):
+        return self.storage.load_assignments()
+
+    def calendar(self):
+        return self.storage.load_calendar()
+
+
+# --- Планирование ---
+
+class BatchPlanner:
+    def __init__(self, source, start_date=None, posts=None, workday_hours=None, weekends=None,
+                 post_hours=None, stage_types=STAGE_TYPES, chunk_size=10000, horizon_days=3 * 366):
+        self.source = source
+        self.start_date = as_date(start_date) if start_date is not None else date.today()
+        self.stage_types = tuple(stage_types)
+        self.chunk_size = chunk_size
+        self.horizon_days = horizon_days
+
+        # Параметры линии: аргументы важнее сохранённых настроек
+        settings = source.settings()
+        if workday_hours is None:
+            workday_hours = float(settings.get("workday_hours", 8.0))
+        if posts is None:
+            posts = (build_posts(int(settings["assembly_posts"]), int(settings["engineering_posts"]))
+                     if "assembly_posts" in settings else default_posts())
+        if weekends is None and settings.get("weekends"):
+            weekends = [int(d) for d in settings["weekends"].split(",")]
+        self.posts = posts
+        self._post_types = {p.number: p.stage_type for p in posts}
+        self.calendar = ShiftCalendar(default_hours=workday_hours, weekends=weekends or ())
+        day_hours, employee_hours, stored_post_hours = source.calendar()
+        for day, hours in day_hours:
+            self.calendar.set_day_hours(day, hours)
+        for employee_id, day, hours in employee_hours:
+            self.calendar.set_employee_hours(employee_id, day, hours)
+        # post_hours — {номер поста: часов в день} поверх сохранённых ограничений
+        for post_number, hours in list(stored_post_hours) + list((post_hours or {}).items()):
+            self.calendar.set_post_hours(post_number, hours)
+
+        self.engine = ForecastEngine(self.stage_types)
+        self.models = source.models()
+        self._unit_work = {model_id: self.engine.model_work(model)
+                           for model_id, model in self.models.items()}
+        self.store = AssignmentStore()
+        for employee in source.employees():
+            self.store.register_employee(employee)
+        for day, post_number, employee_id in source.assignments():
+            employee = self.store.employee(employee_id)
+            if employee is not None and post_number in self._post_types:
+                self.store.assign(as_date(day), post_number, employee)
+
+    def post_type(self, post_number):
+        return self._post_types.get(post_number)
+
+    def stage_load(self):
+        # Оставшаяся трудоёмкость по типам этапов — один проход по заказам
+        load = np.zeros(len(self.stage_types))
+        for chunk in _chunks(self.source.orders(), self.chunk_size):
+            remaining, unit_work = self._arrays(chunk)
+            load += remaining @ unit_work
+        return dict(zip(self.stage_types, load.tolist()))
+
+    def plan_assignments(self, days=14):
+        """Авторасстановка на days дней от start_date: {дата: {пост: сотрудник}}."""
+        previous = self.store.effective_on(self.start_date - timedelta(days=1))
+        return self._auto_assign(self.posts, self.store, days, self.stage_load(), previous)
+
+    def _auto_assign(self, posts, store, days, load, previous=None):
+        end = self.start_date + timedelta(days=days - 1)
+        planner = AssignmentPlanner(posts)
+        plan = planner.assign_range_for_load(store.employees.values(), load, self.start_date, end,
+                                             available=self.calendar.is_available,
+                                             previous=previous)
+        store.assign_bulk(plan)
+        return plan
+
+    def assignment_records(self, plan):
+        for day, posts in plan.items():
+            for post_number in sorted(posts):
+                employee = posts[post_number]
+                yield {"date": day.strftime(DATE_FORMAT), "post": post_number,
+                       "stage_type": self.post_type(post_number),
+                       "employee_id": employee.id, "employee": employee.name}
+
+    def capacity(self):
+        # Сохранённая расстановка, а без неё — авторасстановка на две недели
+        if self.store.effective_date(self.start_date) is None:
+            self.plan_assignments()
+        return CapacityTimeline(self.calendar, self.store, self.post_type, self.start_date,
+                                self.horizon_days, self.stage_types)
+
+    def efficiency(self, capacity):
+        """Отдача постов по типам этапов по недавней истории выработки, как в окне приложения.
+
+        capacity — CapacityTimeline, по которому оценивается мощность прошедших дней.
+        """
+        estimator = ThroughputEstimator(self.engine, capacity.day_capacity)
+        rows = self.source.model_progress(estimator.history_start(self.start_date))
+        if rows:
+            model_ids, days, units = zip(*rows)
+            estimator.fit(model_ids, to_ordinals(days), units, self.models.values())
+        return estimator.efficiency()
+
+    def order_mix(self):
+        # Оставшиеся единицы по моделям {id модели: единиц} — один проход по заказам
+        mix = {}
+        for chunk in _chunks(self.source.orders(), self.chunk_size):
+            models = np.array([o.model_id for o in chunk], dtype=np.int64)
+            remaining = np.array([max(o.quantity - o.completed_units, 0) for o in chunk], dtype=float)
+            codes, index = np.unique(models, return_inverse=True)
+            for model_id, units in zip(codes.tolist(), np.bincount(index, weights=remaining).tolist()):
+                mix[model_id] = mix.get(model_id, 0.0) + units
+        return mix
+
+    def balance_records(self, target=None):
+        """Баланс линии по типам этапов на первый рабочий день от start_date (BALANCE_FIELDS)."""
+        day = self.start_date
+        for _ in range(7):
+            if self.calendar.hours_on(day) > 0:
+                break
+            day += timedelta(days=1)
+        timeline = self.capacity()
+        capacity = timeline.day_capacity(day)
+        efficiency = self.efficiency(timeline)
+        balancer = LineBalancer(self.models.values(), self.stage_types)
+        mix = balancer.mix(self.order_mix())
+        shift_hours = self.calendar.hours_on(day)
+        balance = balancer.analyze(mix, capacity, efficiency, shift_hours=shift_hours, target=target)
+        unit_load = balancer.unit_load(mix, efficiency)[0]
+        bottleneck_stage = None
+        if balance.bottleneck_stage is not None:
+            model, stage = balance.bottleneck_stage
+            bottleneck_stage = f"{model.name}: {stage.name}"
+        counts = {t: sum(1 for p in self.posts if p.stage_type == t) for t in self.stage_types}
+        for i, stage_type in enumerate(self.stage_types):
+            utilization = balance.utilization[stage_type]
+            yield {"date": day.strftime(DATE_FORMAT), "stage_type": stage_type,
+                   "posts": counts[stage_type], "capacity_hours": float(capacity[i]),
+                   "load_hours_per_unit": round(float(unit_load[i]), 4),
+                   "daily_output": round(balance.daily_output, 2),
+                   "utilization": round(utilization, 4) if np.isfinite(utilization) else None,
+                   "bottleneck": stage_type == balance.bottleneck_type,
+                   "bottleneck_stage": bottleneck_stage if stage_type == balance.bottleneck_type else None,
+                   "target": target,
+                   "recommended_posts": (balance.recommended_posts or {}).get(stage_type)}
+
+    def plan_records(self, days=14, rule="fifo"):
+        """Суточный план выпуска на days дней от start_date (словари PLAN_FIELDS)."""
+        batch = self.order_batch()
+        if batch is None:
+            return
+        capacity = self.capacity()
+        plan = Scheduler(self.engine).plan(batch, capacity, self.start_date, rule,
+                                           horizon_limit=days - 1, efficiency=self.efficiency(capacity))
+        for offset in range(min(days, plan.daily_units.shape[1])):
+            day = self.start_date + timedelta(days=offset)
+            day_text = day.strftime(DATE_FORMAT)
+            for order, units in plan.day_plan(day):
+                yield {"date": day_text, "order_id": order.id,
+                       "model": self.models[order.model_id].name, "units": units}
+
+    def whatif_records(self, rules=None, post_variants=(), workers=None):
+        """Сравнение сценариев «что если», лучшие первыми (словари WHATIF_FIELDS).
+
+        Сценарии — правила очередности rules (по умолчанию все) на текущей
+        расстановке и на каждом варианте числа постов post_variants
+        [(монтажных, инженерных)], для которого сотрудники расставляются заново.
+        """
+        batch = self.order_batch()
+        if batch is None:
+            return
+        counts = [sum(1 for p in self.posts if p.stage_type == t) for t in (STAGE_ASSEMBLY, STAGE_ENGINEERING)]
+        capacity = self.capacity()
+        efficiency = self.efficiency(capacity)
+        lines = [(None, tuple(counts), capacity)]
+        load = dict(zip(self.stage_types, (batch.remaining @ batch.unit_work).tolist()))
+        for assembly, engineering in post_variants:
+            lines.append((f"{assembly}+{engineering}", (assembly, engineering),
+                          self._variant_capacity(assembly, engineering, load)))
+        scenarios, scenario_posts = [], {}
+        for rule in rules or RULES:
+            for name, posts, capacity in lines:
+                scenario = Scenario(rule if name is None else f"{rule} {name}", capacity, rule)
+                scenario_posts[scenario.name] = posts
+                scenarios.append(scenario)
+        results = WhatIfAnalyzer(self.engine, workers).evaluate(batch, scenarios, None, self.start_date,
+                                                                 efficiency)
+        for rank, result in enumerate(results, 1):
+            scenario = result.scenario
+            assembly, engineering = scenario_posts[scenario.name]
+            yield {"rank": rank, "scenario": scenario.name, "rule": scenario.rule,
+                   "assembly_posts": assembly, "engineering_posts": engineering,
+                   "makespan_days": result.makespan if np.isfinite(result.makespan) else None,
+                   "total_late_days": result.total_lateness if np.isfinite(result.total_lateness) else None,
+                   "max_late_days": result.max_lateness if np.isfinite(result.max_lateness) else None,
+                   "late_orders": result.late_orders}
+
+    def _variant_capacity(self, assembly, engineering, load, days=14):
+        # Мощность линии с другим числом постов: сотрудники расставляются заново
+        posts = build_posts(assembly, engineering)
+        store = AssignmentStore()
+        for employee in self.store.employees.values():
+            store.register_employee(employee)
+        self._auto_assign(posts, store, days, load)
+        post_types = {p.number: p.stage_type for p in posts}
+        return CapacityTimeline(self.calendar, store, post_types.get, self.start_date,
+                                self.horizon_days, self.stage_types)
+
+    def _arrays(self, chunk):
+        remaining = np.fromiter((max(o.quantity - o.completed_units, 0) for o in chunk),
+                                dtype=float, count=len(chunk))
+        unit_work = np.vstack([self._unit_work[o.model_id] for o in chunk])
+        return remaining, unit_work
+
+    def forecast(self, rule="fifo"):
+        """Генератор прогнозов заказов в порядке очереди (словари FORECAST_FIELDS).
+
+        Трудоёмкость делится на фактическую отдачу постов (efficiency).
+        """
+        capacity = self.capacity()
+        efficiency = self.efficiency(capacity)
+        cumulative_capacity, tail = capacity.window(self.start_date)
+        if rule == "fifo":
+            return self._forecast_stream(cumulative_capacity, tail, efficiency)
+        return self._forecast_sorted(rule, cumulative_capacity, tail, efficiency)
+
+    def _forecast_stream(self, cumulative_capacity, tail, efficiency):
+        offset = np.zeros(len(self.stage_types))
+        position = 0
+        for chunk in _chunks(self.source.orders(), self.chunk_size):
+            remaining, unit_work = self._arrays(chunk)
+            unit_work = unit_work / efficiency
+            finish = finish_days(remaining, unit_work, cumulative_capacity, tail, offset)
+            offset += remaining @ unit_work
+            yield from self._records(position, chunk, remaining, finish,
+                                     _days([o.last_progress_date for o in chunk]),
+                                     _days([o.due_date for o in chunk]))
+            position += len(chunk)
+
+    def _columns(self):
+        # Числовые колонки всех заказов (id, модель, количество, выполнено,
+        # приоритет, последняя выработка, срок) или None без заказов
+        ids, models, quantity, completed, priority, last, due = [], [], [], [], [], [], []
+        for chunk in _chunks(self.source.orders(), self.chunk_size):
+            ids.append(np.array([o.id for o in chunk], dtype=np.int64))
+            models.append(np.array([o.model_id for o in chunk], dtype=np.int64))
+            quantity.append(np.array([o.quantity for o in chunk], dtype=np.int64))
+            completed.append(np.array([o.completed_units for o in chunk], dtype=np.int64))
+            priority.append(np.array([o.priority for o in chunk], dtype=float))
+            last.append(_days([o.last_progress_date for o in chunk]))
+            due.append(_days([o.due_date for o in chunk]))
+        if not ids:
+            return None
+        return tuple(np.concatenate(column) for column in (ids, models, quantity, completed, priority, last, due))
+
+    def _model_work(self, models):
+        # Трудоёмкость единицы [заказы × типы] по колонке моделей
+        model_ids = sorted(self._unit_work)
+        model_rows = np.vstack([self._unit_work[m] for m in model_ids])
+        return model_rows[np.searchsorted(model_ids, models)]
+
+    def order_batch(self):
+        """Открытые заказы как OrderBatch для Scheduler и WhatIfAnalyzer (None — заказов нет)."""
+        columns = self._columns()
+        if columns is None:
+            return None
+        ids, models, quantity, completed, priority, _last, due = columns
+        remaining = np.maximum(quantity - completed, 0).astype(float)
+        open_rows = np.flatnonzero(remaining > 0)
+        rows = [OrderRow(*row, None, None, None) for row in
+                zip(ids[open_rows].tolist(), models[open_rows].tolist(), quantity[open_rows].tolist(),
+                    completed[open_rows].tolist())]
+        return OrderBatch.from_columns(rows, ids[open_rows], remaining[open_rows],
+                                       self._model_work(models[open_rows]), due[open_rows],
+                                       priority[open_rows])
+
+    def _forecast_sorted(self, rule, cumulative_capacity, tail, efficiency):
+        # Числовые колонки всех заказов; строки восстанавливаются при выводе пакетами
+        columns = self._columns()
+        if columns is None:
+            return
+        ids, models, quantity, completed, priority, last, due = columns
+        unit_work = self._model_work(models)
+        remaining = np.maximum(quantity - completed, 0).astype(float)
+        due_key = np.where(np.isnat(due), NO_DUE, due.astype(np.int64))
+
+        # Очередность — по нормативной трудоёмкости, как у Scheduler
+        order = sequence_indices(rule, due_key, remaining * unit_work.sum(axis=1), priority)
+        finish = finish_days(remaining[order], unit_work[order] / efficiency, cumulative_capacity, tail)
+        for start in range(0, len(order), self.chunk_size):
+            part = order[start:start + self.chunk_size]
+            chunk = [OrderRow(*row, None, None, None) for row in
+                     zip(ids[part].tolist(), models[part].tolist(), quantity[part].tolist(),
+                         completed[part].tolist())]
+            yield from self._records(start, chunk, remaining[part],
+                                     finish[start:start + self.chunk_size], last[part], due[part])
+
+    def _records(self, position, chunk, remaining, finish, last, due):
+        # Записи прогноза пакета; даты считаются векторно в datetime64[D]
+        done = remaining == 0
+        known = np.isfinite(finish) | done
+        offsets = np.where(known & ~done, finish, 0).astype(np.int64)
+        finish_dates = np.datetime64(self.start_date, "D") + offsets
+        # Выполненный заказ завершён в день последней выработки
+        finish_dates = np.where(done & ~np.isnat(last), last, finish_dates)
+        finish_dates[~known] = np.datetime64("NaT")
+        late = np.maximum((finish_dates - due).astype(np.int64), 0).tolist()
+        has_late = (known & ~np.isnat(due)).tolist()
+        finish_text = _iso(finish_dates)
+        due_text = _iso(due)
+        for i, order in enumerate(chunk):
+            yield {"position": position + i + 1, "order_id": order.id,
+                   "model": self.models[order.model_id].name, "quantity": order.quantity,
+                   "completed": order.completed_units, "remaining": int(remaining[i]),
+                   "due_date": due_text[i], "finish_date": finish_text[i],
+                   "late_days": late[i] if has_late[i] else None}
+
+
+def _days(values):
+    # Даты ("yyyy-MM-dd", date или None) -> datetime64[D], None -> NaT
+    return np.array(values, dtype="datetime64[D]")
+
+
+def _iso(days):
+    return [None if text == "NaT" else text for text in np.datetime_as_string(days).tolist()]
@@ -0,0 +1,208 @@
+# Данные для графиков: агрегирование заказов и прореживание временных рядов.
+#
+# Число столбцов и точек ограничено сверху, поэтому стоимость отрисовки не
+# зависит ни от числа заказов, ни от длины истории выработки.
+
+import numpy as np
+
+from .dates import as_date
+from .order_table import order_columns, order_models
+from .progress import rolling_mean
+
+MAX_BARS = 30  # Столбцов на графике прогресса заказов
+MAX_POINTS = 600  # Точек на линии временного ряда
+
+GROUPS = ("auto", "order", "model", "week", "status")
+OTHER_LABEL = "Прочие"
+NO_FORECAST_LABEL = "Без прогноза"
+
+STATUS_DONE = "Выполнен"
+STATUS_AT_RISK = "Риск срыва срока"
+STATUS_IN_PROGRESS = "В работе"
+STATUS_NOT_STARTED = "Не начат"
+STATUSES = (STATUS_NOT_STARTED, STATUS_IN_PROGRESS, STATUS_AT_RISK, STATUS_DONE)
+
+
+class OrderBars:
+    """Столбцы «план/факт»: подписи и два массива одинаковой длины."""
+
+    def __init__(self, group, labels, planned, actual):
+        self.group = group  # Фактическая группировка (для "auto" — выбранная)
+        self.labels = labels
+        self.planned = planned
+        self.actual = actual
+
+    def __len__(self):
+        return len(self.labels)
+
+
+class OutputSeries:
+    """Выпуск завода по дням после прореживания.
+
+    lines: {"daily" | "rolling" | "cumulative": (даты-ordinal, значения)}.
+    """
+
+    def __init__(self, lines, first, last, total_days):
+        self.lines = lines
+        self.first = first  # Границы истории (ordinal) — для оси X
+        self.last = last
+        self.total_days = total_days  # Длина истории до прореживания
+
+
+def order_status(order):
+    if order.completed_units >= order.quantity:
+        return STATUS_DONE
+    if (order.due_date is not None and order.estimated_end_date is not None
+            and as_date(order.estimated_end_date) > as_date(order.due_date)):
+        return STATUS_AT_RISK
+    if order.completed_units > 0:
+        return STATUS_IN_PROGRESS
+    return STATUS_NOT_STARTED
+
+
+def _first_seen(keys):
+    # Различные ключи в порядке первого появления и номер ключа каждого элемента
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return unique[order], rank[inverse.reshape(-1)]
+
+
+def _group_codes(orders, group):
+    """(подписи групп по первому появлению, номер группы каждого заказа).
+
+    Группы считаются по колонкам заказов, без обхода атрибутов записей.
+    """
+    if group == "model":
+        # Модели с одинаковым названием попадают в один столбец
+        models, codes = order_models(orders)
+        names = {}
+        name_codes = np.array([names.setdefault(model.name, len(names)) for model in models],
+                              dtype=np.int64)
+        used, codes = _first_seen(name_codes[codes])
+        labels = list(names)
+        return [labels[i] for i in used.tolist()], codes
+    if group == "week":
+        (end,) = order_columns(orders, "estimated_end_date")
+        days = end.astype(np.int64)
+        # Понедельник недели прогнозного завершения (1970-01-01 — четверг)
+        mondays = np.where(np.isnat(end), days, days - (days + 3) % 7).view("datetime64[D]")
+        used, codes = _first_seen(mondays)
+        return [NO_FORECAST_LABEL if np.isnat(day) else str(day) for day in used], codes
+    quantity, completed, due, end = order_columns(orders, "quantity", "completed_units",
+                                                  "due_date", "estimated_end_date")
+    # Сравнение с NaT ложно: без срока или прогноза заказ не под риском
+    statuses = np.select([completed >= quantity, end > due, completed > 0],
+                         [STATUSES.index(STATUS_DONE), STATUSES.index(STATUS_AT_RISK),
+                          STATUSES.index(STATUS_IN_PROGRESS)], STATUSES.index(STATUS_NOT_STARTED))
+    used, codes = _first_seen(statuses)
+    return [STATUSES[i] for i in used.tolist()], codes
+
+
+def _auto_group(orders, limit):
+    if len(orders) <= limit:
+        return "order"
+    models, codes = order_models(orders)
+    if len({models[i].id for i in np.unique(codes).tolist()}) <= limit:
+        return "model"
+    return "week"
+
+
+def _label_order(group, labels, planned):
+    # Порядок столбцов: недели по времени, статусы по жизненному циклу, остальное по объему плана
+    if group == "week":
+        return sorted(range(len(labels)), key=lambda i: (labels[i] == NO_FORECAST_LABEL, labels[i]))
+    if group == "status":
+        return sorted(range(len(labels)), key=lambda i: STATUSES.index(labels[i]))
+    if group == "order":
+        return list(range(len(labels)))
+    return list(np.argsort(-planned, kind="stable"))
+
+
+def aggregate_orders(orders, group="auto", limit=MAX_BARS):
+    """Суммы плана и факта по группам заказов (не более limit столбцов).
+
+    group: "order", "model", "week" (неделя прогнозного завершения),
+    "status" или "auto" — по заказам, пока их немного, затем по моделям
+    или неделям. Группы сверх лимита сливаются в «Прочие».
+    """
+    if group == "auto":
+        group = _auto_group(orders, limit)
+    ids, planned, actual = order_columns(orders, "id", "quantity", "completed_units")
+    if group == "order":
+        labels = [f"№{order_id}" for order_id in ids.tolist()]
+    else:
+        labels, codes = _group_codes(orders, group)
+        planned = np.bincount(codes, weights=planned, minlength=len(labels)).astype(np.int64)
+        actual = np.bincount(codes, weights=actual, minlength=len(labels)).astype(np.int64)
+
+    order = _label_order(group, labels, planned)
+    if len(order) > limit:
+        # Крупнейшие группы остаются, остальные суммируются в последний столбец
+        ranked = np.argsort(-planned, kind="stable")
+        kept = set(ranked[:limit - 1].tolist())
+        rest = [i for i in order if i not in kept]
+        order = [i for i in order if i in kept]
+        labels = [labels[i] for i in order] + [OTHER_LABEL]
+        planned = np.append(planned[order], planned[rest].sum())
+        actual = np.append(actual[order], actual[rest].sum())
+    else:
+        labels = [labels[i] for i in order]
+        planned, actual = planned[order], actual[order]
+    return OrderBars(group, labels, planned, actual)
+
+
+def lttb_indices(x, y, threshold):
+    """Индексы точек, выбранных алгоритмом Largest-Triangle-Three-Buckets.
+
+    Первая и последняя точки сохраняются; из каждой корзины берется точка,
+    образующая наибольший треугольник с предыдущей выбранной и средним
+    следующей корзины — пики и провалы ряда не теряются.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    edges = np.append(edges, n)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2]
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a])
+                      - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[bucket + 1] = a
+    return selected
+
+
+def lttb(x, y, threshold):
+    indices = lttb_indices(x, y, threshold)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
+
+
+def plant_output(progress, window=7, max_points=MAX_POINTS, start=None, end=None):
+    """Выпуск завода по дням из ProgressStore, прореженный до max_points точек.
+
+    Скользящее среднее и накопленный итог считаются по полной истории, а
+    прореживается каждая линия по своим значениям.
+    """
+    ordinals, daily = progress.daily_output(start, end)
+    if not len(daily):
+        return OutputSeries({}, None, None, 0)
+    values = {
+        "daily": daily,
+        "rolling": rolling_mean(daily, window),
+        "cumulative": np.cumsum(daily),
+    }
+    lines = {}
+    for name, series in values.items():
+        indices = lttb_indices(ordinals, series, max_points)
+        lines[name] = (ordinals[indices], series[indices])
+    return OutputSeries(lines, int(ordinals[0]), int(ordinals[-1]), len(daily))
@@ -0,0 +1,157 @@
+# Командная строка пакетного планирования: python -m planning <команда> ...
+#
+# forecast — прогноз дат завершения заказов в порядке очереди;
+# assign — авторасстановка сотрудников по постам на несколько дней;
+# balance — загрузка типов постов, узкое место и потребность в постах;
+# plan — суточный план выпуска заказов; whatif — сравнение правил очередности
+# и числа постов;
+# serve — общий сервер планирования для нескольких рабочих мест.
+# Результат выводится построчно (JSON Lines или CSV) без Qt.
+
+import argparse
+import sys
+
+from .batch import (BatchPlanner, DatabaseSource, FileSource, FORECAST_FIELDS, ASSIGNMENT_FIELDS,
+                    BALANCE_FIELDS, PLAN_FIELDS, WHATIF_FIELDS, write_csv, write_jsonl)
+from .posts import build_posts
+from .scheduler import RULES
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m planning",
+                                     description="Пакетное планирование производства")
+    commands = parser.add_subparsers(dest="command", required=True)
+    forecast = commands.add_parser("forecast", help="прогноз дат завершения заказов")
+    forecast.add_argument("--rule", default="fifo", choices=tuple(RULES),
+                          help="правило очередности заказов")
+    assign = commands.add_parser("assign", help="авторасстановка сотрудников по постам")
+    assign.add_argument("--days", type=int, default=14, help="число дней расстановки")
+    assign.add_argument("--save", action="store_true", help="записать расстановку в базу")
+    balance = commands.add_parser("balance", help="баланс линии: узкое место и потребность в постах")
+    balance.add_argument("--target", type=float,
+                         help="целевой выпуск, единиц в день (по умолчанию — предельный)")
+    plan = commands.add_parser("plan", help="суточный план выпуска: единиц каждого заказа по дням")
+    plan.add_argument("--rule", default="fifo", choices=tuple(RULES),
+                      help="правило очередности заказов")
+    plan.add_argument("--days", type=int, default=14, help="число дней плана")
+    whatif = commands.add_parser("whatif", help="сравнение сценариев: правила очередности и число постов")
+    whatif.add_argument("--rules", help="правила через запятую (по умолчанию все: %s)" % ", ".join(RULES))
+    whatif.add_argument("--variant", action="append", default=[], metavar="МОНТАЖНЫХ+ИНЖЕНЕРНЫХ",
+                        help="вариант числа постов, например 30+12; можно повторять")
+    whatif.add_argument("--workers", type=int, help="процессов для расчёта сценариев")
+
+    serve = commands.add_parser("serve", help="общий сервер планирования над базой")
+    serve.add_argument("--db", required=True, help="база SQLite приложения")
+    serve.add_argument("--address", required=True,
+                       help="путь Unix-сокета или [хост]:порт TCP (переменная PRODUCTION_SERVER "
+                            "клиентов); без хоста — только локальные подключения. Аутентификации нет: "
+                            "сетевой адрес открывайте лишь за доверенным туннелем")
+
+    for command in (forecast, assign, balance, plan, whatif):
+        source = command.add_argument_group("источник данных (база или файлы CSV/JSON Lines)")
+        source.add_argument("--db", help="база SQLite приложения")
+        source.add_argument("--employees", help="файл сотрудников")
+        source.add_argument("--models", help="файл этапов моделей")
+        source.add_argument("--orders", help="файл заказов ('-' — стандартный ввод)")
+        source.add_argument("--progress", help="файл ежедневной выработки")
+        line = command.add_argument_group("параметры линии (по умолчанию — из базы)")
+        line.add_argument("--start", help="дата начала yyyy-MM-dd (по умолчанию — сегодня)")
+        line.add_argument("--workday-hours", type=float)
+        line.add_argument("--assembly-posts", type=int)
+        line.add_argument("--engineering-posts", type=int)
+        line.add_argument("--weekends", help="выходные дни недели через запятую (0 — понедельник)")
+        line.add_argument("--post-hours", help="ограничения часов постов в день: пост=часов через "
+                                               "запятую, например 3=6,7=4 (дополняют сохранённые в базе)")
+        line.add_argument("--chunk-size", type=int, default=10000)
+        output = command.add_argument_group("вывод")
+        output.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+        output.add_argument("--output", "-o", default="-", help="файл результата ('-' — stdout)")
+    return parser
+
+
+def _source(args, parser):
+    if args.db:
+        from .storage import SqliteStorage
+        # С журналом: изменения, которые приложение или сервер не успели
+        # записать в базу до сбоя, воспроизводятся до расчёта (и до --save)
+        return DatabaseSource(SqliteStorage(args.db, journal=True))
+    if not (args.employees and args.models and args.orders):
+        parser.error("нужна --db или файлы --employees, --models и --orders")
+    try:
+        return FileSource(args.employees, args.models, args.orders, args.progress)
+    except ValueError as error:
+        parser.error(str(error))
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        from .service import is_local, parse_address, serve
+        address = parse_address(args.address)
+        print(f"Сервер планирования: {args.address}", file=sys.stderr)
+        if not is_local(address):
+            print("Внимание: сервер без аутентификации доступен по сети", file=sys.stderr)
+        serve(args.db, address)
+        return 0
+    if getattr(args, "save", False) and not args.db:
+        parser.error("--save работает только с --db")
+    source = _source(args, parser)
+
+    posts = None
+    if args.assembly_posts is not None or args.engineering_posts is not None:
+        posts = build_posts(args.assembly_posts or 0, args.engineering_posts or 0)
+    weekends = None
+    if args.weekends is not None:
+        weekends = [int(d) for d in args.weekends.split(",") if d.strip()]
+    rules, variants = None, []
+    if args.command == "whatif":
+        if args.rules:
+            rules = [rule.strip() for rule in args.rules.split(",") if rule.strip()]
+            unknown = [rule for rule in rules if rule not in RULES]
+            if unknown:
+                parser.error("--rules: неизвестные правила " + ", ".join(unknown))
+        try:
+            variants = [tuple(int(n) for n in variant.split("+")) for variant in args.variant]
+        except ValueError:
+            variants = [()]
+        if any(len(variant) != 2 for variant in variants):
+            parser.error("--variant: ожидается МОНТАЖНЫХ+ИНЖЕНЕРНЫХ, например 30+12")
+    post_hours = None
+    if args.post_hours is not None:
+        try:
+            post_hours = {int(post): float(hours) for post, hours in
+                          (item.split("=") for item in args.post_hours.split(",") if item.strip())}
+        except ValueError:
+            parser.error("--post-hours: ожидается пост=часов через запятую")
+    planner = BatchPlanner(source, start_date=args.start, posts=posts,
+                           workday_hours=args.workday_hours, weekends=weekends,
+                           post_hours=post_hours, chunk_size=args.chunk_size)
+
+    if args.command == "forecast":
+        records, fields = planner.forecast(args.rule), FORECAST_FIELDS
+    elif args.command == "balance":
+        records, fields = planner.balance_records(args.target), BALANCE_FIELDS
+    elif args.command == "plan":
+        records, fields = planner.plan_records(args.days, args.rule), PLAN_FIELDS
+    elif args.command == "whatif":
+        records, fields = planner.whatif_records(rules, variants, args.workers), WHATIF_FIELDS
+    else:
+        plan = planner.plan_assignments(args.days)
+        if args.save:
+            source.storage.save_assignment_plan(plan)
+        records, fields = planner.assignment_records(plan), ASSIGNMENT_FIELDS
+
+    stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        if args.format == "csv":
+            count = write_csv(records, stream, fields)
+        else:
+            count = write_jsonl(records, stream)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+        if isinstance(source, DatabaseSource):
+            source.storage.close()
+    print(f"{args.command}: {count} строк", file=sys.stderr)
+    return 0
@@ -0,0 +1,15 @@
+# Справочники предметной области, общие для GUI и расчётного ядра.
+# Названия интернированы: sys.intern(название) из базы или файла импорта
+# возвращает тот же объект строки, что и константа.
+
+import sys
+
+STAGE_ASSEMBLY = sys.intern("Монтажная")
+STAGE_ENGINEERING = sys.intern("Инженерная")
+STAGE_TYPES = (STAGE_ASSEMBLY, STAGE_ENGINEERING)
+
+ROLE_ASSEMBLER = sys.intern("Монтажник")
+ROLE_ENGINEER = sys.intern("Инженер")
+ROLES = (ROLE_ASSEMBLER, ROLE_ENGINEER)
+
+DATE_FORMAT = "%Y-%m-%d"  # Формат ключей дат ("yyyy-MM-dd" в терминах Qt)
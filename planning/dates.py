@@ -0,0 +1,13 @@
+# Преобразование дат: ключи "yyyy-MM-dd", datetime и date приводятся к date
+
+from datetime import date, datetime
+
+from .constants import DATE_FORMAT
+
+
+def as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, DATE_FORMAT).date()
@@ -0,0 +1,105 @@
+# Объекты предметной области: сотрудники, модели продукции, заказы.
+#
+# Модуль не зависит ни от Qt, ни от NumPy: его импортируют и интерфейс, и
+# пакетные задачи. Классы объявлены со __slots__ (без словаря атрибутов у
+# каждого объекта), а должности и типы этапов приводятся к общим строкам
+# справочника, так что сотни тысяч объектов не хранят копии одних и тех же
+# названий. Для больших списков заказов см. planning.order_table.
+
+import itertools
+import sys
+
+from .constants import STAGE_ENGINEERING, ROLE_ENGINEER
+
+
+class Employee:
+    __slots__ = ("id", "name", "role", "assigned_post", "work_hours")
+    _ids = itertools.count(1)
+
+    def __init__(self, name, role, employee_id=None):
+        self.id = employee_id if employee_id is not None else next(Employee._ids)
+        self.name = name
+        self.role = sys.intern(role)  # "Монтажник" или "Инженер"
+        self.assigned_post = None
+        self.work_hours = 8  # По умолчанию 8 часов
+
+    def can_work_on_stage(self, stage_type):
+        if stage_type == STAGE_ENGINEERING:
+            return self.role == ROLE_ENGINEER
+        return True  # Монтажники могут работать на монтажных этапах
+
+
+class ProductionStage:
+    __slots__ = ("name", "stage_type", "time_per_unit")
+
+    def __init__(self, name, stage_type, time_per_unit):
+        self.name = name
+        self.stage_type = sys.intern(stage_type)  # "Монтажная" или "Инженерная"
+        self.time_per_unit = time_per_unit  # Время на единицу продукции в часах
+
+
+class ProductModel:
+    __slots__ = ("id", "name", "stages")
+    _ids = itertools.count(1)
+
+    def __init__(self, name, stages, model_id=None):
+        self.id = model_id if model_id is not None else next(ProductModel._ids)
+        self.name = name
+        self.stages = stages  # Список этапов ProductionStage
+
+
+class ProductionOrder:
+    __slots__ = ("id", "model", "quantity", "creation_date", "due_date", "priority",
+                 "completed_units", "progress_store", "_daily_progress", "last_progress_date",
+                 "estimated_end_date", "completion_p50", "completion_p90")
+    _ids = itertools.count(1)
+
+    def __init__(self, model, quantity, creation_date, order_id=None, progress_store=None,
+                 due_date=None, priority=1.0):
+        self.id = order_id if order_id is not None else next(ProductionOrder._ids)
+        self.model = model
+        self.quantity = quantity
+        self.creation_date = creation_date
+        self.due_date = due_date  # Срок сдачи (date) или None
+        self.priority = priority  # Вес заказа для правил очередности
+        self.completed_units = 0
+        # Выработка хранится в общем ProgressStore, если он задан, иначе в своем словаре
+        self.progress_store = progress_store
+        self._daily_progress = {} if progress_store is None else None  # Дата: единиц
+        self.last_progress_date = None  # Последняя дата с выработкой
+        self.estimated_end_date = None
+        self.completion_p50 = None  # Интервал сроков по моделированию Монте-Карло
+        self.completion_p90 = None
+
+    @property
+    def daily_progress(self):
+        if self.progress_store is not None:
+            return self.progress_store.order_progress(self.id)
+        return self._daily_progress
+
+    def calculate_estimated_end_date(self, engine=None, staffing=None, start_date=None):
+        # Прогноз для одного заказа без учёта очереди; все заказы сразу
+        # пересчитывает ForecastEngine.forecast
+        if engine is None:
+            return self.estimated_end_date
+        self.estimated_end_date = engine.forecast([self], staffing or {}, start_date)[0]
+        return self.estimated_end_date
+
+    def add_daily_progress(self, date, units):
+        # Повторный ввод за ту же дату заменяет запись, а не добавляется к ней.
+        # Возвращает изменение выработки заказа
+        if self.progress_store is not None:
+            delta = self.progress_store.upsert(self.id, date, units)
+        else:
+            delta = units - self._daily_progress.get(date, 0)
+            self._daily_progress[date] = units
+        self.completed_units += delta
+        if self.last_progress_date is None or date > self.last_progress_date:
+            self.last_progress_date = date
+        return delta
+
+
+def continue_ids(cls, objects, ids=None):
+    # Новые объекты получают id после загруженных из базы или из итератора ids
+    # (id, которые клиентам общего сервера планирования выдаёт сервер)
+    cls._ids = ids if ids is not None else itertools.count(max((o.id for o in objects), default=0) + 1)
@@ -0,0 +1,71 @@
+# Шина изменений предметной области.
+#
+# Код, меняющий данные, публикует события (сотрудник добавлен, выработка
+# заказа обновлена, назначение изменено...), а представления подписываются
+# на нужные им виды событий и обновляют только затронутое. События
+# накапливаются и доставляются пакетом: обработчик вызывается один раз за
+# проход цикла событий, сколько бы правок ни было сделано.
+
+from collections import namedtuple
+
+from .trace import TRACER
+
+# Виды событий и их данные (payload)
+EMPLOYEES_ADDED = "employees_added"  # список сотрудников
+EMPLOYEES_REMOVED = "employees_removed"  # список сотрудников
+MODELS_ADDED = "models_added"  # список моделей
+ORDERS_ADDED = "orders_added"  # список заказов
+ORDER_PROGRESS = "order_progress"  # список заказов с новой выработкой
+ASSIGNMENTS_CHANGED = "assignments_changed"  # (первая, последняя дата) изменённых назначений
+POSTS_CHANGED = "posts_changed"  # None — изменился состав постов
+CALENDAR_CHANGED = "calendar_changed"  # (первая, последняя дата) или None — весь календарь
+
+Change = namedtuple("Change", "kind payload")
+
+
+class ChangeBus:
+    def __init__(self, schedule=None):
+        # schedule(flush) откладывает доставку до следующего прохода цикла
+        # событий; без него события доставляются сразу при публикации
+        self._schedule = schedule
+        self._subscribers = []  # (виды событий, обработчик) в порядке подписки
+        self._pending = []
+        self._scheduled = False
+
+    def subscribe(self, kinds, handler):
+        """handler(changes) получает список Change подписанных видов в порядке публикации.
+
+        Обработчики вызываются в порядке подписки: производные данные
+        (например, мощность постов) подписываются раньше представлений.
+        """
+        if isinstance(kinds, str):
+            kinds = (kinds,)
+        self._subscribers.append((frozenset(kinds), handler))
+
+    def unsubscribe(self, handler):
+        self._subscribers = [(kinds, h) for kinds, h in self._subscribers if h != handler]
+
+    def publish(self, kind, payload=None):
+        self._pending.append(Change(kind, payload))
+        if self._scheduled:
+            return
+        if self._schedule is None:
+            self.flush()
+        else:
+            self._scheduled = True
+            self._schedule(self.flush)
+
+    def flush(self):
+        # События, опубликованные обработчиками, доставляются в том же проходе
+        self._scheduled = True
+        try:
+            while self._pending:
+                pending, self._pending = self._pending, []
+                for kinds, handler in list(self._subscribers):
+                    changes = [change for change in pending if change.kind in kinds]
+                    if changes:
+                        with TRACER.span(getattr(handler, "__qualname__", "change handler"),
+                                         changes=len(changes)):
+                            handler(changes)
+        finally:
+            self._scheduled = False
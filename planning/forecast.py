@@ -0,0 +1,138 @@
+# Пакетный прогноз дат завершения заказов.
+#
+# Все открытые заказы обрабатываются одним векторным проходом NumPy:
+# трудоёмкость заказов накапливается по типам этапов (заказы выполняются
+# в порядке очереди), а дата завершения находится бинарным поиском по
+# накопленной мощности постов соответствующего типа.
+
+import math
+from datetime import date, timedelta
+
+import numpy as np
+
+from .constants import STAGE_TYPES
+from .dates import as_date
+from .order_table import order_columns, order_models
+
+
+def remaining_units(orders):
+    quantity, completed = order_columns(list(orders), "quantity", "completed_units")
+    return np.maximum(quantity - completed, 0).astype(float)
+
+
+def finish_days(remaining, unit_work, cumulative_capacity, tail, offset=None):
+    """Индексы дней завершения заказов, выполняемых в порядке массивов (inf — нет мощности).
+
+    remaining — оставшиеся единицы, unit_work — [заказы × типы] часов на единицу,
+    cumulative_capacity — [дни × типы] накопленная мощность, tail — мощность в день
+    после окна, offset — трудоёмкость по типам, стоящая в очереди перед этими
+    заказами (для обработки очереди пакетами).
+    """
+    cumulative_work = np.cumsum(remaining[:, None] * unit_work, axis=0)
+    if offset is not None:
+        cumulative_work += offset
+    total = cumulative_capacity[-1]
+    last_day = len(cumulative_capacity) - 1
+
+    finish = np.zeros(len(remaining))
+    for col in range(unit_work.shape[1]):
+        work = cumulative_work[:, col] - 1e-9
+        inside = work <= total[col]
+        day = np.searchsorted(cumulative_capacity[:, col], work, side="left").astype(float)
+        if tail[col] > 0:
+            beyond = last_day + np.ceil((work - total[col]) / tail[col])
+        else:
+            beyond = np.full(len(remaining), np.inf)
+        day = np.where(inside, day, beyond)
+        # Тип этапа, не требующийся заказу, не ограничивает дату
+        day[unit_work[:, col] * remaining == 0] = 0
+        finish = np.maximum(finish, day)
+    return finish
+
+
+class ForecastEngine:
+    """Headless-прогноз дат завершения для списка заказов.
+
+    Мощность задаётся словарём {дата: {тип этапа: часов}}. Для дней без явной
+    записи действует последняя известная расстановка (перенос вперёд), после
+    последней записи она считается постоянной.
+    """
+
+    def __init__(self, stage_types=STAGE_TYPES):
+        self.stage_types = tuple(stage_types)
+        self._type_index = {t: i for i, t in enumerate(self.stage_types)}
+
+    def model_work(self, model):
+        # Трудоёмкость одной единицы продукции по типам этапов, часы
+        work = np.zeros(len(self.stage_types))
+        for stage in model.stages:
+            work[self._type_index[stage.stage_type]] += stage.time_per_unit
+        return work
+
+    def unit_work_matrix(self, orders):
+        # Матрица [заказы × типы]: модель каждого заказа считается один раз, строки
+        # собираются индексированием по номеру модели (без vstack из тысяч массивов)
+        models, index = order_models(orders)
+        if not models:
+            return np.zeros((0, len(self.stage_types)))
+        return np.array([self.model_work(model) for model in models])[index]
+
+    def capacity_window(self, staffing, start_date):
+        """Возвращает (накопленная мощность [дни × типы], мощность после окна).
+
+        staffing — словарь {дата: {тип этапа: часов}} или объект с методом
+        window(start_date), например CapacityTimeline с готовыми префиксными суммами.
+        """
+        if hasattr(staffing, "window"):
+            return staffing.window(start_date)
+        n_types = len(self.stage_types)
+        if not staffing:
+            return np.zeros((1, n_types)), np.zeros(n_types)
+
+        days = sorted(staffing)
+        ordinals = np.fromiter((d.toordinal() for d in days), dtype=np.int64, count=len(days))
+        hours = np.zeros((len(days), n_types))
+        for row, day in enumerate(days):
+            for stage_type, value in staffing[day].items():
+                col = self._type_index.get(stage_type)
+                if col is not None:
+                    hours[row, col] += value
+
+        start = start_date.toordinal()
+        length = max(int(ordinals[-1]) - start + 1, 1)
+        window = np.arange(start, start + length)
+        # Индекс последней записи не позже дня (перенос расстановки вперёд)
+        source = np.searchsorted(ordinals, window, side="right") - 1
+        daily = np.where(source[:, None] >= 0, hours[np.maximum(source, 0)], 0.0)
+        return np.cumsum(daily, axis=0), daily[-1]
+
+    def forecast(self, orders, staffing, start_date=None, efficiency=None):
+        """Даты завершения для orders в порядке очереди (None — нет мощности).
+
+        efficiency — отдача постов по типам этапов (ThroughputEstimator.efficiency):
+        нормативная трудоёмкость делится на неё. Без него действует норматив.
+        """
+        if start_date is None:
+            start_date = date.today()
+        start_date = as_date(start_date)
+        orders = list(orders)
+        if not orders:
+            return []
+
+        remaining = remaining_units(orders)
+        unit_work = self.unit_work_matrix(orders)
+        if efficiency is not None:
+            unit_work = unit_work / efficiency
+        cumulative_capacity, tail = self.capacity_window(staffing, start_date)
+        finish = finish_days(remaining, unit_work, cumulative_capacity, tail)
+
+        results = []
+        for order, left, day in zip(orders, remaining.tolist(), finish.tolist()):
+            if left == 0:
+                done = order.last_progress_date
+                results.append(as_date(done) if done else start_date)
+            elif math.isinf(day):
+                results.append(None)
+            else:
+                results.append(start_date + timedelta(days=int(day)))
+        return results
@@ -0,0 +1,438 @@
+# Массовый импорт сотрудников, моделей, заказов и выработки из CSV/XLSX.
+#
+# Файл читается пакетами строк и разбирается в колонки; проверки (должности,
+# типы этапов, существующие модели и заказы, числа и даты, срок не раньше
+# создания) выполняются над пакетом целиком, а повторы выработки заказа за
+# один день ищутся по всему файлу. Разбор не трогает данные приложения и может идти в фоновом
+# потоке, а применение результата — одна транзакция и одно обновление
+# представлений. Выработка разбирается в массивы NumPy без объектов на строку.
+
+import csv
+import json
+from datetime import date, datetime
+
+import numpy as np
+
+from .constants import ROLES, STAGE_TYPES
+from .progress import EPOCH_ORDINAL
+
+KINDS = {
+    "employees": "Сотрудники",
+    "models": "Модели продукции",
+    "orders": "Заказы",
+    "progress": "Ежедневная выработка",
+}
+
+# Заголовки колонок: английские ключи (как в FileSource) и русские варианты
+COLUMNS = {
+    "employees": {"name": ("name", "имя"), "role": ("role", "должность"),
+                  "work_hours": ("work_hours", "часов в день", "часы")},
+    "models": {"model": ("model", "модель"), "stage": ("stage", "этап"),
+               "stage_type": ("stage_type", "тип этапа", "тип"),
+               "time_per_unit": ("time_per_unit", "время на единицу", "время")},
+    "orders": {"model": ("model", "модель"), "model_id": ("model_id",),
+               "quantity": ("quantity", "количество"),
+               "creation_date": ("creation_date", "создан"),
+               "due_date": ("due_date", "срок"), "priority": ("priority", "приоритет")},
+    "progress": {"order_id": ("order_id", "заказ"), "day": ("day", "дата"),
+                 "units": ("units", "единиц", "выработка")},
+}
+REQUIRED = {
+    "employees": ("name", "role"),
+    "models": ("model", "stage_type", "time_per_unit"),
+    "orders": ("quantity",),
+    "progress": ("order_id", "day", "units"),
+}
+
+CHUNK_SIZE = 100000
+MAX_ERRORS = 20  # Сколько ошибок показывать пользователю
+
+
+class ImportValidationError(ValueError):
+    def __init__(self, errors):
+        # [(номер строки файла, сообщение)] в порядке строк
+        self.errors = sorted(errors, key=lambda error: error[0])
+        lines = [f"строка {row}: {message}" if row else message
+                 for row, message in self.errors[:MAX_ERRORS]]
+        if len(errors) > MAX_ERRORS:
+            lines.append(f"... и ещё {len(errors) - MAX_ERRORS}")
+        super().__init__("\n".join(lines))
+
+
+# --- Чтение файлов ---
+
+def _read_csv(path, chunk_size):
+    with open(path, newline="", encoding="utf-8-sig") as stream:
+        sample = stream.read(4096)
+        stream.seek(0)
+        # Excel в русской локали сохраняет CSV через точку с запятой
+        delimiter = ";" if sample.count(";") > sample.count(",") else ","
+        reader = csv.reader(stream, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        chunk = []
+        for row in reader:
+            if row:
+                chunk.append(row)
+                if len(chunk) == chunk_size:
+                    yield header, chunk
+                    chunk = []
+        if chunk:
+            yield header, chunk
+
+
+def _read_jsonl(path, chunk_size):
+    with open(path, encoding="utf-8") as stream:
+        header = None
+        chunk = []
+        for line in stream:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if header is None:
+                header = list(record)
+            chunk.append([record.get(key) for key in header])
+            if len(chunk) == chunk_size:
+                yield header, chunk
+                chunk = []
+        if chunk:
+            yield header, chunk
+
+
+def _read_xlsx(path, chunk_size):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:  # openpyxl нужен только для XLSX
+        raise ValueError("Для импорта XLSX установите пакет openpyxl") from None
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = ["" if cell is None else str(cell) for cell in header]
+        chunk = []
+        for row in rows:
+            if any(cell is not None for cell in row):
+                chunk.append(list(row))
+                if len(chunk) == chunk_size:
+                    yield header, chunk
+                    chunk = []
+        if chunk:
+            yield header, chunk
+    finally:
+        workbook.close()
+
+
+def read_table(path, chunk_size=CHUNK_SIZE):
+    """Пакеты (заголовок, [строки]) из CSV, JSON Lines или XLSX."""
+    name = str(path).lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        return _read_xlsx(path, chunk_size)
+    if name.endswith((".jsonl", ".ndjson")):
+        return _read_jsonl(path, chunk_size)
+    return _read_csv(path, chunk_size)
+
+
+def _column_map(kind, header):
+    # Ключ колонки -> номер колонки в файле
+    normalized = [str(h).strip().lower() for h in header]
+    columns = {}
+    for key, aliases in COLUMNS[kind].items():
+        for alias in aliases:
+            if alias in normalized:
+                columns[key] = normalized.index(alias)
+                break
+    missing = [key for key in REQUIRED[kind] if key not in columns]
+    if kind == "orders" and "model" not in columns and "model_id" not in columns:
+        missing.append("model")
+    if missing:
+        raise ImportValidationError([(1, "нет колонок: " + ", ".join(missing))])
+    return columns
+
+
+def _cell(row, index):
+    # Короткая строка CSV равнозначна пустым ячейкам в конце
+    return row[index] if index is not None and index < len(row) else None
+
+
+def _column(rows, index):
+    if index is None:
+        return [None] * len(rows)
+    try:
+        return [row[index] for row in rows]
+    except IndexError:
+        return [_cell(row, index) for row in rows]
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _text(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    return "" if value is None else str(value).strip()
+
+
+def _number(value, cast):
+    if isinstance(value, str):
+        value = value.strip().replace(",", ".")
+    return cast(value)
+
+
+# --- Результат разбора ---
+
+class ImportBatch:
+    """Проверенные данные одного файла; применяется приложением целиком."""
+
+    def __init__(self, kind, rows):
+        self.kind = kind
+        self.rows = rows  # employees/models/orders: список кортежей
+        self.order_ids = None  # progress: колонки NumPy
+        self.ordinals = None
+        self.units = None
+
+    def __len__(self):
+        return len(self.units) if self.kind == "progress" else len(self.rows)
+
+    def touched_orders(self):
+        # Отсортированные id заказов с импортированной выработкой
+        return np.unique(self.order_ids)
+
+    def progress_rows(self):
+        # Итератор (id заказа, "yyyy-MM-dd", единиц) для записи в базу
+        days = np.datetime_as_string((self.ordinals - EPOCH_ORDINAL).astype("datetime64[D]"))
+        return zip(self.order_ids.tolist(), days.tolist(), self.units.tolist())
+
+
+class ImportContext:
+    """Снимок справочников приложения для проверки ссылок при разборе."""
+
+    def __init__(self, model_names=(), model_ids=(), order_ids=()):
+        self.model_names = set(model_names)
+        self.model_ids = set(model_ids)
+        self.order_ids = np.unique(np.fromiter(order_ids, dtype=np.int64))
+
+
+class BulkImporter:
+    def __init__(self, context, chunk_size=CHUNK_SIZE):
+        self.context = context
+        self.chunk_size = chunk_size
+
+    def parse(self, kind, path, on_progress=None):
+        """Разбирает файл; on_progress(строк обработано). Ошибки — ImportValidationError."""
+        if kind not in KINDS:
+            raise ValueError(f"Неизвестный вид импорта: {kind}")
+        parse_chunk = getattr(self, f"_parse_{kind}")
+        errors = []
+        parts = []
+        done = 0
+        columns = None
+        for header, rows in read_table(path, self.chunk_size):
+            if columns is None:
+                columns = _column_map(kind, header)
+            # Номер строки файла: заголовок — строка 1
+            parts.append(parse_chunk(rows, columns, done + 2, errors))
+            done += len(rows)
+            if on_progress is not None:
+                on_progress(done)
+        if kind == "progress":
+            self._check_progress_repeats(parts, errors)
+        if errors:
+            raise ImportValidationError(errors)
+        return self._combine(kind, parts)
+
+    def _combine(self, kind, parts):
+        if kind != "progress":
+            batch = ImportBatch(kind, [row for part in parts for row in part])
+            if kind == "models":
+                self._check_model_names(batch)
+            return batch
+        batch = ImportBatch(kind, None)
+        if parts:
+            batch.order_ids, batch.ordinals, batch.units, _lines = (
+                np.concatenate(column) for column in zip(*parts))
+        else:
+            batch.order_ids = batch.ordinals = batch.units = np.zeros(0, dtype=np.int64)
+        return batch
+
+    def _check_progress_repeats(self, parts, errors):
+        # Пара (заказ, день) встречается в файле один раз: повтор — ошибка
+        # выгрузки, и молча оставлять одну из строк нельзя
+        if not parts:
+            return
+        order_ids, ordinals, _units, lines = (np.concatenate(column) for column in zip(*parts))
+        _keys, first, inverse = np.unique((order_ids << 32) | ordinals, return_index=True,
+                                          return_inverse=True)
+        first = first[inverse.reshape(-1)]
+        repeated = np.flatnonzero(first != np.arange(len(first)))
+        for i in repeated[:MAX_ERRORS].tolist():
+            day = date.fromordinal(int(ordinals[i])).isoformat()
+            errors.append((int(lines[i]), f"повтор выработки заказа {order_ids[i]} за {day} "
+                                          f"(впервые в строке {lines[first[i]]})"))
+        if len(repeated) > MAX_ERRORS:
+            errors.append((int(lines[repeated[MAX_ERRORS]]), "и другие повторы"))
+
+    def _check_model_names(self, batch):
+        duplicates = sorted({name for name, *_ in batch.rows} & self.context.model_names)
+        if duplicates:
+            raise ImportValidationError([(0, "модель уже существует: " + ", ".join(duplicates))])
+
+    # --- Разбор пакетов по видам ---
+
+    def _parse_employees(self, rows, columns, first_line, errors):
+        parsed = []
+        names = _column(rows, columns["name"])
+        roles = _column(rows, columns["role"])
+        hours = _column(rows, columns.get("work_hours"))
+        for i, (name, role, work_hours) in enumerate(zip(names, roles, hours)):
+            line = first_line + i
+            name, role = _text(name), _text(role)
+            if not name:
+                errors.append((line, "не указано имя"))
+                continue
+            if role not in ROLES:
+                errors.append((line, f"неизвестная должность «{role}»"))
+                continue
+            try:
+                work_hours = 8.0 if _blank(work_hours) else _number(work_hours, float)
+            except ValueError:
+                errors.append((line, f"часы — не число: {work_hours}"))
+                continue
+            if not 0 < work_hours <= 24:
+                errors.append((line, f"часы вне диапазона 0..24: {work_hours}"))
+                continue
+            parsed.append((name, role, work_hours))
+        return parsed
+
+    def _parse_models(self, rows, columns, first_line, errors):
+        # Строка на этап: (модель, этап, тип этапа, часов на единицу)
+        parsed = []
+        for i, row in enumerate(rows):
+            line = first_line + i
+            model = _text(_cell(row, columns["model"]))
+            stage = _text(_cell(row, columns.get("stage")))
+            stage_type = _text(_cell(row, columns["stage_type"]))
+            if not model:
+                errors.append((line, "не указана модель"))
+                continue
+            if stage_type not in STAGE_TYPES:
+                errors.append((line, f"неизвестный тип этапа «{stage_type}»"))
+                continue
+            try:
+                time_per_unit = _number(_cell(row, columns["time_per_unit"]), float)
+            except (TypeError, ValueError):
+                errors.append((line, "время на единицу — не число"))
+                continue
+            if time_per_unit <= 0:
+                errors.append((line, "время на единицу должно быть больше нуля"))
+                continue
+            parsed.append((model, stage or stage_type, stage_type, time_per_unit))
+        return parsed
+
+    def _parse_orders(self, rows, columns, first_line, errors):
+        # (модель — имя или id, количество, создан, срок, приоритет)
+        parsed = []
+        models = _column(rows, columns.get("model"))
+        model_ids = _column(rows, columns.get("model_id"))
+        quantities = _column(rows, columns["quantity"])
+        created = _column(rows, columns.get("creation_date"))
+        due = _column(rows, columns.get("due_date"))
+        priorities = _column(rows, columns.get("priority"))
+        for i in range(len(rows)):
+            line = first_line + i
+            try:
+                if not _blank(model_ids[i]):
+                    model = _number(model_ids[i], int)
+                    if model not in self.context.model_ids:
+                        raise LookupError(f"нет модели с id {model}")
+                else:
+                    model = _text(models[i])
+                    if model not in self.context.model_names:
+                        raise LookupError(f"нет модели «{model}»")
+                quantity = _number(quantities[i], int)
+                if quantity <= 0:
+                    raise LookupError("количество должно быть больше нуля")
+                creation = None if _blank(created[i]) else _parse_datetime(created[i])
+                due_date = None if _blank(due[i]) else _parse_datetime(due[i]).date()
+                if creation is not None and due_date is not None and due_date < creation.date():
+                    raise LookupError(f"срок сдачи {due_date:%Y-%m-%d} раньше даты создания "
+                                      f"{creation:%Y-%m-%d}")
+                priority = 1.0 if _blank(priorities[i]) else _number(priorities[i], float)
+                if priority <= 0:
+                    raise LookupError("приоритет должен быть больше нуля")
+            except LookupError as error:
+                errors.append((line, str(error)))
+                continue
+            except (TypeError, ValueError):
+                errors.append((line, "неверное число или дата"))
+                continue
+            parsed.append((model, quantity, creation, due_date, priority))
+        return parsed
+
+    def _parse_progress(self, rows, columns, first_line, errors):
+        # Быстрый путь — векторное преобразование колонок; при ошибке ищем строки
+        order_ids = _column(rows, columns["order_id"])
+        days = _column(rows, columns["day"])
+        units = _column(rows, columns["units"])
+        try:
+            order_ids = np.array(order_ids, dtype=np.int64)
+            ordinals = _ordinals(days)
+            units = np.array(units, dtype=np.int64)
+        except (TypeError, ValueError):
+            return self._parse_progress_rows(order_ids, days, units, first_line, errors)
+        return self._check_progress(order_ids, ordinals, units, first_line, errors)
+
+    def _parse_progress_rows(self, order_ids, days, units, first_line, errors):
+        good = []
+        for i, row in enumerate(zip(order_ids, days, units)):
+            try:
+                order_id, ordinal, count = int(row[0]), int(_ordinals([row[1]])[0]), int(row[2])
+            except (TypeError, ValueError):
+                errors.append((first_line + i, "неверный номер заказа, дата или число"))
+                continue
+            good.append((i, order_id, ordinal, count))
+        lines = np.array([first_line + g[0] for g in good], dtype=np.int64)
+        columns = [np.array([g[k] for g in good], dtype=np.int64) for k in (1, 2, 3)]
+        return self._check_progress(*columns, lines, errors)
+
+    def _check_progress(self, order_ids, ordinals, units, lines, errors):
+        # lines — номер первой строки пакета или массив номеров строк; номера
+        # строк возвращаются вместе с колонками для проверки повторов по файлу
+        if np.isscalar(lines):
+            lines = np.arange(lines, lines + len(units))
+        unknown = ~np.isin(order_ids, self.context.order_ids)
+        negative = units < 0
+        for line, order_id in zip(lines[unknown][:MAX_ERRORS].tolist(),
+                                  order_ids[unknown][:MAX_ERRORS].tolist()):
+            errors.append((line, f"нет заказа {order_id}"))
+        if unknown.sum() > MAX_ERRORS:
+            errors.append((int(lines[unknown][MAX_ERRORS]), "и другие неизвестные заказы"))
+        for line in lines[negative][:MAX_ERRORS].tolist():
+            errors.append((line, "отрицательная выработка"))
+        valid = ~(unknown | negative)
+        return order_ids[valid], ordinals[valid], units[valid], lines[valid]
+
+
+def _ordinals(days):
+    # Даты "yyyy-MM-dd", date или datetime -> порядковые номера дней
+    values = np.array(days, dtype="datetime64[D]")
+    if np.isnat(values).any():
+        raise ValueError("пустая дата")
+    return values.astype(np.int64) + EPOCH_ORDINAL
+
+
+def _parse_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    text = _text(value)
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    raise ValueError(text)
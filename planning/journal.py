@@ -0,0 +1,203 @@
+# Журнал изменений, дописываемый в конец файла (write-ahead log).
+#
+# Каждое изменение базы (сотрудник добавлен, заказ создан, выработка
+# записана, назначение изменено...) попадает в журнал раньше, чем в SQLite:
+# запись — строка "crc32 JSON" с номером, видом события и операциями. Файл
+# пишет отдельный поток: всё, что накопилось за время предыдущего fsync,
+# записывается и синхронизируется одним вызовом (групповая фиксация), так что
+# вызывающий код не ждёт диска.
+#
+# Окно надёжности: append возвращает номер записи до fsync, и запись,
+# принятая за последние миллисекунды перед отключением питания, может
+# пропасть. Кому нужно подтверждение только после записи на диск, вызывает
+# append(..., sync=True) или wait(seq) — ожидание не мешает групповой
+# фиксации записей других потоков.
+#
+# Снимком служит сама база: SqliteStorage хранит номер последней записи
+# журнала, вошедшей в базу, и после контрольной точки WAL обрезает журнал до
+# этого номера (compact). При запуске воспроизводится только хвост журнала —
+# записи, которые не успели попасть в базу. Оборванная при сбое последняя
+# строка распознаётся по контрольной сумме и отбрасывается.
+
+import json
+import os
+import queue
+import threading
+import zlib
+
+
+def _encode(seq, kind, operations):
+    body = json.dumps([seq, kind, operations], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(body), body)
+
+
+def _decode(line):
+    # (номер, текст JSON) или None для повреждённой строки. Сам JSON разбирается
+    # только для воспроизводимых записей: уже записанные в базу лишь пропускаются
+    try:
+        checksum, body = line.split(b" ", 1)
+        if not body.endswith(b"\n") or int(checksum, 16) != zlib.crc32(body[:-1]):
+            return None
+        return int(body[1:body.index(b",")]), body
+    except ValueError:
+        return None
+
+
+def _read(path):
+    # ([(номер, текст JSON)] до первой повреждённой строки, длина неповреждённой части)
+    records, valid_end = [], 0
+    if not os.path.exists(path):
+        return records, valid_end
+    with open(path, "rb") as stream:
+        for line in stream:
+            record = _decode(line)
+            if record is None:
+                break
+            records.append(record)
+            valid_end += len(line)
+    return records, valid_end
+
+
+def _fsync_directory(path):
+    # Переименование файла надёжно только после синхронизации каталога (POSIX)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class Journal:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._error = None
+        records, valid_end = _read(path)
+        self._loaded = records  # Записи при открытии — для воспроизведения хвоста
+        # Номер последней записи (в файле или выданной append)
+        self.last_seq = records[-1][0] if records else 0
+        self.synced_seq = self.last_seq  # Номер последней записи, синхронизированной с диском
+        self._synced = threading.Condition()
+        # Оборванный хвост отрезается, чтобы новые записи не шли после мусора
+        if os.path.exists(path) and os.path.getsize(path) > valid_end:
+            with open(path, "r+b") as stream:
+                stream.truncate(valid_end)
+        self._file = open(path, "ab")
+        self.size = self._file.tell()
+        self._writer = threading.Thread(target=self._write_loop, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    def records(self, after=0):
+        """Записи (номер, вид, операции) с номером больше after, до первой повреждённой."""
+        loaded, self._loaded = self._loaded, None
+        if loaded is None:
+            loaded = _read(self.path)[0]
+        return [tuple(json.loads(body)) for seq, body in loaded if seq > after]
+
+    def start_after(self, seq):
+        # Номера продолжаются после seq, даже если журнал уже обрезан до него
+        with self._lock:
+            self.last_seq = max(self.last_seq, seq)
+        with self._synced:
+            self.synced_seq = max(self.synced_seq, seq)
+
+    # --- Запись ---
+
+    def append(self, kind, operations, sync=False):
+        """Ставит запись в очередь на диск и возвращает её номер.
+
+        Без sync не ждёт fsync; с sync=True возвращает номер, когда запись
+        уже на диске.
+        """
+        with self._lock:
+            self.last_seq += 1
+            seq = self.last_seq
+            self._queue.put((seq, kind, operations))
+        if sync:
+            self.wait(seq)
+        return seq
+
+    def wait(self, seq):
+        # Дожидается синхронизации с диском записи seq
+        with self._synced:
+            while self.synced_seq < seq and self._error is None:
+                self._synced.wait()
+            if self._error is not None:
+                raise self._error
+
+    def compact(self, upto):
+        # Записи с номером <= upto уже надёжно сохранены в базе и больше не нужны
+        self._queue.put(("compact", upto))
+
+    def _write_loop(self):
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            waiters = []
+            stop = False
+            written = None
+            try:
+                for item in items:
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif item[0] == "compact":
+                        self._sync()
+                        self._compact(item[1])
+                    else:
+                        chunk = _encode(*item)
+                        self._file.write(chunk)
+                        self.size += len(chunk)
+                        written = item[0]
+                self._sync()
+            except (OSError, TypeError, ValueError) as error:
+                self._error = error
+                written = None
+            with self._synced:
+                if written is not None:
+                    self.synced_seq = written
+                self._synced.notify_all()
+            for event in waiters:
+                event.set()
+            if stop:
+                self._file.close()
+                return
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _compact(self, upto):
+        self._file.close()
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as stream:
+            for seq, body in _read(self.path)[0]:
+                if seq > upto:
+                    stream.write(b"%08x %s" % (zlib.crc32(body[:-1]), body))
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temporary, self.path)
+        _fsync_directory(self.path)
+        self._file = open(self.path, "ab")
+        self.size = self._file.tell()
+
+    def flush(self):
+        # Дожидается записи на диск всех поставленных в очередь записей
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
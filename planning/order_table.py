@@ -0,0 +1,301 @@
+# Колоночная таблица заказов.
+#
+# Поля всех заказов лежат в общих типизированных массивах (id, номер модели,
+# количество, даты — порядковыми номерами дней, 0 — «нет даты»), а список
+# приложения хранит лишь лёгкие записи OrderRecord (таблица и номер строки) с
+# теми же атрибутами и методами, что у ProductionOrder. Пакетные расчёты
+# (прогноз, очередность, графики) читают колонки целиком через NumPy, без
+# обхода объектов.
+#
+# Массивы при росте заменяются новыми, а не расширяются на месте: задачи в
+# пуле потоков, читающие записи или колонки, не мешают добавлению заказов.
+
+from array import array
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from .constants import DATE_FORMAT
+from .dates import as_date
+from .domain import ProductionOrder
+from .progress import EPOCH_ORDINAL
+
+_EPOCH = datetime(1970, 1, 1)
+_NAT = np.iinfo(np.int64).min  # NaT в представлении datetime64 целым числом
+
+# Колонка -> код типа array; даты хранятся порядковыми номерами дней
+_COLUMNS = {
+    "_ids": "q",
+    "_models": "i",  # Номер модели в OrderTable.models
+    "_quantity": "q",
+    "_created": "q",  # Микросекунды от 1970-01-01
+    "_due": "i",
+    "_priority": "d",
+    "_completed": "q",
+    "_last_progress": "i",
+    "_estimated_end": "i",
+    "_p50": "i",
+    "_p90": "i",
+}
+_DAY_COLUMNS = {"_due", "_last_progress", "_estimated_end", "_p50", "_p90"}
+
+# Атрибут заказа -> колонка, из которой его можно взять пакетом
+_ATTRIBUTE_COLUMNS = {
+    "id": "_ids",
+    "quantity": "_quantity",
+    "creation_date": "_created",
+    "due_date": "_due",
+    "priority": "_priority",
+    "completed_units": "_completed",
+    "estimated_end_date": "_estimated_end",
+    "completion_p50": "_p50",
+    "completion_p90": "_p90",
+}
+_DTYPES = {"q": np.int64, "i": np.int32, "d": np.float64}
+
+
+def _empty(typecode, count):
+    return array(typecode, bytes(array(typecode).itemsize * count))
+
+
+class OrderTable:
+    def __init__(self, progress_store=None, capacity=1024):
+        # Выработка записей хранится в общем ProgressStore, если он задан
+        self.progress_store = progress_store
+        self.models = []  # Модели по номеру из колонки _models
+        self._model_codes = {}  # id(модель) -> номер
+        self._daily = {}  # Строка -> {дата: единиц}, если progress_store не задан
+        self._size = 0
+        for name, typecode in _COLUMNS.items():
+            setattr(self, name, _empty(typecode, capacity))
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, needed):
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, typecode in _COLUMNS.items():
+            column = getattr(self, name)
+            grown = array(typecode, column)
+            grown.extend(_empty(typecode, capacity - len(column)))
+            setattr(self, name, grown)
+
+    def _model_code(self, model):
+        code = self._model_codes.get(id(model))
+        if code is None:
+            code = self._model_codes[id(model)] = len(self.models)
+            self.models.append(model)
+        return code
+
+    def append(self, model, quantity, creation_date, order_id=None, due_date=None, priority=1.0):
+        """Новый заказ; аргументы как у ProductionOrder. Возвращает OrderRecord."""
+        self._grow(self._size + 1)
+        row = self._size
+        self._ids[row] = order_id if order_id is not None else next(ProductionOrder._ids)
+        self._models[row] = self._model_code(model)
+        self._quantity[row] = quantity
+        self._created[row] = _micros(creation_date)
+        self._due[row] = _ordinal(due_date)
+        self._priority[row] = priority
+        self._size += 1
+        return OrderRecord(self, row)
+
+    def _array(self, name):
+        column = getattr(self, name)
+        return np.frombuffer(column, dtype=_DTYPES[column.typecode])[:self._size]
+
+    def column(self, attribute, rows=None):
+        """Значения атрибута заказа (id, quantity, due_date...) по строкам rows или по всем.
+
+        Даты возвращаются как datetime64 (NaT — даты нет).
+        """
+        name = _ATTRIBUTE_COLUMNS[attribute]
+        values = self._array(name)
+        values = values.copy() if rows is None else values[rows]
+        if name == "_created":
+            return values.view("datetime64[us]")
+        if name in _DAY_COLUMNS:
+            values = values.astype(np.int64)
+            return np.where(values == 0, _NAT, values - EPOCH_ORDINAL).view("datetime64[D]")
+        return values
+
+    def model_codes(self, rows):
+        # Номера моделей (индексы в self.models) для строк rows
+        return self._array("_models")[rows]
+
+    def model_ids(self, rows):
+        # id моделей для строк rows
+        ids = np.fromiter((model.id for model in self.models), dtype=np.int64, count=len(self.models))
+        return ids[self.model_codes(rows)]
+
+    def rows_of(self, orders):
+        # Номера строк записей этой таблицы или None, если среди orders есть другие объекты
+        try:
+            rows = np.fromiter((o.row if o.table is self else -1 for o in orders),
+                               dtype=np.int64, count=len(orders))
+        except AttributeError:
+            return None
+        return None if (rows < 0).any() else rows
+
+
+def table_rows(orders):
+    """(таблица, номера строк), если все orders (список) — записи одной OrderTable, иначе (None, None)."""
+    table = getattr(orders[0], "table", None) if orders else None
+    if not isinstance(table, OrderTable):
+        return None, None
+    rows = table.rows_of(orders)
+    return (table, rows) if rows is not None else (None, None)
+
+
+def order_columns(orders, *attributes):
+    """Массивы атрибутов заказов orders (список), по одному на имя в attributes.
+
+    Для записей одной OrderTable значения берутся из её колонок, для прочих
+    объектов — обходом атрибутов. Даты — datetime64 (NaT — даты нет).
+    """
+    table, rows = table_rows(orders)
+    if table is not None:
+        return [table.column(name, rows) for name in attributes]
+    return [_gather(orders, name) for name in attributes]
+
+
+def order_models(orders):
+    """(модели, номер модели каждого заказа) для orders (список) — индексы в список моделей."""
+    table, rows = table_rows(orders)
+    if table is not None:
+        return table.models, table.model_codes(rows)
+    codes = {}
+    models = []
+    index = np.empty(len(orders), dtype=np.intp)
+    for i, order in enumerate(orders):
+        code = codes.get(id(order.model))
+        if code is None:
+            code = codes[id(order.model)] = len(models)
+            models.append(order.model)
+        index[i] = code
+    return models, index
+
+
+def open_orders(orders):
+    """Заказы из orders (список) с невыполненными единицами, в том же порядке."""
+    quantity, completed = order_columns(orders, "quantity", "completed_units")
+    return [orders[i] for i in np.flatnonzero(completed < quantity).tolist()]
+
+
+def _gather(orders, attribute):
+    name = _ATTRIBUTE_COLUMNS[attribute]
+    values = (getattr(o, attribute) for o in orders)
+    if name == "_created":
+        return np.array(list(values), dtype="datetime64[us]")
+    if name in _DAY_COLUMNS:
+        # Через порядковые номера: разбор списка date/None в datetime64 заметно медленнее
+        return np.fromiter((as_date(v).toordinal() - EPOCH_ORDINAL if v else _NAT for v in values),
+                           dtype=np.int64, count=len(orders)).view("datetime64[D]")
+    return np.fromiter(values, dtype=_DTYPES[_COLUMNS[name]], count=len(orders))
+
+
+# --- Преобразование значений колонок ---
+
+def _micros(value):
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _ordinal(value):
+    return as_date(value).toordinal() if value else 0
+
+
+_days = {}  # Порядковый номер -> (date, "yyyy-MM-dd"): различных дней немного
+
+
+def _day(ordinal):
+    day = _days.get(ordinal)
+    if day is None:
+        value = date.fromordinal(ordinal)
+        day = _days[ordinal] = (value, value.strftime(DATE_FORMAT))
+    return day
+
+
+def _day_field(column, label=False):
+    # Дата в колонке порядковых номеров; label — строкой "yyyy-MM-dd", как
+    # ProductionOrder.last_progress_date
+    # Путь чтения короткий: атрибуты записей читаются при обходе всех заказов
+    def get(record):
+        ordinal = getattr(record.table, column)[record.row]
+        if not ordinal:
+            return None
+        return (_days.get(ordinal) or _day(ordinal))[label]
+
+    def put(record, value):
+        getattr(record.table, column)[record.row] = _ordinal(value)
+
+    return property(get, put)
+
+
+class OrderRecord:
+    """Строка OrderTable с интерфейсом ProductionOrder."""
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def id(self):
+        return self.table._ids[self.row]
+
+    @property
+    def model(self):
+        return self.table.models[self.table._models[self.row]]
+
+    @property
+    def quantity(self):
+        return self.table._quantity[self.row]
+
+    @quantity.setter
+    def quantity(self, value):
+        self.table._quantity[self.row] = value
+
+    @property
+    def creation_date(self):
+        return _EPOCH + timedelta(0, 0, self.table._created[self.row])
+
+    @property
+    def priority(self):
+        return self.table._priority[self.row]
+
+    @priority.setter
+    def priority(self, value):
+        self.table._priority[self.row] = value
+
+    @property
+    def completed_units(self):
+        return self.table._completed[self.row]
+
+    @completed_units.setter
+    def completed_units(self, value):
+        self.table._completed[self.row] = value
+
+    due_date = _day_field("_due")
+    last_progress_date = _day_field("_last_progress", label=True)
+    estimated_end_date = _day_field("_estimated_end")
+    completion_p50 = _day_field("_p50")
+    completion_p90 = _day_field("_p90")
+
+    @property
+    def progress_store(self):
+        return self.table.progress_store
+
+    @property
+    def _daily_progress(self):
+        return self.table._daily.setdefault(self.row, {})
+
+    daily_progress = ProductionOrder.daily_progress
+    calculate_estimated_end_date = ProductionOrder.calculate_estimated_end_date
+    add_daily_progress = ProductionOrder.add_daily_progress
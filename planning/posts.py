@@ -0,0 +1,23 @@
+# Описание постов производственной линии
+
+from .constants import STAGE_ASSEMBLY, STAGE_ENGINEERING
+
+
+class PostDefinition:
+    def __init__(self, number, stage_type, name=None):
+        self.number = number  # Номер поста, начиная с 1
+        self.stage_type = stage_type  # "Монтажная" или "Инженерная"
+        self.name = name or f"Пост {number}"
+
+
+def build_posts(assembly_count, engineering_count):
+    # Сначала монтажные посты, затем инженерные — как в исходной расстановке
+    posts = [PostDefinition(i + 1, STAGE_ASSEMBLY) for i in range(assembly_count)]
+    posts += [PostDefinition(assembly_count + i + 1, STAGE_ENGINEERING)
+              for i in range(engineering_count)]
+    return posts
+
+
+def default_posts():
+    # Исходная конфигурация линии: 2 монтажных и 3 инженерных поста
+    return build_posts(2, 3)
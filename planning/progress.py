@@ -0,0 +1,298 @@
+# Колоночное хранилище ежедневной выработки.
+#
+# Записи всех заказов лежат в трёх общих массивах NumPy (id заказа, порядковый
+# номер дня, единиц). Запись за тот же день заказа перезаписывается (upsert),
+# а агрегаты для графиков и прогнозов считаются редукциями по массивам.
+# Строки каждого заказа проиндексированы, поэтому запрос по заказу не
+# просматривает колонки целиком.
+
+from datetime import date
+
+import numpy as np
+
+from .constants import DATE_FORMAT
+from .dates import as_date
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def to_ordinals(days):
+    # Даты ("yyyy-MM-dd", date или datetime) -> порядковые номера дней, векторно
+    days = list(days)
+    if days and all(isinstance(d, str) for d in days):
+        return np.array(days, dtype="datetime64[D]").astype(np.int64) + EPOCH_ORDINAL
+    return np.fromiter((as_date(d).toordinal() for d in days), dtype=np.int64, count=len(days))
+
+
+def _key(order_id, ordinal):
+    return (order_id << 32) | ordinal
+
+
+def _row_arrays(rows):
+    # [(id заказа, дата, единиц)] -> колонки (id заказов, дни-ordinal, единиц)
+    rows = list(rows)
+    order_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    units = np.fromiter((r[2] for r in rows), dtype=np.int64, count=len(rows))
+    return order_ids, to_ordinals([r[1] for r in rows]), units
+
+
+def rolling_mean(values, window):
+    # Скользящее среднее за window точек; в начале ряда — по имеющимся точкам
+    if not len(values):
+        return np.zeros(0)
+    sums = np.cumsum(values, dtype=float)
+    rolling = sums.copy()
+    rolling[window:] = sums[window:] - sums[:-window]
+    return rolling / np.minimum(np.arange(1, len(values) + 1), window)
+
+
+class ProgressStore:
+    def __init__(self, loader=None, capacity=1024):
+        # loader(ids заказов) -> [(id заказа, "yyyy-MM-dd", единиц)] — догрузка отложенной истории
+        self._loader = loader
+        self._deferred = set()
+        self._order_ids = np.zeros(capacity, dtype=np.int64)
+        self._days = np.zeros(capacity, dtype=np.int32)
+        self._units = np.zeros(capacity, dtype=np.int64)
+        self._size = 0
+        self._index = {}  # (id заказа << 32 | день) -> номер строки
+        self._order_rows = {}  # id заказа -> [номера строк]
+
+    def __len__(self):
+        self._ensure_all()
+        return self._size
+
+    # --- Колонки (только чтение) ---
+
+    @property
+    def order_ids(self):
+        self._ensure_all()
+        return self._order_ids[:self._size]
+
+    @property
+    def days(self):
+        self._ensure_all()
+        return self._days[:self._size]
+
+    @property
+    def units(self):
+        self._ensure_all()
+        return self._units[:self._size]
+
+    # --- Отложенная загрузка ---
+
+    def defer(self, order_ids):
+        # История этих заказов будет прочитана через loader при первом обращении
+        self._deferred.update(order_ids)
+
+    def _ensure(self, order_id):
+        if order_id in self._deferred:
+            self._deferred.discard(order_id)
+            self._load(self._loader([order_id]))
+
+    def _ensure_many(self, order_ids):
+        if self._deferred:
+            pending = self._deferred.intersection(np.asarray(order_ids).tolist())
+            if pending:
+                self._deferred -= pending
+                self._load(self._loader(sorted(pending)))
+
+    def _ensure_all(self):
+        if self._deferred:
+            order_ids, self._deferred = sorted(self._deferred), set()
+            self._load(self._loader(order_ids))
+
+    def _load(self, rows):
+        rows = list(rows)
+        if rows:
+            self.extend_arrays(*_row_arrays(rows))
+
+    # --- Изменение ---
+
+    def _grow(self, needed):
+        capacity = len(self._units)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("_order_ids", "_days", "_units"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def _upsert(self, order_id, ordinal, units):
+        key = _key(order_id, ordinal)
+        row = self._index.get(key)
+        if row is not None:
+            previous = int(self._units[row])
+            self._units[row] = units
+            return units - previous
+        self._grow(self._size + 1)
+        row = self._size
+        self._order_ids[row] = order_id
+        self._days[row] = ordinal
+        self._units[row] = units
+        self._size += 1
+        self._index[key] = row
+        self._order_rows.setdefault(order_id, []).append(row)
+        return units
+
+    def upsert(self, order_id, day, units):
+        """Записывает выработку заказа за день. Возвращает изменение суммы заказа."""
+        self._ensure(order_id)
+        return self._upsert(order_id, as_date(day).toordinal(), units)
+
+    def extend(self, rows):
+        # Массовая загрузка [(id заказа, "yyyy-MM-dd" или date, единиц)]
+        self._load(rows)
+
+    def extend_arrays(self, order_ids, ordinals, units):
+        """Пакетный upsert колонок. При повторе ключа в пакете побеждает последняя запись.
+
+        Возвращает (id заказов, дни-ordinal, изменение единиц) записанных ключей.
+        """
+        # Отложенная история затронутых заказов загружается до записи пакета
+        self._ensure_many(np.unique(order_ids))
+        keys = _key(np.asarray(order_ids, dtype=np.int64), np.asarray(ordinals, dtype=np.int64))
+        # Последнее вхождение каждого ключа внутри пакета
+        reversed_keys = keys[::-1]
+        unique_keys, first = np.unique(reversed_keys, return_index=True)
+        last = len(keys) - 1 - first
+        units = np.asarray(units, dtype=np.int64)[last]
+
+        index = self._index
+        rows = np.fromiter((index.get(k, -1) for k in unique_keys.tolist()),
+                           dtype=np.int64, count=len(unique_keys))
+        existing = rows >= 0
+        deltas = units.copy()
+        deltas[existing] -= self._units[rows[existing]]
+        self._units[rows[existing]] = units[existing]
+
+        new = ~existing
+        count = int(new.sum())
+        if count:
+            self._grow(self._size + count)
+            start, stop = self._size, self._size + count
+            new_keys = unique_keys[new]
+            self._order_ids[start:stop] = new_keys >> 32
+            self._days[start:stop] = new_keys & 0xFFFFFFFF
+            self._units[start:stop] = units[new]
+            index.update(zip(new_keys.tolist(), range(start, stop)))
+            order_rows = self._order_rows
+            for order_id, row in zip((new_keys >> 32).tolist(), range(start, stop)):
+                order_rows.setdefault(order_id, []).append(row)
+            self._size = stop
+        return unique_keys >> 32, unique_keys & 0xFFFFFFFF, deltas
+
+    # --- Запросы по заказу ---
+
+    def order_progress(self, order_id):
+        # {"yyyy-MM-dd": единиц} — представление в формате ProductionOrder.daily_progress
+        self._ensure(order_id)
+        rows = self._order_rows.get(order_id, [])
+        return {date.fromordinal(int(day)).strftime(DATE_FORMAT): int(units)
+                for day, units in zip(self._days[rows], self._units[rows])}
+
+    def order_total(self, order_id):
+        self._ensure(order_id)
+        return int(self._units[self._order_rows.get(order_id, [])].sum())
+
+    def order_summary(self, order_ids):
+        """(суммарная выработка, последний день-ordinal или 0) для отсортированных order_ids.
+
+        Загружается только отложенная история этих заказов.
+        """
+        order_ids = np.asarray(order_ids, dtype=np.int64)
+        self._ensure_many(order_ids)
+        ids = self._order_ids[:self._size]
+        mask = np.isin(ids, order_ids)
+        position = np.searchsorted(order_ids, ids[mask])
+        totals = np.bincount(position, weights=self._units[:self._size][mask],
+                             minlength=len(order_ids)).astype(np.int64)
+        last = np.zeros(len(order_ids), dtype=np.int64)
+        np.maximum.at(last, position, self._days[:self._size][mask])
+        return totals, last
+
+    # --- Агрегаты ---
+
+    def order_totals(self):
+        # (id заказов, суммарная выработка)
+        ids, inverse = np.unique(self.order_ids, return_inverse=True)
+        return ids, np.bincount(inverse, weights=self.units, minlength=len(ids)).astype(np.int64)
+
+    def daily_output(self, start=None, end=None):
+        # Выработка завода по дням непрерывного диапазона: (даты-ordinal, единиц)
+        days, units = self.days, self.units
+        if not len(days):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        first = as_date(start).toordinal() if start is not None else int(days.min())
+        last = as_date(end).toordinal() if end is not None else int(days.max())
+        if last < first:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        mask = (days >= first) & (days <= last)
+        totals = np.bincount(days[mask] - first, weights=units[mask], minlength=last - first + 1)
+        return np.arange(first, last + 1), totals.astype(np.int64)
+
+    def rolling_throughput(self, window=7, start=None, end=None):
+        # Скользящее среднее дневной выработки за window дней (по прошедшим дням)
+        ordinals, totals = self.daily_output(start, end)
+        return ordinals, rolling_mean(totals, window)
+
+    def snapshot(self):
+        # Копия колонок для агрегатов в фоновом потоке (без индексов — только агрегаты)
+        self._ensure_all()
+        return _copy_columns((self._order_ids, self._days, self._units), self._size)
+
+    def deferred_snapshot(self):
+        """Функция без аргументов, строящая snapshot в фоновом потоке.
+
+        Здесь фиксируются только колонки и список отложенных заказов; их история
+        читается через loader и копия собирается при вызове функции. Она
+        возвращает (копия, (отложенные заказы, прочитанные строки)) — вторую
+        часть затем принимает adopt в потоке владельца.
+        """
+        columns = (self._order_ids, self._days, self._units)
+        size, deferred, loader = self._size, sorted(self._deferred), self._loader
+
+        def build():
+            rows = loader(deferred) if deferred else []
+            return _copy_columns(columns, size, _row_arrays(rows)), (deferred, rows)
+        return build
+
+    def adopt(self, order_ids, rows):
+        # История, прочитанная deferred_snapshot: принимаются заказы, всё ещё
+        # отложенные (прочие загружены или изменены с тех пор)
+        pending = self._deferred.intersection(order_ids)
+        if pending:
+            self._deferred -= pending
+            self._load([row for row in rows if row[0] in pending])
+
+    def model_totals(self, order_model):
+        # order_model: {id заказа: ключ модели} -> {ключ модели: единиц}
+        ids, totals = self.order_totals()
+        if not len(ids):
+            return {}
+        keys = list(dict.fromkeys(order_model.values()))
+        code = {key: i for i, key in enumerate(keys)}
+        lookup = np.full(int(ids.max()) + 1, -1, dtype=np.int64)
+        for order_id, key in order_model.items():
+            if order_id <= ids.max():
+                lookup[order_id] = code[key]
+        codes = lookup[ids]
+        known = codes >= 0
+        sums = np.bincount(codes[known], weights=totals[known], minlength=len(keys))
+        return {key: int(sums[i]) for i, key in enumerate(keys)}
+
+
+def _copy_columns(columns, size, extra=None):
+    # Хранилище только для чтения из первых size строк колонок и колонок extra
+    extra_size = len(extra[0]) if extra is not None else 0
+    copy = ProgressStore(capacity=max(size + extra_size, 1))
+    for target, column in zip((copy._order_ids, copy._days, copy._units), columns):
+        target[:size] = column[:size]
+    if extra_size:
+        for target, column in zip((copy._order_ids, copy._days, copy._units), extra):
+            target[size:size + extra_size] = column
+    copy._size = size + extra_size
+    return copy
@@ -0,0 +1,246 @@
+# Очередность заказов и суточный план производства.
+#
+# Заказы упорядочиваются по правилу (FIFO, EDD, SPT, взвешенный SPT, приоритет)
+# и в этом порядке занимают мощность постов каждого типа. Сценарии «что если»
+# (другая расстановка, правило, приоритеты) считаются параллельно в пуле
+# процессов над массивами, без передачи объектов предметной области.
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+
+from .dates import as_date
+from .forecast import ForecastEngine, finish_days, remaining_units
+from .order_table import order_columns
+from .progress import EPOCH_ORDINAL
+
+RULES = {
+    "fifo": "В порядке создания",
+    "edd": "Ранний срок сдачи (EDD)",
+    "spt": "Короткие заказы первыми (SPT)",
+    "wspt": "Взвешенный SPT (трудоёмкость / приоритет)",
+    "priority": "По приоритету, затем по сроку",
+}
+
+NO_DUE = np.iinfo(np.int64).max // 2  # Порядковый номер «срока нет» — в конец очереди
+
+
+class OrderBatch:
+    """Заказы в виде массивов: всё, что нужно для планирования и сценариев."""
+
+    def __init__(self, orders, engine):
+        self.orders = list(orders)
+        self.ids, due, self.priority = order_columns(self.orders, "id", "due_date", "priority")
+        self.remaining = remaining_units(self.orders)
+        self.unit_work = (engine.unit_work_matrix(self.orders) if self.orders
+                          else np.zeros((0, len(engine.stage_types))))
+        self.due = np.where(np.isnat(due), NO_DUE, due.astype(np.int64) + EPOCH_ORDINAL)
+
+    @classmethod
+    def from_columns(cls, orders, ids, remaining, unit_work, due, priority):
+        """Пакет из готовых колонок (пакетный расчёт без объектов заказов).
+
+        orders — строки заказов с атрибутом id в том же порядке; due —
+        datetime64[D] (NaT — срока нет).
+        """
+        batch = object.__new__(cls)
+        batch.orders = list(orders)
+        batch.ids, batch.remaining, batch.unit_work, batch.priority = ids, remaining, unit_work, priority
+        batch.due = np.where(np.isnat(due), NO_DUE, due.astype(np.int64) + EPOCH_ORDINAL)
+        return batch
+
+    def scaled_work(self, efficiency):
+        # Трудоёмкость единицы с учётом отдачи постов по типам (как в прогнозе)
+        return self.unit_work if efficiency is None else self.unit_work / np.asarray(efficiency, dtype=float)
+
+    @property
+    def work(self):
+        # Оставшаяся трудоёмкость заказа, часы
+        return self.remaining * self.unit_work.sum(axis=1)
+
+
+def sequence_indices(rule, due, work, priority):
+    # Номера заказов в порядке обработки; при равенстве — порядок создания
+    creation = np.arange(len(work))
+    if rule == "fifo":
+        return creation
+    if rule == "edd":
+        return np.lexsort((creation, due))
+    if rule == "spt":
+        return np.lexsort((creation, due, work))
+    if rule == "wspt":
+        return np.lexsort((creation, due, work / np.maximum(priority, 1e-9)))
+    if rule == "priority":
+        return np.lexsort((creation, due, -priority))
+    raise ValueError(f"Неизвестное правило очередности: {rule}")
+
+
+class ProductionPlan:
+    def __init__(self, orders, order_index, finish, daily_units, start_date, due):
+        self.orders = orders  # Заказы в порядке обработки
+        self.order_index = order_index  # Номера заказов в исходном списке
+        self.finish = finish  # Индексы дней завершения (inf — нет мощности)
+        self.daily_units = daily_units  # [заказы × дни] единиц по плану
+        self.start_date = start_date
+        self.due = due
+
+    def finish_dates(self):
+        # Даты завершения в исходном порядке заказов
+        dates = [None] * len(self.orders)
+        for i, day in zip(self.order_index, self.finish):
+            if np.isfinite(day):
+                dates[i] = self.start_date + timedelta(days=int(day))
+        return dates
+
+    def day_plan(self, day):
+        # [(заказ, единиц)] на дату day
+        offset = as_date(day).toordinal() - self.start_date.toordinal()
+        if offset < 0 or offset >= self.daily_units.shape[1]:
+            return []
+        column = self.daily_units[:, offset]
+        return [(self.orders[i], int(column[i])) for i in np.flatnonzero(column)]
+
+    @property
+    def makespan(self):
+        return float(self.finish.max()) + 1 if len(self.finish) else 0.0
+
+    @property
+    def lateness(self):
+        # Опоздание каждого заказа в днях (0 — в срок или срок не задан)
+        return _lateness(self.finish, self.due, self.start_date.toordinal())
+
+
+def _lateness(finish, due, start_ordinal):
+    late = finish + start_ordinal - due
+    late[due == NO_DUE] = 0
+    return np.maximum(late, 0)
+
+
+def _cumulative_daily_units(remaining, unit_work, cumulative_capacity, tail, horizon):
+    # Сколько единиц каждого заказа готово к концу каждого дня (жидкостная модель):
+    # заказ занимает свой отрезок накопленной трудоёмкости каждого типа, а число
+    # готовых единиц ограничено самым отстающим типом этапа
+    length = len(cumulative_capacity)
+    if horizon > length:
+        extra = cumulative_capacity[-1] + tail * np.arange(1, horizon - length + 1)[:, None]
+        cumulative_capacity = np.vstack([cumulative_capacity, extra])
+    cumulative_capacity = cumulative_capacity[:horizon]
+
+    work = remaining[:, None] * unit_work
+    end = np.cumsum(work, axis=0)
+    begin = end - work
+    done_fraction = np.ones((len(remaining), horizon))
+    for col in range(unit_work.shape[1]):
+        needed = work[:, col]
+        has_work = needed > 0
+        if not has_work.any():
+            continue
+        fraction = (cumulative_capacity[None, :, col] - begin[has_work, col][:, None]) / needed[has_work][:, None]
+        done_fraction[has_work] = np.minimum(done_fraction[has_work], np.clip(fraction, 0.0, 1.0))
+    return np.floor(done_fraction * remaining[:, None] + 1e-9)
+
+
+class Scheduler:
+    def __init__(self, engine=None):
+        self.engine = engine or ForecastEngine()
+
+    def sequence(self, orders, rule="fifo"):
+        batch = OrderBatch(orders, self.engine)
+        return [batch.orders[i] for i in sequence_indices(rule, batch.due, batch.work, batch.priority)]
+
+    def plan(self, orders, staffing, start_date=None, rule="fifo", horizon_limit=3660, efficiency=None):
+        """Суточный план: заказы по правилу rule занимают мощность постов.
+
+        orders — заказы или готовый OrderBatch; план строится не дальше
+        horizon_limit дней от начала.
+        """
+        start = as_date(start_date) if start_date is not None else date.today()
+        batch = orders if isinstance(orders, OrderBatch) else OrderBatch(orders, self.engine)
+        order = sequence_indices(rule, batch.due, batch.work, batch.priority)
+        remaining = batch.remaining[order]
+        unit_work = batch.scaled_work(efficiency)[order]
+        cumulative_capacity, tail = self.engine.capacity_window(staffing, start)
+        finish = finish_days(remaining, unit_work, cumulative_capacity, tail)
+
+        finite = finish[np.isfinite(finish)]
+        horizon = int(min(finite.max() if len(finite) else 0, horizon_limit)) + 1
+        cumulative = _cumulative_daily_units(remaining, unit_work, cumulative_capacity, tail, horizon)
+        daily_units = np.diff(cumulative, axis=1, prepend=0.0).astype(np.int64)
+        return ProductionPlan([batch.orders[i] for i in order], order, finish, daily_units,
+                              start, batch.due[order])
+
+
+class Scenario:
+    def __init__(self, name, staffing=None, rule="fifo", priorities=None):
+        self.name = name
+        self.staffing = staffing  # {дата: {тип этапа: часов}}; None — текущая расстановка
+        self.rule = rule
+        self.priorities = priorities or {}  # {id заказа: вес}, заменяет priority заказа
+
+
+class ScenarioResult:
+    def __init__(self, scenario, makespan, total_lateness, max_lateness, late_orders, finish):
+        self.scenario = scenario
+        self.makespan = makespan  # Дней до завершения последнего заказа
+        self.total_lateness = total_lateness  # Сумма опозданий, дней
+        self.max_lateness = max_lateness
+        self.late_orders = late_orders
+        self.finish = finish  # Индексы дней завершения в исходном порядке заказов
+
+    def sort_key(self):
+        return self.makespan, self.total_lateness, self.max_lateness
+
+
+def _evaluate(remaining, unit_work, due, priority, start_ordinal, rule,
+              cumulative_capacity, tail):
+    order = sequence_indices(rule, due, remaining * unit_work.sum(axis=1), priority)
+    finish_sorted = finish_days(remaining[order], unit_work[order], cumulative_capacity, tail)
+    finish = np.empty_like(finish_sorted)
+    finish[order] = finish_sorted
+    lateness = _lateness(finish, due, start_ordinal)
+    makespan = float(finish.max()) + 1 if len(finish) else 0.0
+    return (makespan, float(lateness.sum()), float(lateness.max()) if len(finish) else 0.0,
+            int((lateness > 0).sum()), finish)
+
+
+class WhatIfAnalyzer:
+    """Параллельная оценка сценариев расстановки и приоритетов."""
+
+    def __init__(self, engine=None, workers=None):
+        self.engine = engine or ForecastEngine()
+        self.workers = workers or os.cpu_count() or 1
+
+    def evaluate(self, orders, scenarios, base_staffing, start_date=None, efficiency=None):
+        """Результаты сценариев, отсортированные по сроку выполнения и опозданиям.
+
+        orders — заказы или готовый OrderBatch; efficiency — отдача постов по
+        типам этапов, как в прогнозе.
+        """
+        start = as_date(start_date) if start_date is not None else date.today()
+        batch = orders if isinstance(orders, OrderBatch) else OrderBatch(orders, self.engine)
+        unit_work = batch.scaled_work(efficiency)
+        tasks = []
+        for scenario in scenarios:
+            priority = batch.priority.copy()
+            if scenario.priorities:
+                for i, order_id in enumerate(batch.ids):
+                    priority[i] = scenario.priorities.get(int(order_id), priority[i])
+            staffing = scenario.staffing if scenario.staffing is not None else base_staffing
+            cumulative_capacity, tail = self.engine.capacity_window(staffing, start)
+            tasks.append((batch.remaining, unit_work, batch.due, priority, start.toordinal(),
+                          scenario.rule, cumulative_capacity, tail))
+
+        if self.workers == 1 or len(tasks) <= 1:
+            outcomes = [_evaluate(*task) for task in tasks]
+        else:
+            # spawn: вызов из потока пула задач Qt не должен копировать процесс fork'ом
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)),
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                outcomes = list(pool.map(_evaluate, *zip(*tasks)))
+
+        results = [ScenarioResult(scenario, *outcome) for scenario, outcome in zip(scenarios, outcomes)]
+        results.sort(key=ScenarioResult.sort_key)
+        return results
@@ -0,0 +1,89 @@
+# Префиксный индекс для поиска по мере ввода (сотрудники, заказы).
+#
+# Слова названий хранятся в отсортированном списке (с параллельным списком
+# id), поэтому все совпадения с префиксом находятся бинарным поиском, а не
+# перебором всех объектов.
+
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+
+def _words(text):
+    text = text.lower()
+    words = text.split()
+    if len(words) > 1:
+        words.append(text)  # Запрос с пробелами ищется по названию целиком
+    return words
+
+
+class PrefixIndex:
+    def __init__(self, items=None):
+        # items() -> [(id, текст)]: индекс строится при первом поиске,
+        # до этого add/remove ничего не делают
+        self._items = items
+        self._keys = None  # Отсортированные слова в нижнем регистре
+        self._ids = None  # id объекта для каждого слова
+        self._words = None  # id -> слова, для удаления
+
+    def _ensure(self):
+        if self._keys is None:
+            self._keys, self._ids, self._words = [], [], {}
+            self.extend(self._items() if self._items is not None else ())
+
+    def extend(self, items):
+        # Уже проиндексированные id пропускаются: индекс, построенный при
+        # поиске, может опередить события о добавлении
+        if self._keys is None:
+            return
+        added = [(obj_id, text) for obj_id, text in items if obj_id not in self._words]
+        if len(added) * 50 < len(self._keys):
+            # Немного новых объектов — вставка на место дешевле пересортировки
+            for obj_id, text in added:
+                self.add(obj_id, text)
+            return
+        keys, ids = self._keys, self._ids
+        for obj_id, text in added:
+            words = self._words[obj_id] = _words(text)
+            keys.extend(words)
+            ids.extend([obj_id] * len(words))
+        order = np.argsort(np.array(keys, dtype=str), kind="stable").tolist()
+        self._keys = [keys[i] for i in order]
+        self._ids = [ids[i] for i in order]
+
+    def add(self, obj_id, text):
+        if self._keys is None or obj_id in self._words:
+            return
+        words = self._words[obj_id] = _words(text)
+        for word in words:
+            position = bisect_right(self._keys, word)
+            self._keys.insert(position, word)
+            self._ids.insert(position, obj_id)
+
+    def remove(self, obj_id):
+        if self._keys is None:
+            return
+        for word in self._words.pop(obj_id, ()):
+            position = bisect_left(self._keys, word)
+            while position < len(self._keys) and self._keys[position] == word:
+                if self._ids[position] == obj_id:
+                    del self._keys[position]
+                    del self._ids[position]
+                    break
+                position += 1
+
+    def search(self, query, limit=50):
+        """id объектов, у которых какое-либо слово (или название целиком) начинается с query."""
+        query = query.strip().lower()
+        if not query:
+            return []
+        self._ensure()
+        keys, ids = self._keys, self._ids
+        found = {}
+        position = bisect_left(keys, query)
+        while position < len(keys) and len(found) < limit:
+            if not keys[position].startswith(query):
+                break
+            found[ids[position]] = None
+            position += 1
+        return list(found)
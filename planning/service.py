@@ -0,0 +1,467 @@
+# Общий сервер планирования для нескольких рабочих мест.
+#
+# Сервер владеет базой (SqliteStorage) и принимает от клиентов изменения в
+# формате StorageBase (вид, данные). Каждое принятое изменение получает номер
+# версии и рассылается остальным клиентам дельтой: клиент применяет её к своим
+# данным в памяти без перезагрузки. Назначения на посты защищены оптимистической
+# блокировкой: клиент сообщает версию, до которой он применил чужие изменения,
+# и правку дня, который после этой версии изменил другой клиент, сервер
+# отклоняет (конфликт) и возвращает текущее состояние затронутых дней. Id новых
+# сотрудников, моделей и заказов сервер выдаёт блоками, чтобы они не совпадали
+# у разных клиентов.
+#
+# Протокол — строки JSON по одному долгоживущему соединению на клиента (Unix-
+# сокет или TCP): запросы {"id", "op", ...}, ответы {"id", "result" |
+# "conflict" | "error"} и рассылка {"delta": [версия, вид, данные]}. Клиенту
+# всё отправляет его собственный поток из очереди, так что медленный клиент не
+# задерживает остальных. RemoteStorage — клиент с интерфейсом SqliteStorage:
+# сохранения не ждут ответа сервера, чтение ждёт.
+#
+# Аутентификации нет: любой, кто может подключиться к сокету, читает и меняет
+# данные. Доступ ограничивают права на файл Unix-сокета, а TCP по умолчанию
+# слушает только локальный адрес (LOCAL_HOST); открывать порт в сеть можно
+# лишь за доверенным туннелем (SSH, VPN).
+
+import itertools
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+from concurrent.futures import Future
+
+from .constants import DATE_FORMAT
+from .dates import as_date
+from .storage import ID_TABLES, OPERATIONS, StorageBase
+
+# Чтения, доступные клиентам (начальная загрузка и ленивая история заказов)
+READS = frozenset(("is_empty", "load_employees", "load_models", "load_orders", "load_open_progress",
+                   "load_progress", "load_model_progress_since", "load_settings", "load_calendar",
+                   "load_assignments"))
+ASSIGNMENT_KINDS = frozenset(("assignment_set", "assignment_cleared", "assignment_plan"))
+
+
+def _encode(message):
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+LOCAL_HOST = "127.0.0.1"  # Хост TCP, если в адресе указан только порт
+LOCAL_HOSTS = {LOCAL_HOST, "localhost", "::1"}
+
+
+def parse_address(text):
+    """Адрес сервера из строки: "хост:порт" или ":порт" (локальный) — TCP, иначе путь Unix-сокета."""
+    host, _, port = text.rpartition(":")
+    if port.isdigit() and not os.path.exists(text):
+        return host or LOCAL_HOST, int(port)
+    return text
+
+
+def is_local(address):
+    # Доступен ли адрес только с этой машины (Unix-сокет или петлевой интерфейс)
+    return not isinstance(address, tuple) or address[0] in LOCAL_HOSTS
+
+
+class RemoteError(Exception):
+    """Сервер планирования отклонил запрос."""
+
+
+# --- Сервер ---
+
+class PlanningService:
+    def __init__(self, storage):
+        self.storage = storage
+        self.version = 0  # Номер последнего принятого изменения
+        self._lock = threading.Lock()  # Порядок версий, записи в базу и рассылки
+        self._read_lock = threading.Lock()  # Соединение чтения базы одно на сервер
+        self._clients = {}  # id клиента -> постановка строки в его очередь отправки
+        self._client_ids = itertools.count(1)
+        self._next_ids = {kind: storage.max_id(kind) + 1 for kind in ID_TABLES}
+        self._days = {}  # "yyyy-MM-dd" -> {пост: id сотрудника}
+        self._versions = {}  # "yyyy-MM-dd" -> {пост: (версия, id клиента)} изменённых постов
+        for day, post_number, employee_id in storage.load_assignments():
+            self._days.setdefault(day, {})[post_number] = employee_id
+
+    # --- Клиенты ---
+
+    def connect(self, send):
+        """Новый клиент; send(строка) отправляет ему дельты. Возвращает (id клиента, версия)."""
+        with self._lock:
+            client = next(self._client_ids)
+            self._clients[client] = send
+            return client, self.version
+
+    def disconnect(self, client):
+        with self._lock:
+            self._clients.pop(client, None)
+
+    def reserve_ids(self, kind, count):
+        # Блок id [start, stop) новых объектов kind
+        with self._lock:
+            start = self._next_ids[kind]
+            self._next_ids[kind] = start + count
+            return start, start + count
+
+    def read(self, method, args):
+        """Чтение базы для клиента; видит все принятые до него изменения."""
+        if method not in READS:
+            raise ValueError(f"чтение {method!r} недоступно")
+        self.storage.flush()
+        with self._read_lock:
+            result = getattr(self.storage, method)(*args)
+            return result if isinstance(result, (list, dict, tuple, bool)) else result.fetchall()
+
+    # --- Изменения ---
+
+    def submit(self, client, kind, payload, base):
+        """Изменение клиента, видевшего чужие изменения до версии base.
+
+        Возвращает (версия, None) или (None, состояние дней) при конфликте:
+        состояние — [(день, [(пост, id сотрудника)])], как данные assignment_plan.
+        """
+        operations = OPERATIONS.get(kind)
+        if operations is None:
+            raise ValueError(f"неизвестное изменение {kind!r}")
+        with self._lock:
+            if kind in ASSIGNMENT_KINDS:
+                cells = self._cells(kind, payload)
+                if self._conflicts(cells, client, base):
+                    return None, self._state(cells)
+            self.storage.apply(kind, payload)
+            self.version += 1
+            version = self.version
+            self._track(kind, payload, client)
+            line = _encode({"delta": [version, kind, payload]})
+            for other, send in self._clients.items():
+                if other != client:
+                    send(line)
+        # Клиент получает подтверждение, когда изменение уже в журнале на
+        # диске; ожидание вне блокировки, чтобы изменения разных клиентов
+        # синхронизировались одним fsync
+        self.storage.sync_journal()
+        return version, None
+
+    @staticmethod
+    def _cells(kind, payload):
+        # {день: посты или None — весь день}, которые правка перезаписывает
+        if kind == "assignment_plan":
+            return {day: None for day, _posts in payload}
+        day, post_number, _employee_id = payload
+        return {day: (post_number,)}
+
+    def _conflicts(self, cells, client, base):
+        for day, posts in cells.items():
+            versions = self._versions.get(day, {})
+            changed = versions.values() if posts is None else (versions.get(p) for p in posts)
+            if any(mark is not None and mark[0] > base and mark[1] != client for mark in changed):
+                return True
+        return False
+
+    def _state(self, cells):
+        return [(day, sorted(self._days.get(day, {}).items())) for day in cells]
+
+    def _track(self, kind, payload, client):
+        # Назначения сервера и версии изменённых постов
+        mark = (self.version, client)
+        if kind == "employee_deleted":
+            for day, posts in self._days.items():
+                for post_number in [p for p, e in posts.items() if e == payload]:
+                    del posts[post_number]
+                    self._versions.setdefault(day, {})[post_number] = mark
+        elif kind == "assignment_plan":
+            for day, rows in payload:
+                versions = self._versions.setdefault(day, {})
+                new = dict(rows)
+                for post_number in set(self._days.get(day, {})) | set(new):
+                    versions[post_number] = mark
+                self._days[day] = new
+        elif kind in ASSIGNMENT_KINDS:
+            day, post_number, employee_id = payload
+            posts = self._days.setdefault(day, {})
+            versions = self._versions.setdefault(day, {})
+            # Сотрудник в один день занимает один пост
+            for other in [p for p, e in posts.items() if e == employee_id and p != post_number]:
+                del posts[other]
+                versions[other] = mark
+            if employee_id is None:
+                posts.pop(post_number, None)
+            else:
+                posts[post_number] = employee_id
+            versions[post_number] = mark
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        if self.connection.family != socket.AF_UNIX:
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        service = self.server.service
+        outbox = queue.Queue()
+        writer = threading.Thread(target=self._send_loop, args=(outbox,), daemon=True)
+        writer.start()
+        client = None
+        try:
+            for line in self.rfile:
+                request = json.loads(line)
+                reply = {"id": request.get("id")}
+                try:
+                    op = request["op"]
+                    if op == "hello":
+                        client, version = service.connect(outbox.put)
+                        reply["result"] = {"client": client, "version": version}
+                    elif op == "change":
+                        version, state = service.submit(client, request["kind"], request["payload"],
+                                                        request.get("base", 0))
+                        if state is None:
+                            reply["result"] = version
+                        else:
+                            reply["conflict"] = state
+                    elif op == "read":
+                        reply["result"] = service.read(request["method"], request.get("args", ()))
+                    elif op == "ids":
+                        reply["result"] = service.reserve_ids(request["kind"], int(request["count"]))
+                    elif op == "flush":
+                        service.storage.flush()
+                        reply["result"] = None
+                    else:
+                        raise ValueError(f"неизвестный запрос {op!r}")
+                except Exception as error:  # Ошибка запроса возвращается клиенту
+                    reply["error"] = f"{type(error).__name__}: {error}"
+                outbox.put(_encode(reply))
+        except (OSError, ValueError):
+            pass  # Соединение разорвано или поток повреждён
+        finally:
+            if client is not None:
+                service.disconnect(client)
+            outbox.put(None)
+            writer.join()
+
+    def _send_loop(self, outbox):
+        # Всё накопившееся в очереди уходит одной отправкой
+        while True:
+            lines = [outbox.get()]
+            while True:
+                try:
+                    lines.append(outbox.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in lines
+            try:
+                self.wfile.write(b"".join(line for line in lines if line is not None))
+            except OSError:
+                stop = True
+            if stop:
+                return
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TcpServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_server(service, address):
+    """Сервер для service по адресу parse_address; запуск — serve_forever()."""
+    if isinstance(address, tuple):
+        server = _TcpServer(address, _Handler)
+    else:
+        if os.path.exists(address):
+            os.unlink(address)  # Сокет, оставшийся от прошлого запуска
+        server = _UnixServer(address, _Handler)
+    server.service = service
+    return server
+
+
+# --- Клиент ---
+
+class RemoteStorage(StorageBase):
+    ID_BLOCK = 64  # Первый блок id; следующие вдвое больше, до MAX_ID_BLOCK
+    MAX_ID_BLOCK = 4096
+
+    def __init__(self, address, timeout=60):
+        self.address = address
+        self.timeout = timeout
+        family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        self._socket.connect(address)
+        if family == socket.AF_INET:
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._stream = self._socket.makefile("rb")
+        self._send_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self._pending = {}  # id запроса -> Future (None — сохранение без ожидания)
+        self._listen_lock = threading.Lock()
+        self._listener = None
+        self._buffer = []  # Дельты, пришедшие до listen
+        self._error = None
+        self.connected = True
+        self._reader = threading.Thread(target=self._read_loop, name="planning-client", daemon=True)
+        self._reader.start()
+        hello = self._call("hello")
+        self.client_id = hello["client"]
+        # Версия, до которой применены чужие изменения (основа оптимистической блокировки)
+        self.base = hello["version"]
+
+    # --- Соединение ---
+
+    def _send(self, message):
+        with self._send_lock:
+            self._socket.sendall(_encode(message))
+
+    def _call(self, op, **fields):
+        if not self.connected:
+            raise ConnectionError("нет связи с сервером планирования")
+        request_id = next(self._request_ids)
+        future = self._pending[request_id] = Future()
+        self._send({"id": request_id, "op": op, **fields})
+        return future.result(self.timeout)
+
+    def _read_loop(self):
+        try:
+            for line in self._stream:
+                message = json.loads(line)
+                delta = message.get("delta")
+                if delta is not None:
+                    self._deliver(*delta)
+                    continue
+                future = self._pending.pop(message["id"], None)
+                if "conflict" in message:
+                    # Правка назначений отклонена: клиент получает текущее состояние дней
+                    self._deliver(None, "conflict", message["conflict"])
+                elif "error" in message:
+                    error = RemoteError(message["error"])
+                    if future is None:
+                        self._error = error
+                    else:
+                        future.set_exception(error)
+                elif future is not None:
+                    future.set_result(message["result"])
+        except (OSError, ValueError):
+            pass
+        self.connected = False
+        for future in list(self._pending.values()):
+            if future is not None and not future.done():
+                future.set_exception(ConnectionError("нет связи с сервером планирования"))
+        self._pending.clear()
+        self._deliver(None, "disconnected", None)
+
+    def _deliver(self, version, kind, payload):
+        with self._listen_lock:
+            if self._listener is None:
+                self._buffer.append((version, kind, payload))
+            else:
+                self._listener(version, kind, payload)
+
+    def listen(self, callback):
+        """callback(версия, вид, данные) — в потоке чтения; сначала накопленные дельты.
+
+        Кроме видов изменений приходят "conflict" (данные — состояние дней, как
+        у assignment_plan) и "disconnected". Применив дельту, клиент вызывает
+        acknowledge(версия).
+        """
+        with self._listen_lock:
+            self._listener = callback
+            buffered, self._buffer = self._buffer, []
+            for delta in buffered:
+                callback(*delta)
+
+    def acknowledge(self, version):
+        if version is not None and version > self.base:
+            self.base = version
+
+    # --- Запись ---
+
+    def apply(self, kind, payload):
+        if self.connected:
+            request_id = next(self._request_ids)
+            self._pending[request_id] = None
+            self._send({"id": request_id, "op": "change", "kind": kind, "payload": payload,
+                        "base": self.base})
+
+    def id_source(self, kind):
+        size = self.ID_BLOCK
+        while True:
+            start, stop = self._call("ids", kind=kind, count=size)
+            yield from range(start, stop)
+            size = min(size * 2, self.MAX_ID_BLOCK)
+
+    def flush(self):
+        # Дожидается, пока сервер запишет все отправленные изменения
+        if self.connected:
+            self._call("flush")
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._reader.join()
+            self._stream.close()
+            self._socket.close()
+
+    # --- Чтение ---
+
+    def _read(self, method, *args):
+        return self._call("read", method=method, args=args)
+
+    def is_empty(self):
+        return self._read("is_empty")
+
+    def load_employees(self):
+        return self._read("load_employees")
+
+    def load_models(self):
+        return self._read("load_models")
+
+    def load_orders(self):
+        return self._read("load_orders")
+
+    def iter_orders(self):
+        return iter(self.load_orders())
+
+    def load_open_progress(self):
+        return self._read("load_open_progress")
+
+    def load_progress(self, order_ids):
+        return self._read("load_progress", [int(order_id) for order_id in order_ids])
+
+    def load_model_progress_since(self, day):
+        return self._read("load_model_progress_since", as_date(day).strftime(DATE_FORMAT))
+
+    def load_settings(self):
+        return self._read("load_settings")
+
+    def load_calendar(self):
+        days, employees, posts = self._read("load_calendar")
+        return days, employees, posts
+
+    def load_assignments(self):
+        return self._read("load_assignments")
+
+
+def serve(db_path, address):
+    """Сервер планирования над базой db_path до прерывания (Ctrl+C)."""
+    from .storage import SqliteStorage
+    storage = SqliteStorage(db_path, journal=True)
+    server = make_server(PlanningService(storage), address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        storage.close()
+        if not isinstance(address, tuple) and os.path.exists(address):
+            os.unlink(address)
@@ -0,0 +1,213 @@
+# Рабочий календарь и мощность линии по дням.
+#
+# ShiftCalendar хранит длительность смены по дням (выходные, праздники,
+# сверхурочные), ограничения часов постов и часы сотрудников (отпуска,
+# индивидуальные смены). CapacityTimeline превращает календарь и расстановку
+# в матрицу мощности [дни × типы этапов] с префиксными суммами: дата
+# завершения работы находится бинарным поиском, а правка одного дня
+# пересчитывает одну строку и сдвигает хвост префиксных сумм.
+
+from datetime import timedelta
+
+import numpy as np
+
+from .constants import STAGE_TYPES
+from .dates import as_date
+
+
+class ShiftCalendar:
+    def __init__(self, default_hours=8.0, weekends=()):
+        self.default_hours = default_hours  # Длительность обычной смены
+        self.weekends = set(weekends)  # Выходные дни недели (0 — понедельник)
+        self.day_hours = {}  # дата -> часов (0 — праздник, больше нормы — сверхурочные)
+        self.post_hours = {}  # номер поста -> максимум часов в день
+        self.employee_day_hours = {}  # (id сотрудника, дата) -> часов (0 — отпуск)
+        self._employee_override_days = {}  # дата -> число индивидуальных записей
+
+    # --- Запросы ---
+
+    def hours_on(self, day):
+        # Длительность смены завода в день
+        day = as_date(day)
+        hours = self.day_hours.get(day)
+        if hours is not None:
+            return hours
+        return 0.0 if day.weekday() in self.weekends else self.default_hours
+
+    def employee_hours(self, employee, day):
+        day = as_date(day)
+        hours = self.employee_day_hours.get((employee.id, day))
+        if hours is not None:
+            return hours
+        return min(self.hours_on(day), employee.work_hours)
+
+    def is_available(self, employee, day):
+        return self.employee_hours(employee, day) > 0
+
+    def post_capacity(self, post_number, employee, day):
+        # Часы работы поста в день с учетом смены, поста и сотрудника
+        hours = self.employee_hours(employee, day)
+        limit = self.post_hours.get(post_number)
+        return hours if limit is None else min(hours, limit)
+
+    def has_employee_overrides(self, day):
+        return as_date(day) in self._employee_override_days
+
+    # --- Изменение ---
+
+    def set_day_hours(self, day, hours):
+        self.day_hours[as_date(day)] = hours
+
+    def clear_day_hours(self, day):
+        self.day_hours.pop(as_date(day), None)
+
+    def set_post_hours(self, post_number, hours):
+        # Пост работает не больше hours в день (наладка, общий ресурс);
+        # ограничение действует во все дни, поэтому мощность пересчитывается целиком
+        self.post_hours[post_number] = hours
+
+    def clear_post_hours(self, post_number):
+        self.post_hours.pop(post_number, None)
+
+    def set_employee_hours(self, employee_id, day, hours):
+        day = as_date(day)
+        if (employee_id, day) not in self.employee_day_hours:
+            self._employee_override_days[day] = self._employee_override_days.get(day, 0) + 1
+        self.employee_day_hours[(employee_id, day)] = hours
+
+    def clear_employee_hours(self, employee_id, day):
+        day = as_date(day)
+        if self.employee_day_hours.pop((employee_id, day), None) is not None:
+            left = self._employee_override_days[day] - 1
+            if left:
+                self._employee_override_days[day] = left
+            else:
+                del self._employee_override_days[day]
+
+    def add_vacation(self, employee_id, start, end):
+        day, end = as_date(start), as_date(end)
+        while day <= end:
+            self.set_employee_hours(employee_id, day, 0.0)
+            day += timedelta(days=1)
+
+
+class CapacityTimeline:
+    """Мощность по типам этапов на горизонте [origin, origin + horizon_days)."""
+
+    def __init__(self, calendar, assignments, post_type_of, origin, horizon_days=3 * 366,
+                 stage_types=STAGE_TYPES):
+        self.calendar = calendar
+        self.assignments = assignments  # AssignmentStore
+        self.post_type_of = post_type_of
+        self.stage_types = tuple(stage_types)
+        self._type_index = {t: i for i, t in enumerate(self.stage_types)}
+        self.origin = as_date(origin)
+        self.horizon_days = horizon_days
+        self.daily = np.zeros((horizon_days, len(self.stage_types)))
+        self.prefix = np.zeros_like(self.daily)
+        self.rebuild()
+
+    def _row(self, day, roster):
+        row = np.zeros(len(self.stage_types))
+        for post_number, employee in roster.items():
+            col = self._type_index.get(self.post_type_of(post_number))
+            if col is not None:
+                row[col] += self.calendar.post_capacity(post_number, employee, day)
+        return row
+
+    def _compute(self, first, last):
+        # Строки мощности для индексов дней [first, last]
+        rows = np.zeros((last - first + 1, len(self.stage_types)))
+        roster_day = None
+        roster = {}
+        cache = {}
+        for offset in range(first, last + 1):
+            day = self.origin + timedelta(days=offset)
+            effective = self.assignments.effective_date(day)
+            if effective != roster_day:
+                roster_day = effective
+                roster = self.assignments.on_date(effective) if effective else {}
+                cache.clear()
+            if self.calendar.has_employee_overrides(day):
+                rows[offset - first] = self._row(day, roster)
+                continue
+            # Без индивидуальных записей строка зависит только от длительности смены
+            key = self.calendar.hours_on(day)
+            row = cache.get(key)
+            if row is None:
+                row = cache[key] = self._row(day, roster)
+            rows[offset - first] = row
+        return rows
+
+    def rebuild(self):
+        if self.horizon_days:
+            self.daily[:] = self._compute(0, self.horizon_days - 1)
+        np.cumsum(self.daily, axis=0, out=self.prefix)
+
+    def refresh(self, start, end=None):
+        """Пересчитывает дни [start, end] и сдвигает префиксные суммы на разницу."""
+        first = max((as_date(start) - self.origin).days, 0)
+        last = self.horizon_days - 1 if end is None else min((as_date(end) - self.origin).days,
+                                                             self.horizon_days - 1)
+        if last < first:
+            return
+        rows = self._compute(first, last)
+        delta = rows - self.daily[first:last + 1]
+        if not delta.any():
+            return
+        self.daily[first:last + 1] = rows
+        # Префиксные суммы внутри диапазона и постоянный сдвиг после него
+        self.prefix[first:last + 1] += np.cumsum(delta, axis=0)
+        self.prefix[last + 1:] += delta.sum(axis=0)
+
+    def refresh_assignment(self, day, last=None):
+        # Расстановка дней [day, last] действует до следующей заданной даты
+        following = self.assignments.next_date_after(last or day)
+        self.refresh(day, following - timedelta(days=1) if following else None)
+
+    def snapshot(self):
+        # Копия мощности для расчёта в фоновом потоке: правки дней её не меняют
+        copy = object.__new__(CapacityTimeline)
+        copy.__dict__.update(self.__dict__)
+        copy.daily = self.daily.copy()
+        copy.prefix = self.prefix.copy()
+        return copy
+
+    def day_capacity(self, day):
+        """Мощность по типам этапов за день, в том числе вне горизонта (прошедшие дни)."""
+        offset = (as_date(day) - self.origin).days
+        if 0 <= offset < self.horizon_days:
+            return self.daily[offset].copy()
+        return self._compute(offset, offset)[0]
+
+    def tail(self):
+        # Средняя мощность в день после горизонта (по последней неделе)
+        return self.daily[-7:].mean(axis=0) if self.horizon_days else np.zeros(len(self.stage_types))
+
+    def window(self, start_date):
+        """(накопленная мощность [дни × типы] начиная со start_date, мощность после окна)."""
+        offset = (as_date(start_date) - self.origin).days
+        if offset < 0 or offset >= self.horizon_days:
+            tail = self.tail()
+            return tail[None, :].copy(), tail
+        cumulative = self.prefix[offset:]
+        if offset:
+            cumulative = cumulative - self.prefix[offset - 1]
+        return cumulative, self.tail()
+
+    def finish_date(self, start_date, work):
+        """Дата, когда будет выполнена работа work = {тип этапа: часов} (None — никогда)."""
+        cumulative, tail = self.window(start_date)
+        day = 0
+        for stage_type, hours in work.items():
+            col = self._type_index[stage_type]
+            if hours <= 0:
+                continue
+            if hours <= cumulative[-1, col] + 1e-9:
+                found = int(np.searchsorted(cumulative[:, col], hours - 1e-9, side="left"))
+            elif tail[col] > 0:
+                found = len(cumulative) - 1 + int(np.ceil((hours - cumulative[-1, col]) / tail[col]))
+            else:
+                return None
+            day = max(day, found)
+        return as_date(start_date) + timedelta(days=day)
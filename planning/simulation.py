@@ -0,0 +1,230 @@
+# Дискретно-событийное моделирование производственной линии.
+#
+# Заказ делится на партии; каждая партия проходит этапы модели по порядку и на
+# каждом этапе занимает свободный пост нужного типа. Очереди перед постами
+# обслуживаются по приоритету заказа (порядок в списке). События хранятся в
+# куче, время — рабочие часы от начала прогноза. Методом Монте-Карло с разбросом
+# времени этапов получаются P50/P90 дат завершения; повторы считаются в пуле
+# процессов. Часы модели переводятся в даты по мощности CapacityTimeline:
+# выходные, праздники, сверхурочные и отпуска сдвигают даты так же, как в
+# прогнозе.
+
+import heapq
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+
+from .constants import STAGE_TYPES
+from .dates import as_date
+
+
+class CompletionInterval:
+    def __init__(self, p50, p90):
+        self.p50 = p50  # Дата, к которой заказ завершается с вероятностью 50%
+        self.p90 = p90  # ... и с вероятностью 90%
+
+
+class SimulationJob:
+    # Заказ в виде, пригодном для передачи в процесс-исполнитель
+    __slots__ = ("remaining", "stages", "lots")
+
+    def __init__(self, remaining, stages, lots):
+        self.remaining = remaining  # Осталось произвести единиц
+        self.stages = stages  # [(индекс типа этапа, часов на единицу)]
+        self.lots = lots  # Размеры партий
+
+
+def _split_lots(units, lot_size):
+    if units <= 0:
+        return []
+    count = -(-units // lot_size)
+    base, extra = divmod(units, count)
+    return [base + 1] * extra + [base] * (count - extra)
+
+
+def build_jobs(orders, stage_types=STAGE_TYPES, max_lots_per_order=20, task_budget=20000):
+    # Число партий ограничено так, чтобы задач (партия × этап) в прогоне было
+    # не больше task_budget: стоимость прогона не растёт с объёмом заказов
+    orders = list(orders)
+    type_index = {t: i for i, t in enumerate(stage_types)}
+    total_stages = sum(len(o.model.stages) for o in orders) or 1
+    lots_per_order = max(1, min(max_lots_per_order, task_budget // total_stages))
+    jobs = []
+    for order in orders:
+        remaining = max(order.quantity - order.completed_units, 0)
+        stages = [(type_index[s.stage_type], s.time_per_unit) for s in order.model.stages]
+        lot_size = max(1, -(-remaining // lots_per_order))
+        jobs.append(SimulationJob(remaining, stages, _split_lots(remaining, lot_size)))
+    return jobs
+
+
+def simulate_once(jobs, posts_per_type, durations):
+    """Один прогон модели. durations — длительности задач в порядке task_means.
+
+    Возвращает массив часов завершения заказов (inf — нет постов нужного типа).
+    """
+    n_types = len(posts_per_type)
+    free = list(posts_per_type)
+    queues = [[] for _ in range(n_types)]
+    events = []
+    finish = np.zeros(len(jobs))
+    task_offsets = _task_offsets(jobs)
+    blocked = set()
+
+    def ready(now, priority, lot, stage):
+        job = jobs[priority]
+        stage_type = job.stages[stage][0]
+        if posts_per_type[stage_type] == 0:
+            blocked.add(priority)
+            return
+        heapq.heappush(queues[stage_type], (priority, lot, stage))
+        dispatch(now, stage_type)
+
+    def dispatch(now, stage_type):
+        queue = queues[stage_type]
+        while free[stage_type] and queue:
+            priority, lot, stage = heapq.heappop(queue)
+            free[stage_type] -= 1
+            task = task_offsets[priority] + lot * len(jobs[priority].stages) + stage
+            heapq.heappush(events, (now + durations[task], priority, lot, stage))
+
+    for priority, job in enumerate(jobs):
+        if not job.lots:
+            continue
+        for lot in range(len(job.lots)):
+            ready(0.0, priority, lot, 0)
+
+    while events:
+        now, priority, lot, stage = heapq.heappop(events)
+        job = jobs[priority]
+        stage_type = job.stages[stage][0]
+        free[stage_type] += 1
+        if stage + 1 < len(job.stages):
+            ready(now, priority, lot, stage + 1)
+        else:
+            finish[priority] = max(finish[priority], now)
+        dispatch(now, stage_type)
+
+    for priority in blocked:
+        finish[priority] = np.inf
+    return finish
+
+
+def _task_offsets(jobs):
+    offsets = np.zeros(len(jobs) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(job.lots) * len(job.stages) for job in jobs])
+    return offsets
+
+
+def task_means(jobs):
+    # Средние длительности задач (партия × этап) в часах и размеры партий
+    means = []
+    sizes = []
+    for job in jobs:
+        for lot_units in job.lots:
+            for _, hours in job.stages:
+                means.append(lot_units * hours)
+                sizes.append(lot_units)
+    return np.array(means), np.array(sizes)
+
+
+def _run_chunk(jobs, posts_per_type, cv, replications, seed):
+    rng = np.random.default_rng(seed)
+    means, sizes = task_means(jobs)
+    results = np.empty((replications, len(jobs)))
+    for replication in range(replications):
+        if cv > 0:
+            # Сумма n независимых времен с коэффициентом вариации cv имеет CV = cv / sqrt(n)
+            lot_cv = cv / np.sqrt(np.maximum(sizes, 1))
+            shape = 1.0 / lot_cv ** 2
+            durations = rng.gamma(shape, means / shape)
+        else:
+            durations = means
+        results[replication] = simulate_once(jobs, posts_per_type, durations)
+    return results
+
+
+class LineSimulator:
+    """Монте-Карло моделирование сроков завершения заказов."""
+
+    def __init__(self, posts_per_type, workday_hours=8.0, stage_cv=0.2,
+                 stage_types=STAGE_TYPES, max_lots_per_order=20, task_budget=20000, workers=None,
+                 capacity=None):
+        self.stage_types = tuple(stage_types)
+        # posts_per_type: {тип этапа: число постов}
+        self.posts = [int(posts_per_type.get(t, 0)) for t in self.stage_types]
+        self.workday_hours = workday_hours
+        # capacity — CapacityTimeline (или её snapshot) с теми же типами этапов;
+        # без неё каждый день считается сменой в workday_hours часов
+        self.capacity = capacity
+        self.stage_cv = stage_cv
+        self.max_lots_per_order = max_lots_per_order
+        self.task_budget = task_budget
+        self.workers = workers or os.cpu_count() or 1
+
+    def replicate(self, orders, replications=1000, seed=None):
+        """Матрица [повторы × заказы] часов завершения."""
+        jobs = build_jobs(orders, self.stage_types, self.max_lots_per_order, self.task_budget)
+        seeds = np.random.SeedSequence(seed).spawn(self.workers)
+        chunks = [len(part) for part in np.array_split(np.arange(replications), self.workers)]
+        chunks = [(c, s) for c, s in zip(chunks, seeds) if c]
+        if len(chunks) == 1:
+            count, chunk_seed = chunks[0]
+            return _run_chunk(jobs, self.posts, self.stage_cv, count, chunk_seed)
+        # spawn: процессы не наследуют копию памяти вызывающего потока (fork из
+        # потока пула задач Qt копирует чужие блокировки и может зависнуть)
+        with ProcessPoolExecutor(max_workers=len(chunks),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_run_chunk, jobs, self.posts, self.stage_cv, count, chunk_seed)
+                       for count, chunk_seed in chunks]
+            return np.vstack([f.result() for f in futures])
+
+    def completion_intervals(self, orders, start_date=None, replications=1000, seed=None):
+        """P50/P90 дат завершения для каждого заказа (None — нет постов нужного типа)."""
+        orders = list(orders)
+        start = as_date(start_date) if start_date is not None else date.today()
+        if not orders:
+            return []
+        hours = self.replicate(orders, replications, seed)
+        blocked = ~np.isfinite(hours).all(axis=0)
+        hours[:, blocked] = 0.0
+        p50, p90 = np.percentile(hours, [50, 90], axis=0)
+        days50, days90 = self._to_days(start, np.vstack([p50, p90]))
+        intervals = []
+        for order, d50, d90, is_blocked in zip(orders, days50.tolist(), days90.tolist(), blocked):
+            if order.quantity - order.completed_units <= 0:
+                intervals.append(CompletionInterval(start, start))
+            elif is_blocked or d90 < 0:
+                intervals.append(CompletionInterval(None, None))
+            else:
+                intervals.append(CompletionInterval(start + timedelta(days=d50),
+                                                    start + timedelta(days=d90)))
+        return intervals
+
+    def _to_days(self, start, hours):
+        # Часы модели -> номер дня от start, в который они истекают (-1 — никогда).
+        # Час модели — час работы каждого поста; день даёт столько часов, сколько
+        # в среднем работает пост моделируемых типов по мощности этого дня
+        if self.capacity is None:
+            days = np.ceil(hours / self.workday_hours - 1e-9) - 1
+            return np.maximum(days, 0).astype(np.int64)
+        posts = np.array(self.posts, dtype=float)
+        modeled = posts > 0
+        if not modeled.any():
+            return np.zeros(hours.shape, dtype=np.int64)  # Все заказы заблокированы
+        cumulative, tail = self.capacity.window(start)
+        clock = cumulative[:, modeled].sum(axis=1) / posts.sum()
+        tail = tail[modeled].sum() / posts.sum()
+        days = np.searchsorted(clock, hours - 1e-9, side="left").astype(np.int64)
+        beyond = days >= len(clock)
+        if beyond.any():
+            # После горизонта — средняя мощность последней недели
+            if tail <= 0:
+                days[beyond] = -1
+            else:
+                extra = np.ceil((hours[beyond] - clock[-1]) / tail - 1e-9).astype(np.int64)
+                days[beyond] = len(clock) - 1 + np.maximum(extra, 1)
+        return days
@@ -0,0 +1,596 @@
+# Хранение данных в SQLite.
+#
+# База работает в режиме WAL: чтение из потока интерфейса не ждёт записи.
+# Все изменения ставятся в очередь и записываются фоновым потоком пачками,
+# по одной транзакции на пачку, поэтому сохранение выработки не блокирует UI.
+# С журналом (journal=True) изменения до записи в базу защищены от сбоя
+# журналом planning.journal; при запуске воспроизводится его хвост.
+# История выработки закрытых заказов читается только по запросу.
+#
+# Сохранение объекта — изменение (вид, данные): данные в формате строк load_*
+# из чисел, строк и списков, так что изменение можно передать в JSON. Общий
+# для хранилищ StorageBase строит изменения, SqliteStorage превращает их в
+# операции SQL, а RemoteStorage (planning.service) отправляет серверу
+# планирования.
+
+import queue
+import sqlite3
+import threading
+
+from .constants import DATE_FORMAT
+from .dates import as_date
+from .journal import Journal
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    role TEXT NOT NULL,
+    work_hours REAL NOT NULL DEFAULT 8
+);
+CREATE TABLE IF NOT EXISTS product_models (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stages (
+    model_id INTEGER NOT NULL REFERENCES product_models(id),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    stage_type TEXT NOT NULL,
+    time_per_unit REAL NOT NULL,
+    PRIMARY KEY (model_id, position)
+);
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    model_id INTEGER NOT NULL REFERENCES product_models(id),
+    quantity INTEGER NOT NULL,
+    creation_date TEXT NOT NULL,
+    completed_units INTEGER NOT NULL DEFAULT 0,
+    last_progress_date TEXT,
+    due_date TEXT,
+    priority REAL NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS daily_progress (
+    order_id INTEGER NOT NULL REFERENCES orders(id),
+    day TEXT NOT NULL,
+    units INTEGER NOT NULL,
+    PRIMARY KEY (order_id, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS assignments (
+    day TEXT NOT NULL,
+    post_number INTEGER NOT NULL,
+    employee_id INTEGER NOT NULL REFERENCES employees(id),
+    PRIMARY KEY (day, post_number)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calendar_days (
+    day TEXT PRIMARY KEY,
+    hours REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS post_hours (
+    post_number INTEGER PRIMARY KEY,
+    hours REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS employee_hours (
+    employee_id INTEGER NOT NULL REFERENCES employees(id),
+    day TEXT NOT NULL,
+    hours REAL NOT NULL,
+    PRIMARY KEY (employee_id, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS assignments_by_employee ON assignments(employee_id, day);
+CREATE INDEX IF NOT EXISTS progress_by_day ON daily_progress(day);
+"""
+
+CREATION_FORMAT = "%Y-%m-%d %H:%M:%S"
+JOURNAL_SUFFIX = ".events"  # Журнал изменений рядом с базой (не путать с "-journal" SQLite)
+JOURNAL_SEQ = "journal_seq"  # Настройка: номер последней записи журнала в базе
+_SAVE_JOURNAL_SEQ = "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)"
+# Основные коды ошибок SQLite, не зависящие от самого изменения: SQLITE_BUSY,
+# SQLITE_LOCKED, SQLITE_NOMEM, SQLITE_IOERR, SQLITE_FULL. Изменение с такой
+# ошибкой не пропускается, а повторяется
+_TRANSIENT_ERRORS = {5, 6, 7, 10, 13}
+
+
+def _transient(error):
+    code = getattr(error, "sqlite_errorcode", None)
+    return code is not None and code & 0xFF in _TRANSIENT_ERRORS
+
+# Колонки, добавленные после первой версии схемы: (таблица, колонка, определение)
+MIGRATIONS = (
+    ("orders", "due_date", "TEXT"),
+    ("orders", "priority", "REAL NOT NULL DEFAULT 1"),
+)
+
+
+_SAVE_EMPLOYEE = "INSERT OR REPLACE INTO employees (id, name, role, work_hours) VALUES (?, ?, ?, ?)"
+_SAVE_MODEL = "INSERT OR REPLACE INTO product_models (id, name) VALUES (?, ?)"
+_SAVE_STAGE = ("INSERT OR REPLACE INTO stages (model_id, position, name, stage_type, time_per_unit) "
+               "VALUES (?, ?, ?, ?, ?)")
+_SAVE_ORDER = ("INSERT OR REPLACE INTO orders (id, model_id, quantity, creation_date, "
+               "completed_units, last_progress_date, due_date, priority) VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+_SAVE_PROGRESS = "INSERT OR REPLACE INTO daily_progress (order_id, day, units) VALUES (?, ?, ?)"
+# Выполненные единицы и последний день заказа пересчитываются из его
+# выработки в базе, а не берутся у клиента: записи разных рабочих мест
+# складываются, а не перезаписывают общий итог
+_RECOUNT_COMPLETED = (
+    "UPDATE orders SET "
+    "completed_units = (SELECT COALESCE(SUM(units), 0) FROM daily_progress WHERE order_id = orders.id), "
+    "last_progress_date = (SELECT MAX(day) FROM daily_progress WHERE order_id = orders.id) "
+    "WHERE id = ?")
+
+# Таблицы объектов, id которых выдаёт сервер планирования
+ID_TABLES = {"employees": "employees", "models": "product_models", "orders": "orders"}
+
+
+def employee_row(employee):
+    return (employee.id, employee.name, employee.role, employee.work_hours)
+
+
+def model_row(model):
+    return (model.id, model.name, [(s.name, s.stage_type, s.time_per_unit) for s in model.stages])
+
+
+def order_row(order):
+    return (order.id, order.model.id, order.quantity, order.creation_date.strftime(CREATION_FORMAT),
+            order.completed_units, order.last_progress_date,
+            order.due_date.strftime(DATE_FORMAT) if order.due_date else None, order.priority)
+
+
+# --- Операции SQL изменений: данные -> [(sql, параметры, executemany)] ---
+
+def _stage_rows(models):
+    return [(model_id, i, *stage) for model_id, _name, stages in models
+            for i, stage in enumerate(stages)]
+
+
+def _employee_saved(row):
+    return [(_SAVE_EMPLOYEE, row, False)]
+
+
+def _employee_deleted(employee_id):
+    return [
+        ("DELETE FROM assignments WHERE employee_id = ?", (employee_id,), False),
+        ("DELETE FROM employee_hours WHERE employee_id = ?", (employee_id,), False),
+        ("DELETE FROM employees WHERE id = ?", (employee_id,), False),
+    ]
+
+
+def _model_saved(row):
+    return [
+        (_SAVE_MODEL, row[:2], False),
+        ("DELETE FROM stages WHERE model_id = ?", (row[0],), False),
+        (_SAVE_STAGE, _stage_rows([row]), True),
+    ]
+
+
+def _order_saved(row):
+    return [(_SAVE_ORDER, row, False)]
+
+
+def _progress_recorded(row):
+    order_id, day, units = row
+    return [
+        (_SAVE_PROGRESS, (order_id, day, units), False),
+        (_RECOUNT_COMPLETED, (order_id,), False),
+    ]
+
+
+def _assignment_cleared(row):
+    day, post_number, _employee_id = row
+    return [("DELETE FROM assignments WHERE day = ? AND post_number = ?", (day, post_number), False)]
+
+
+def _assignment_set(row):
+    # Сотрудник в один день занимает один пост
+    day, post_number, employee_id = row
+    return [
+        ("DELETE FROM assignments WHERE day = ? AND employee_id = ?", (day, employee_id), False),
+        ("INSERT OR REPLACE INTO assignments (day, post_number, employee_id) VALUES (?, ?, ?)",
+         (day, post_number, employee_id), False),
+    ]
+
+
+def _assignment_plan(days):
+    # Дни плана перезаписываются целиком
+    return [
+        ("DELETE FROM assignments WHERE day = ?", [(day,) for day, _posts in days], True),
+        ("INSERT INTO assignments (day, post_number, employee_id) VALUES (?, ?, ?)",
+         [(day, post_number, employee_id) for day, posts in days for post_number, employee_id in posts],
+         True),
+    ]
+
+
+def _import(data):
+    operations = [
+        (_SAVE_EMPLOYEE, data.get("employees", ()), True),
+        (_SAVE_MODEL, [row[:2] for row in data.get("models", ())], True),
+        (_SAVE_STAGE, _stage_rows(data.get("models", ())), True),
+        (_SAVE_ORDER, data.get("orders", ()), True),
+        (_SAVE_PROGRESS, data.get("progress", ()), True),
+        (_RECOUNT_COMPLETED, [(order_id,) for order_id in sorted({row[0] for row in data.get("progress", ())})],
+         True),
+    ]
+    return [operation for operation in operations if operation[1]]
+
+
+def _day_hours(row):
+    # hours=None — вернуть дню обычную смену
+    day, hours = row
+    if hours is None:
+        return [("DELETE FROM calendar_days WHERE day = ?", (day,), False)]
+    return [("INSERT OR REPLACE INTO calendar_days (day, hours) VALUES (?, ?)", (day, hours), False)]
+
+
+def _post_hours(row):
+    # hours=None — снять ограничение поста
+    post_number, hours = row
+    if hours is None:
+        return [("DELETE FROM post_hours WHERE post_number = ?", (post_number,), False)]
+    return [("INSERT OR REPLACE INTO post_hours (post_number, hours) VALUES (?, ?)",
+             (post_number, hours), False)]
+
+
+def _employee_hours(rows):
+    return [("INSERT OR REPLACE INTO employee_hours (employee_id, day, hours) VALUES (?, ?, ?)",
+             rows, True)]
+
+
+def _setting(row):
+    return [("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", tuple(row), False)]
+
+
+OPERATIONS = {
+    "employee_saved": _employee_saved,
+    "employee_deleted": _employee_deleted,
+    "model_saved": _model_saved,
+    "order_saved": _order_saved,
+    "progress_recorded": _progress_recorded,
+    "assignment_cleared": _assignment_cleared,
+    "assignment_set": _assignment_set,
+    "assignment_plan": _assignment_plan,
+    "import": _import,
+    "day_hours": _day_hours,
+    "employee_hours": _employee_hours,
+    "post_hours": _post_hours,
+    "setting": _setting,
+}
+
+
+class StorageBase:
+    """Сохранение объектов предметной области как изменений apply(вид, данные)."""
+
+    def apply(self, kind, payload):
+        raise NotImplementedError
+
+    def id_source(self, kind):
+        # Итератор id новых объектов kind (ключ ID_TABLES) или None — id выдаются локально
+        return None
+
+    def save_employee(self, employee):
+        self.apply("employee_saved", employee_row(employee))
+
+    def delete_employee(self, employee):
+        self.apply("employee_deleted", employee.id)
+
+    def save_model(self, model):
+        self.apply("model_saved", model_row(model))
+
+    def save_order(self, order):
+        self.apply("order_saved", order_row(order))
+
+    def save_progress(self, order, day, units):
+        self.apply("progress_recorded", (order.id, day, units))
+
+    def save_assignment(self, day, post_number, employee):
+        day = day.strftime(DATE_FORMAT)
+        if employee is None:
+            self.apply("assignment_cleared", (day, post_number, None))
+        else:
+            self.apply("assignment_set", (day, post_number, employee.id))
+
+    def save_assignment_plan(self, plan):
+        # plan: {дата: {номер поста: сотрудник}}; дни плана перезаписываются целиком
+        self.apply("assignment_plan", [
+            (day.strftime(DATE_FORMAT), [(post_number, employee.id) for post_number, employee in posts.items()])
+            for day, posts in plan.items()])
+
+    def save_import(self, employees=(), models=(), orders=(), progress=()):
+        """Результат массового импорта одним изменением (одной транзакцией).
+
+        progress — [(id заказа, "yyyy-MM-dd", единиц)]; выполненные единицы
+        затронутых заказов база пересчитывает сама.
+        """
+        data = {
+            "employees": [employee_row(e) for e in employees],
+            "models": [model_row(m) for m in models],
+            "orders": [order_row(o) for o in orders],
+            "progress": list(progress),
+        }
+        self.apply("import", {key: rows for key, rows in data.items() if rows})
+
+    def save_day_hours(self, day, hours):
+        # hours=None — вернуть дню обычную смену
+        self.apply("day_hours", (day.strftime(DATE_FORMAT), hours))
+
+    def save_post_hours(self, post_number, hours):
+        # hours=None — снять ограничение часов поста
+        self.apply("post_hours", (post_number, hours))
+
+    def save_employee_hours(self, rows):
+        # rows: [(id сотрудника, дата, часов)] — индивидуальные смены и отпуска
+        self.apply("employee_hours", [(employee_id, day.strftime(DATE_FORMAT), hours)
+                                      for employee_id, day, hours in rows])
+
+    def save_setting(self, key, value):
+        self.apply("setting", (key, str(value)))
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA foreign_keys=OFF")
+    return connection
+
+
+class SqliteStorage(StorageBase):
+    BATCH_SIZE = 5000  # Максимум операций в одной транзакции
+    COMPACT_BYTES = 1024 * 1024  # Размер журнала, после которого он обрезается
+
+    def __init__(self, path, journal=False):
+        # journal=True — изменения сначала пишутся в журнал path + JOURNAL_SUFFIX
+        # (см. planning.journal) и переживают сбой до записи в базу
+        self.path = path
+        self._reader = _connect(path)
+        self._reader.executescript(SCHEMA)
+        self._migrate()
+        self.journal = None
+        if journal:
+            self.journal = Journal(path + JOURNAL_SUFFIX)
+            self._recover()
+        self._lock = threading.Lock()  # Порядок в очереди записи совпадает с номерами журнала
+        self._queue = queue.Queue()
+        self._error = None
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-writer", daemon=True)
+        self._writer.start()
+
+    def _migrate(self):
+        for table, column, definition in MIGRATIONS:
+            columns = {row[1] for row in self._reader.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self._reader.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        self._reader.commit()
+
+    # --- Журнал ---
+
+    def _recover(self):
+        # Хвост журнала, не попавший в базу до сбоя, воспроизводится одной
+        # транзакцией; запись, которую база не принимает, откатывается до своей
+        # точки сохранения и пропускается
+        row = self._reader.execute("SELECT value FROM settings WHERE key = ?", (JOURNAL_SEQ,)).fetchone()
+        applied = int(row[0]) if row else 0
+        tail = self.journal.records(after=applied)
+        if tail:
+            try:
+                self._replay(tail, isolate=False)
+            except sqlite3.Error:
+                self._replay(tail, isolate=True)
+            applied = tail[-1][0]
+        self.journal.start_after(applied)
+        self._compact(self._reader, applied)
+
+    def _replay(self, records, isolate):
+        # isolate — каждая запись в своей точке сохранения: отвергнутая базой
+        # запись откатывается и пропускается, как при обычной записи
+        with self._reader:
+            self._reader.execute("BEGIN")
+            for _seq, _kind, operations in records:
+                if isolate:
+                    self._reader.execute("SAVEPOINT replay")
+                try:
+                    for sql, params, many in operations:
+                        self._execute(self._reader, sql, params, many)
+                except sqlite3.Error as error:
+                    if not isolate or _transient(error):
+                        raise
+                    self._reader.execute("ROLLBACK TO replay")
+                if isolate:
+                    self._reader.execute("RELEASE replay")
+            self._reader.execute(_SAVE_JOURNAL_SEQ, (JOURNAL_SEQ, records[-1][0]))
+
+    def _compact(self, connection, seq):
+        # Записи журнала до seq обрезаются, когда база надёжно на диске:
+        # контрольная точка WAL синхронизирует журнал WAL и файл базы
+        busy, _frames, _checkpointed = connection.execute("PRAGMA wal_checkpoint(FULL)").fetchone()
+        if not busy:
+            self.journal.compact(seq)
+        return not busy
+
+    # --- Фоновая запись ---
+
+    def _write_loop(self):
+        connection = _connect(self.path)
+        compacted = None
+        retry = []  # Изменения пачки, транзакция которой не зафиксирована
+        while True:
+            batch = retry + [self._queue.get()]
+            count = sum(len(item[1]) for item in batch if isinstance(item, tuple))
+            while count < self.BATCH_SIZE:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+                count += len(item[1]) if isinstance(item, tuple) else 0
+            # Ожидающие и признак остановки разбираются до транзакции: ошибка
+            # записи не должна оставить flush() и close() ждать вечно
+            waiters = [item for item in batch if isinstance(item, threading.Event)]
+            stop = any(item is None for item in batch)
+            changes = [item for item in batch if isinstance(item, tuple)]
+            seq = None
+            retry = []
+            try:
+                with connection:
+                    connection.execute("BEGIN")
+                    for item_seq, operations in changes:
+                        self._write_change(connection, operations)
+                        seq = item_seq if item_seq is not None else seq
+                    if seq is not None:
+                        connection.execute(_SAVE_JOURNAL_SEQ, (JOURNAL_SEQ, seq))
+            except sqlite3.Error as error:
+                # Не зафиксирована вся пачка (диск, блокировка): номер журнала в
+                # базе не сдвигается за её записи, и они повторяются первыми в
+                # следующей пачке, а после остановки — при воспроизведении журнала
+                self._error = error
+                seq = None
+                retry = changes
+            if seq is not None:
+                compacted = seq
+            if (self.journal is not None and compacted is not None
+                    and (stop or self.journal.size > self.COMPACT_BYTES)):
+                if self._compact(connection, compacted):
+                    compacted = None
+            for event in waiters:
+                event.set()
+            if stop:
+                connection.close()
+                return
+
+    def _write_change(self, connection, operations):
+        # Операции одного события — в своей точке сохранения: отвергнутое
+        # базой событие откатывается целиком, остальные события пачки
+        # записываются; ошибка отдаётся следующему flush(). Временная ошибка
+        # (диск, блокировка) прерывает всю пачку, чтобы её повторить
+        connection.execute("SAVEPOINT change")
+        try:
+            for sql, params, many in operations:
+                self._execute(connection, sql, params, many)
+        except sqlite3.Error as error:
+            if _transient(error):
+                raise
+            self._error = error
+            connection.execute("ROLLBACK TO change")
+        connection.execute("RELEASE change")
+
+    @staticmethod
+    def _execute(connection, sql, params, many):
+        if many:
+            connection.executemany(sql, params)
+        else:
+            connection.execute(sql, params)
+
+    def _put(self, kind, operations):
+        # Операции [(sql, параметры, executemany)] одного события предметной
+        # области; с журналом они сначала получают номер записи журнала
+        with self._lock:
+            seq = self.journal.append(kind, operations) if self.journal is not None else None
+            self._queue.put((seq, operations))
+
+    def apply(self, kind, payload):
+        self._put(kind, OPERATIONS[kind](payload))
+
+    def sync_journal(self):
+        # apply возвращается до fsync журнала (см. planning.journal); перед
+        # подтверждением изменения можно дождаться, пока журнал всех принятых
+        # изменений окажется на диске, — это дешевле flush(), который ждёт базу
+        if self.journal is not None:
+            self.journal.wait(self.journal.last_seq)
+
+    def flush(self):
+        # Дожидается записи всех поставленных в очередь изменений
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        # Поток записи останавливается и при ошибке последних изменений: с
+        # журналом они воспроизведутся при следующем открытии базы
+        try:
+            self.flush()
+        finally:
+            self._queue.put(None)
+            self._writer.join()
+            if self.journal is not None:
+                self.journal.close()
+            self._reader.close()
+
+    # --- Чтение ---
+
+    def is_empty(self):
+        return self._reader.execute("SELECT NOT EXISTS (SELECT 1 FROM product_models)").fetchone()[0] == 1
+
+    def load_employees(self):
+        # [(id, имя, должность, часы)]
+        return self._reader.execute(
+            "SELECT id, name, role, work_hours FROM employees ORDER BY id").fetchall()
+
+    def load_models(self):
+        # [(id, название, [(этап, тип, время на ед.)])]
+        models = {}
+        for model_id, name in self._reader.execute("SELECT id, name FROM product_models ORDER BY id"):
+            models[model_id] = (model_id, name, [])
+        for model_id, name, stage_type, time_per_unit in self._reader.execute(
+                "SELECT model_id, name, stage_type, time_per_unit FROM stages "
+                "ORDER BY model_id, position"):
+            models[model_id][2].append((name, stage_type, time_per_unit))
+        return list(models.values())
+
+    def load_orders(self):
+        # [(id, id модели, количество, создан, выполнено, дата последней выработки,
+        #   срок сдачи, приоритет)]
+        return self.iter_orders().fetchall()
+
+    def iter_orders(self):
+        # Потоковое чтение заказов в формате load_orders без загрузки всей таблицы
+        return self._reader.execute(
+            "SELECT id, model_id, quantity, creation_date, completed_units, last_progress_date, "
+            "due_date, priority FROM orders ORDER BY id")
+
+    def load_open_progress(self):
+        # Выработка открытых заказов одним запросом: [(id заказа, дата, единиц)]
+        return self._reader.execute(
+            "SELECT p.order_id, p.day, p.units FROM daily_progress p "
+            "JOIN orders o ON o.id = p.order_id WHERE o.completed_units < o.quantity").fetchall()
+
+    def load_progress(self, order_ids):
+        # Ленивая загрузка истории заказов: [(id заказа, дата, единиц)]
+        rows = []
+        order_ids = list(order_ids)
+        for i in range(0, len(order_ids), 500):
+            chunk = order_ids[i:i + 500]
+            rows += self._reader.execute(
+                "SELECT order_id, day, units FROM daily_progress WHERE order_id IN (%s)"
+                % ",".join("?" * len(chunk)), chunk).fetchall()
+        return rows
+
+    def load_model_progress_since(self, day):
+        # Выработка по моделям и дням начиная с дня day: [(id модели, дата, единиц)]
+        return self._reader.execute(
+            "SELECT o.model_id, p.day, SUM(p.units) FROM daily_progress p "
+            "JOIN orders o ON o.id = p.order_id WHERE p.day >= ? GROUP BY o.model_id, p.day",
+            (as_date(day).strftime(DATE_FORMAT),)).fetchall()
+
+    def max_id(self, kind):
+        # Наибольший id объектов kind (ключ ID_TABLES), 0 — объектов нет
+        return self._reader.execute(f"SELECT COALESCE(MAX(id), 0) FROM {ID_TABLES[kind]}").fetchone()[0]
+
+    def load_settings(self):
+        return dict(self._reader.execute("SELECT key, value FROM settings"))
+
+    def load_calendar(self):
+        # ([(дата, часов)], [(id сотрудника, дата, часов)], [(номер поста, часов)])
+        days = self._reader.execute("SELECT day, hours FROM calendar_days").fetchall()
+        employees = self._reader.execute("SELECT employee_id, day, hours FROM employee_hours").fetchall()
+        posts = self._reader.execute("SELECT post_number, hours FROM post_hours").fetchall()
+        return days, employees, posts
+
+    def load_assignments(self):
+        # Итератор (дата "yyyy-MM-dd", номер поста, id сотрудника)
+        return self._reader.execute(
+            "SELECT day, post_number, employee_id FROM assignments ORDER BY day")
@@ -0,0 +1,111 @@
+# Синтетический завод для нагрузочных замеров.
+#
+# generate_plant создаёт N сотрудников, M моделей по K этапов и заказы,
+# равномерно распределённые по years последних лет, с ежедневной выработкой
+# за время выполнения каждого заказа: старые заказы закрыты, последние —
+# в работе. write_plant записывает всё в базу SqliteStorage, чтобы
+# приложение загружало данные обычным путём. Данные воспроизводимы при том
+# же seed.
+
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from .assignment import AssignmentPlanner
+from .constants import DATE_FORMAT, ROLE_ASSEMBLER, ROLE_ENGINEER, STAGE_ASSEMBLY, STAGE_ENGINEERING
+from .domain import Employee, ProductionStage, ProductModel, ProductionOrder, continue_ids
+from .posts import build_posts
+from .progress import EPOCH_ORDINAL
+
+# progress: (id заказов, порядковые номера дней, единиц) — массивы одной длины
+Plant = namedtuple("Plant", "employees models orders progress posts")
+
+_SURNAMES = ("Иванов", "Петров", "Сидоров", "Кузнецов", "Николаев", "Смирнов", "Попов",
+             "Васильев", "Соколов", "Михайлов", "Новиков", "Фёдоров", "Морозов", "Волков")
+
+
+def generate_plant(employees=50, models=10, stages=6, orders=1000, years=1,
+                   assembly_posts=None, engineering_posts=None, seed=0, today=None):
+    """Синтетические данные завода (Plant); выработка заканчивается вчерашним днём."""
+    rng = np.random.default_rng(seed)
+    today = today or date.today()
+
+    staff = []
+    work_hours = rng.choice((6.0, 8.0, 8.0, 8.0, 10.0), employees)
+    for i in range(employees):
+        # Примерно половина — инженеры: инженерные посты могут занимать только они
+        role = ROLE_ENGINEER if i % 2 else ROLE_ASSEMBLER
+        employee = Employee(f"{_SURNAMES[i % len(_SURNAMES)]} {i + 1:05d}", role, employee_id=i + 1)
+        employee.work_hours = float(work_hours[i])
+        staff.append(employee)
+    continue_ids(Employee, staff)
+
+    product_models = []
+    for i in range(models):
+        model_stages = [ProductionStage(f"Этап {j + 1}", STAGE_ENGINEERING if j % 2 else STAGE_ASSEMBLY,
+                                        round(float(rng.uniform(0.05, 0.6)), 2))
+                        for j in range(stages)]
+        product_models.append(ProductModel(f"Модель {i + 1:04d}", model_stages, model_id=i + 1))
+    continue_ids(ProductModel, product_models)
+
+    history = max(int(years * 365), 1)
+    first_day = today.toordinal() - history
+    created = np.sort(rng.integers(first_day, today.toordinal(), orders))
+    quantity = rng.integers(10, 500, orders)
+    duration = rng.integers(5, 60, orders)  # Дней выполнения заказа
+    model_index = rng.integers(0, max(models, 1), orders)
+    hours = rng.integers(8, 18, orders)
+    priority = rng.choice((1.0, 1.0, 2.0, 3.0), orders)
+    order_list = []
+    progress_ids, progress_days, progress_units = [], [], []
+    for i in range(orders):
+        start = int(created[i])
+        order = ProductionOrder(product_models[model_index[i]], int(quantity[i]),
+                                datetime.fromordinal(start) + timedelta(hours=int(hours[i])),
+                                order_id=i + 1,
+                                due_date=date.fromordinal(start + int(duration[i] * 1.2) + 1),
+                                priority=float(priority[i]))
+        # Выработка — равными долями по дням выполнения; незавершённые на сегодня
+        # заказы получают лишь прошедшие дни
+        days = np.arange(start, min(start + int(duration[i]), today.toordinal()))
+        if len(days):
+            units = np.diff(np.linspace(0, order.quantity, int(duration[i]) + 1).astype(np.int64))
+            units = units[:len(days)]
+            progress_ids.append(np.full(len(days), order.id, dtype=np.int64))
+            progress_days.append(days)
+            progress_units.append(units)
+            order.completed_units = int(units.sum())
+            order.last_progress_date = date.fromordinal(int(days[-1])).strftime(DATE_FORMAT)
+        order_list.append(order)
+    continue_ids(ProductionOrder, order_list)
+
+    def joined(parts, dtype):
+        return np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype=dtype)
+
+    progress = (joined(progress_ids, np.int64), joined(progress_days, np.int64),
+                joined(progress_units, np.int64))
+    if assembly_posts is None:
+        assembly_posts = max(employees // 4, 1)
+    if engineering_posts is None:
+        engineering_posts = max(employees // 4, 1)
+    return Plant(staff, product_models, order_list, progress,
+                 build_posts(assembly_posts, engineering_posts))
+
+
+def write_plant(storage, plant, assignment_days=30, today=None):
+    """Записывает plant в базу; посты расставляются на assignment_days до и после сегодня."""
+    today = today or date.today()
+    order_ids, ordinals, units = plant.progress
+    days = np.datetime_as_string((ordinals - EPOCH_ORDINAL).astype("datetime64[D]"))
+    storage.save_import(employees=plant.employees, models=plant.models, orders=plant.orders,
+                        progress=list(zip(order_ids.tolist(), days.tolist(), units.tolist())))
+    storage.save_setting("assembly_posts", sum(p.stage_type == STAGE_ASSEMBLY for p in plant.posts))
+    storage.save_setting("engineering_posts", sum(p.stage_type == STAGE_ENGINEERING for p in plant.posts))
+    if assignment_days:
+        planner = AssignmentPlanner(plant.posts)
+        open_orders = [o for o in plant.orders if o.completed_units < o.quantity]
+        storage.save_assignment_plan(planner.assign_range(
+            plant.employees, open_orders, today - timedelta(days=assignment_days),
+            today + timedelta(days=assignment_days)))
+    storage.flush()
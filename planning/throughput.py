@@ -0,0 +1,238 @@
+# Фактические темпы выработки по истории ежедневного ввода.
+#
+# Нормативное время этапов (ProductionStage.time_per_unit) на практике
+# оптимистично. ThroughputEstimator ведёт экспоненциально взвешенные оценки
+# (вес дня убывает вдвое за half_life дней):
+#   - темп модели — единиц за день, в который модель выпускалась;
+#   - отдача постов каждого типа — нормативные часы выполненной работы на час
+#     мощности постов в дни с выработкой (1.0 — норматив выполняется точно).
+# Каждая запись выработки обновляет оценки за O(1): суммы хранятся отнесёнными
+# к своему последнему дню и затухают при следующем обращении, так что ввод
+# одного дня не требует обхода истории. Поправка записи за прошедший день
+# учитывается с весом этого дня.
+
+import math
+from datetime import date, timedelta
+
+import numpy as np
+
+from .dates import as_date
+
+HALF_LIFE_DAYS = 14
+HISTORY_HALF_LIVES = 8  # Более старая история весит меньше 0.4% и при загрузке не читается
+MIN_DAYS = 3.0  # Взвешенное число дней с выработкой, с которого оценке можно доверять
+MIN_EFFICIENCY = 0.05  # Нижняя граница отдачи: прогноз не уходит в бесконечность
+MAX_EFFICIENCY = 2.0  # Выше — признак неполной расстановки в истории, а не реальной отдачи
+
+
+class _Decayed:
+    # Экспоненциально затухающая сумма (число или массив), отнесённая к дню ref
+    __slots__ = ("value", "ref")
+
+    def __init__(self, value=0.0, ref=None):
+        self.value = value
+        self.ref = ref
+
+    def add(self, value, day, rate):
+        if self.ref is None:
+            self.ref = day
+        if day > self.ref:
+            # Новое значение не меняет массив на месте: его может читать фоновая задача
+            self.value = self.value * math.exp(-rate * (day - self.ref)) + value
+            self.ref = day
+        else:
+            self.value = self.value + value * math.exp(-rate * (self.ref - day))
+
+    def at(self, day, rate):
+        if self.ref is None or day <= self.ref:
+            return self.value
+        return self.value * math.exp(-rate * (day - self.ref))
+
+
+class ThroughputEstimator:
+    def __init__(self, engine, capacity=None, half_life=HALF_LIFE_DAYS):
+        # engine — ForecastEngine (трудоёмкость моделей по типам этапов);
+        # capacity(день) -> часов мощности по типам этапов за день, например
+        # CapacityTimeline.day_capacity. Без него считаются только темпы моделей
+        self.engine = engine
+        self.capacity = capacity
+        self.half_life = half_life
+        self._rate = math.log(2) / half_life
+        self.reset()
+
+    def reset(self):
+        n_types = len(self.engine.stage_types)
+        self._work = {}  # id модели -> нормативных часов на единицу [типы]
+        self._model_units = {}  # id модели -> _Decayed единиц
+        self._model_days = {}  # id модели -> _Decayed дней с выпуском модели
+        self._model_day_units = {}  # (id модели, день) -> единиц за день
+        self._day_units = {}  # день -> единиц завода за день
+        self._day_capacity = {}  # день -> учтённая мощность [типы]
+        self._earned = _Decayed(np.zeros(n_types))  # Нормативные часы выполненной работы
+        self._available = _Decayed(np.zeros(n_types))  # Мощность дней с выработкой
+        self._days = _Decayed()  # Дни с выработкой
+        self.last_day = None  # Последний день с выработкой (ordinal)
+
+    def history_start(self, today=None):
+        """Первый день истории, заметно влияющей на оценки (для загрузки из базы)."""
+        today = as_date(today) if today is not None else date.today()
+        return today - timedelta(days=self.half_life * HISTORY_HALF_LIVES)
+
+    # --- Учёт выработки ---
+
+    def add_model(self, model):
+        # Трудоёмкость модели запоминается: этапы моделей после создания не меняются
+        if model.id not in self._work:
+            self._work[model.id] = self.engine.model_work(model)
+
+    def observe(self, model, day, units):
+        """Изменение выработки модели за день на units единиц (поправка может быть < 0)."""
+        if units:
+            self.add_model(model)
+            self._observe(model.id, as_date(day).toordinal(), units)
+
+    def fit(self, model_ids, ordinals, units, models=()):
+        """Оценки заново по истории: id моделей, дни-ordinal и единицы — массивы одной длины.
+
+        Векторный расчёт тех же сумм, что дал бы observe для каждой записи.
+        """
+        self.reset()
+        for model in models:
+            self.add_model(model)
+        model_ids = np.asarray(model_ids, dtype=np.int64)
+        if not len(model_ids):
+            return
+        rate = self._rate
+        keys, totals = _group(model_ids, ordinals, units)
+        keys, totals = keys[totals != 0], totals[totals != 0]
+        if not len(keys):
+            return  # Вся история — нулевые записи (например, исправленные на 0)
+        key_models, key_days = keys >> 32, keys & 0xFFFFFFFF
+        self.last_day = last = int(key_days.max())
+        weights = np.exp(-rate * (last - key_days))
+        self._model_day_units = dict(zip(zip(key_models.tolist(), key_days.tolist()),
+                                         totals.tolist()))
+
+        codes, model_index = np.unique(key_models, return_inverse=True)
+        units_sums = np.bincount(model_index, weights=weights * totals)
+        day_sums = np.bincount(model_index, weights=weights * (totals > 0))
+        for code, model_units, model_days in zip(codes.tolist(), units_sums.tolist(),
+                                                 day_sums.tolist()):
+            self._model_units[code] = _Decayed(model_units, last)
+            self._model_days[code] = _Decayed(model_days, last)
+
+        days, day_index = np.unique(key_days, return_inverse=True)
+        day_totals = np.bincount(day_index, weights=totals).astype(np.int64)
+        self._day_units = {day: total for day, total in zip(days.tolist(), day_totals.tolist())
+                           if total}
+        active = day_totals > 0
+        capacity = np.array([self._capacity_on(day) for day in days.tolist()]).reshape(
+            len(days), len(self.engine.stage_types))
+        capacity[~active] = 0
+        self._day_capacity = {day: capacity[i] for i, day in enumerate(days.tolist()) if active[i]}
+        day_weights = np.exp(-rate * (last - days)) * active
+        work = np.array([self._work[code] for code in key_models.tolist()])
+        earned = ((weights * totals)[:, None] * work * (capacity[day_index] > 0)).sum(axis=0)
+        self._earned = _Decayed(earned, last)
+        self._available = _Decayed((day_weights[:, None] * capacity).sum(axis=0), last)
+        self._days = _Decayed(float(day_weights.sum()), last)
+
+    def observe_many(self, model_ids, ordinals, units, models=()):
+        """Пакет изменений: id моделей, дни-ordinal и единицы — массивы одной длины.
+
+        Записи одной модели за один день складываются, так что цена пакета
+        зависит от числа пар (модель, день), а не от числа строк.
+        """
+        for model in models:
+            self.add_model(model)
+        model_ids = np.asarray(model_ids, dtype=np.int64)
+        if not len(model_ids):
+            return
+        unique_keys, sums = _group(model_ids, ordinals, units)
+        # По возрастанию дня: затухающие суммы реже переносятся назад
+        order = np.argsort(unique_keys & 0xFFFFFFFF, kind="stable")
+        for key, total in zip(unique_keys[order].tolist(), sums[order].tolist()):
+            if total:
+                self._observe(key >> 32, key & 0xFFFFFFFF, total)
+
+    def _observe(self, model_id, day, units):
+        rate = self._rate
+        key = (model_id, day)
+        before = self._model_day_units.get(key, 0)
+        after = before + units
+        if after:
+            self._model_day_units[key] = after
+        else:
+            self._model_day_units.pop(key, None)
+        self._model_units.setdefault(model_id, _Decayed()).add(units, day, rate)
+        if (before > 0) != (after > 0):
+            self._model_days.setdefault(model_id, _Decayed()).add(1 if after > 0 else -1, day, rate)
+
+        before = self._day_units.get(day, 0)
+        after = before + units
+        if after:
+            self._day_units[day] = after
+        else:
+            self._day_units.pop(day, None)
+        capacity = self._day_capacity.get(day)
+        if before <= 0 < after:
+            # Мощность дня учитывается один раз, когда в нём появилась выработка
+            capacity = self._capacity_on(day)
+            self._day_capacity[day] = capacity
+            self._available.add(capacity, day, rate)
+            self._days.add(1, day, rate)
+        elif after <= 0 < before:
+            self._available.add(-capacity, day, rate)
+            self._days.add(-1, day, rate)
+            del self._day_capacity[day]
+        if capacity is not None:
+            # Типы без мощности в этот день (нет расстановки) не искажают отдачу
+            self._earned.add(units * self._work[model_id] * (capacity > 0), day, rate)
+        if self.last_day is None or day > self.last_day:
+            self.last_day = day
+
+    def _capacity_on(self, day):
+        n_types = len(self.engine.stage_types)
+        if self.capacity is None:
+            return np.zeros(n_types)
+        return np.asarray(self.capacity(date.fromordinal(day)), dtype=float)
+
+    # --- Оценки ---
+
+    def model_rate(self, model_id):
+        """Единиц модели за рабочий день или None, пока дней с выпуском мало."""
+        days = self._model_days.get(model_id)
+        if days is None or self.last_day is None:
+            return None
+        weight = days.at(self.last_day, self._rate)
+        if weight < MIN_DAYS:
+            return None
+        return self._model_units[model_id].at(self.last_day, self._rate) / weight
+
+    def model_rates(self):
+        # {id модели: единиц в день} по моделям с достаточной историей
+        rates = {model_id: self.model_rate(model_id) for model_id in self._model_days}
+        return {model_id: rate for model_id, rate in rates.items() if rate is not None}
+
+    def efficiency(self):
+        """Отдача постов по типам этапов (порядок engine.stage_types).
+
+        Где истории мало или мощность неизвестна — 1.0, то есть норматив.
+        """
+        result = np.ones(len(self.engine.stage_types))
+        if self.last_day is None or self._days.at(self.last_day, self._rate) < MIN_DAYS:
+            return result
+        available = self._available.at(self.last_day, self._rate)
+        earned = self._earned.at(self.last_day, self._rate)
+        known = available > 1e-9
+        result[known] = np.clip(earned[known] / available[known], MIN_EFFICIENCY, MAX_EFFICIENCY)
+        return result
+
+
+def _group(model_ids, ordinals, units):
+    # Суммы единиц по парам (модель, день): (ключи модель << 32 | день, суммы)
+    keys = (np.asarray(model_ids, dtype=np.int64) << 32) | np.asarray(ordinals, dtype=np.int64)
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=np.asarray(units, dtype=float),
+                       minlength=len(unique_keys)).astype(np.int64)
+    return unique_keys, sums
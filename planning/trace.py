@@ -0,0 +1,197 @@
+# Трассировка горячих путей: интервалы выполнения обработчиков, счётчики и
+# отметки событий (например, зависаний цикла событий).
+#
+# Выключенная трассировка стоит одной проверки флага на вызов. Включенная
+# складывает события в кольцевой буфер последних TRACE_CAPACITY событий,
+# откуда они выгружаются в формате Chrome Trace (chrome://tracing, Perfetto),
+# и, если задан файл, пишет их построчно в журнал с ротацией.
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+TRACE_CAPACITY = 200000
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.tracer._stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.tracer._complete(self.name, self.start, end - self.start, self.args)
+        return False
+
+
+class _NoSpan:
+    # Заглушка для выключенной трассировки
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self.enabled = False
+        self._events = deque(maxlen=capacity)
+        self._counters = {}
+        self._threads = {}  # id потока -> имя, для подписей дорожек в трассе
+        self._stacks = {}  # id потока -> открытые интервалы (читает монитор зависаний)
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self._log = None
+
+    # --- Включение ---
+
+    def enable(self, log_path=None, max_bytes=5 * 1024 * 1024, backups=3):
+        """Включает запись событий; log_path — журнал с ротацией (max_bytes × backups)."""
+        if log_path and self._log is None:
+            handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups,
+                                          encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self._log = logging.getLogger(f"{__name__}.{id(self)}")
+            self._log.propagate = False
+            self._log.setLevel(logging.INFO)
+            self._log.addHandler(handler)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        if self._log is not None:
+            for handler in list(self._log.handlers):
+                self._log.removeHandler(handler)
+                handler.close()
+            self._log = None
+
+    def clear(self):
+        self._events.clear()
+        self._counters.clear()
+
+    # --- Запись ---
+
+    def span(self, name, **args):
+        """Контекстный менеджер: интервал name с дополнительными данными args."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, args)
+
+    def traced(self, name=None):
+        """Декоратор: каждый вызов функции записывается интервалом name (по умолчанию — её имя).
+
+        Лишние позиционные аргументы отбрасываются, как это делает PyQt для
+        обычных методов: слот кнопки получает от сигнала флаг checked.
+        """
+        def decorate(fn):
+            code = fn.__code__
+            max_args = None if code.co_flags & 0x04 else code.co_argcount  # 0x04 — есть *args
+            span_name = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if max_args is not None and len(args) > max_args:
+                    args = args[:max_args]
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, span_name, {}):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def count(self, name, value=1):
+        """Счётчик name (например, созданных виджетов); значение добавляется и к текущему интервалу."""
+        if not self.enabled:
+            return
+        total = self._counters[name] = self._counters.get(name, 0) + value
+        stack = self._stack()
+        if stack:
+            args = stack[-1].args
+            args[name] = args.get(name, 0) + value
+        self._events.append(("C", name, time.perf_counter(), 0.0, threading.get_ident(),
+                             {name: total}))
+
+    def mark(self, name, start, duration, **args):
+        """Событие, измеренное вне Tracer (start — по time.perf_counter, секунды)."""
+        if self.enabled:
+            self._complete(name, start, duration, args)
+
+    def current_spans(self, thread_id=None):
+        """Имена открытых интервалов потока (по умолчанию — текущего), от внешнего к внутреннему."""
+        if thread_id is None:
+            return [span.name for span in self._stack()]
+        return [span.name for span in list(self._stacks.get(thread_id, ()))]
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            thread = threading.current_thread()
+            self._threads[thread.ident] = thread.name
+            self._stacks[thread.ident] = stack
+        return stack
+
+    def _complete(self, name, start, duration, args):
+        thread_id = threading.get_ident()
+        self._events.append(("X", name, start, duration, thread_id, args))
+        if self._log is not None:
+            details = "".join(f" {key}={value}" for key, value in args.items())
+            self._log.info("%s %.2f ms [%s]%s", name, duration * 1000,
+                           self._threads.get(thread_id, thread_id), details)
+
+    # --- Выгрузка ---
+
+    def summary(self):
+        """{имя интервала: (вызовов, всего мс, максимум мс)} по событиям в буфере."""
+        result = {}
+        for phase, name, _start, duration, _thread, _args in list(self._events):
+            if phase != "X":
+                continue
+            calls, total, longest = result.get(name, (0, 0.0, 0.0))
+            result[name] = (calls + 1, total + duration * 1000, max(longest, duration * 1000))
+        return result
+
+    def chrome_trace(self):
+        """События буфера в формате Chrome Trace Event (словарь для json.dump)."""
+        pid = os.getpid()
+        events = [{"ph": "M", "name": "thread_name", "pid": pid, "tid": thread_id,
+                   "args": {"name": thread_name}}
+                  for thread_id, thread_name in list(self._threads.items())]
+        for phase, name, start, duration, thread_id, args in list(self._events):
+            event = {"ph": phase, "name": name, "pid": pid, "tid": thread_id,
+                     "ts": round((start - self._origin) * 1e6, 1), "args": args}
+            if phase == "X":
+                event["dur"] = round(duration * 1e6, 1)
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path):
+        with open(path, "w", encoding="utf-8") as stream:
+            json.dump(self.chrome_trace(), stream, ensure_ascii=False, default=str)
+
+
+TRACER = Tracer()
+traced = TRACER.traced
+span = TRACER.span